@@ -0,0 +1,100 @@
+import os
+import time
+import shutil
+import socket
+import zipfile
+from contextlib import contextmanager
+
+# Absturzsichere Dateioperationen: erst in eine temporäre Datei im Zielordner schreiben,
+# dann per os.replace() atomar umbenennen. Ein abgebrochener Lauf hinterlässt so nie
+# halbe Archive, Zusammenfassungen oder Indexdateien unter dem endgültigen Namen.
+
+TEMP_MARKER = ".tmp-"
+
+# Temporäre Dateien, die älter sind, gelten als Reste abgestürzter Läufe
+STALE_TEMP_SECONDS = 3600
+
+
+def temp_path_for(path):
+    # Host and pid keep temporary names unique when several machines share ZIELORDNER
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}{TEMP_MARKER}{socket.gethostname()}-{os.getpid()}")
+
+
+@contextmanager
+def atomic_write(path, mode="w", encoding=None, fsync=True):
+    """Open a temporary file next to ``path`` and move it into place on success.
+
+    If the block raises (including cancellation), the temporary file is removed
+    and ``path`` is left untouched.
+    """
+    if "b" not in mode and encoding is None:
+        encoding = "utf-8"
+    tmp_path = temp_path_for(path)
+    f = open(tmp_path, mode, encoding=encoding)
+    try:
+        yield f
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+        f.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        f.close()
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_copy(source_path, target_path):
+    """shutil.copy2 via a temporary file, so target_path is either old or complete."""
+    tmp_path = temp_path_for(target_path)
+    try:
+        shutil.copy2(source_path, tmp_path)
+        os.replace(tmp_path, target_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def zip_is_intact(zip_path):
+    """Cheap integrity check of an existing archive.
+
+    Reads only the end-of-central-directory record and the central directory
+    (no decompression) and checks that every member lies inside the file.
+    A truncated archive has no valid central directory and fails.
+    """
+    try:
+        size = os.path.getsize(zip_path)
+        with zipfile.ZipFile(zip_path) as zipf:
+            for info in zipf.infolist():
+                if info.header_offset + info.compress_size > size:
+                    return False
+        return True
+    except (OSError, zipfile.BadZipFile, ValueError):
+        return False
+
+
+def remove_stale_temp_files(directories, max_age=STALE_TEMP_SECONDS):
+    """Delete temporary files left behind by crashed runs. Returns the number removed."""
+    removed = 0
+    cutoff = time.time() - max_age
+    for directory in directories:
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name.startswith(".") and TEMP_MARKER in entry.name and entry.is_file():
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        removed += 1
+                except OSError:
+                    pass
+    return removed
@@ -0,0 +1,631 @@
+import os
+import io
+import sys
+import json
+import time
+import random
+import shutil
+import zipfile
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+import contextlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Benchmark-Suite: synthetischer Projektbaum, Mock-LLM-Server (OpenAI-kompatibel) und
+# wiederholbare Messungen der einzelnen Stufen sowie von main(). Ergebnisse werden als
+# JSON-Zeilen gespeichert und mit dem letzten Lauf auf demselben Baum verglichen.
+
+BENCHMARK_RESULTS_FILE = "benchmark_ergebnisse.jsonl"
+REGRESSION_THRESHOLD = 0.10  # Median more than 10% slower than the previous result
+REGRESSION_MIN_SECONDS = 0.01  # ... and by at least this much (timer noise on tiny benchmarks)
+TREE_MANIFEST = ".benchmark_tree.json"
+
+DEFAULT_TREE = {
+    "projects": 200,
+    "depth": 3,
+    "fanout": 6,
+    "doc_kb": 20,
+    "docs_per_project": 4,
+    "pdf_ratio": 0.1,
+    "docx_ratio": 0.1,
+    "git_ratio": 0.5,
+    "nested_ratio": 0.05,
+    "duplicate_ratio": 0.05,
+    "seed": 1,
+}
+
+WORDS = (
+    "Projekt Dokumentation Datenbank Schnittstelle Konfiguration Benutzer Analyse Ergebnis "
+    "Server Client Modul Test Suche Index Archiv Version Fehler Leistung Speicher Netzwerk "
+    "installieren starten prüfen lesen schreiben erstellen verwenden und oder mit für die der das"
+).split()
+
+
+# --- Synthetischer Projektbaum ---
+
+def _text(rng, size):
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+def _markdown(rng, title, size):
+    paragraphs = [f"# {title}\n"]
+    while sum(len(p) for p in paragraphs) < size:
+        paragraphs.append(f"## {rng.choice(WORDS)}\n\n{_text(rng, 600)}\n")
+    return "\n".join(paragraphs)
+
+def _pdf_escape(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def minimal_pdf(lines, lines_per_page=45):
+    """Build a small valid PDF (Helvetica text pages) without third-party libraries."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    font_id = 3 + 2 * len(pages)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages))), len(pages)),
+    ]
+    for i, page in enumerate(pages):
+        content = "BT /F1 10 Tf 50 800 Td 14 TL " + " ".join(f"({_pdf_escape(line)}) '" for line in page) + " ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents {4 + 2 * i} 0 R "
+                       f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>")
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+def minimal_docx(paragraphs):
+    """Build a minimal .docx (WordprocessingML package) that python-docx can open."""
+    from xml.sax.saxutils import escape
+    body = "".join(f"<w:p><w:r><w:t>{escape(p)}</w:t></w:r></w:p>" for p in paragraphs)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml",
+                   '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                   '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                   '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                   '<Default Extension="xml" ContentType="application/xml"/>'
+                   '<Override PartName="/word/document.xml" '
+                   'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+                   '</Types>')
+        z.writestr("_rels/.rels",
+                   '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                   '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                   '<Relationship Id="rId1" '
+                   'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+                   'Target="word/document.xml"/></Relationships>')
+        z.writestr("word/document.xml",
+                   '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                   '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                   f"<w:body>{body}</w:body></w:document>")
+    return buffer.getvalue()
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
+
+def _project_dir(root, index, depth, fanout):
+    # depth - 1 group levels between the root and the project folder
+    parts = [f"bereich{(index // fanout ** level) % fanout}" for level in range(depth - 1)]
+    return os.path.join(root, *reversed(parts), f"projekt{index:05d}")
+
+def _write_project(path, index, rng, params):
+    size = int(params["doc_kb"] * 1024 * rng.uniform(0.5, 1.5))
+    _write(os.path.join(path, "README.md"), _markdown(rng, f"Projekt {index}", size))
+    for j in range(rng.randint(0, 2 * params["docs_per_project"])):
+        _write(os.path.join(path, "docs", f"kapitel{j}.md"), _markdown(rng, f"Kapitel {j}", size // 2))
+    if rng.random() < params["pdf_ratio"]:
+        lines = [_text(rng, 80) for _ in range(size // 100)]
+        _write(os.path.join(path, "docs", "handbuch.pdf"), minimal_pdf(lines))
+    if rng.random() < params["docx_ratio"]:
+        _write(os.path.join(path, "docs", "konzept.docx"), minimal_docx([_text(rng, 400) for _ in range(size // 500 + 1)]))
+    if rng.random() < params["git_ratio"]:
+        _write(os.path.join(path, ".git", "HEAD"), "ref: refs/heads/main\n")
+        _write(os.path.join(path, ".git", "refs", "heads", "main"), f"{index:040x}\n")
+    _write(os.path.join(path, "package.json"), json.dumps({"name": f"projekt{index}"}))
+    # Noise that collection has to skip
+    _write(os.path.join(path, "node_modules", "paket", "README.md"), "# Fremdpaket\n")
+    for j in range(3):
+        _write(os.path.join(path, "src", f"modul{j}.py"), f"# Modul {j}\nprint({j})\n")
+    if rng.random() < params["nested_ratio"]:
+        # Nested project: must not be reported separately
+        _write(os.path.join(path, "tools", "helfer", "package.json"), "{}")
+        _write(os.path.join(path, "tools", "helfer", "README.md"), _markdown(rng, "Helfer", 2000))
+
+def generate_tree(root, **params):
+    """Create (or reuse) a synthetic tree of projects under root. Returns the parameters used."""
+    params = dict(DEFAULT_TREE, **{k: v for k, v in params.items() if v is not None})
+    manifest_path = os.path.join(root, TREE_MANIFEST)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            if json.load(f) == params:
+                return params
+    except FileNotFoundError:
+        if os.path.isdir(root) and os.listdir(root):
+            raise ValueError(f"{root} ist kein leerer Ordner und kein Benchmark-Baum")
+    except (OSError, ValueError):
+        pass
+
+    shutil.rmtree(root, ignore_errors=True)
+    rng = random.Random(params["seed"])
+    depth, fanout = max(1, params["depth"]), max(1, params["fanout"])
+    paths = []
+    for index in range(params["projects"]):
+        path = _project_dir(root, index, depth, fanout)
+        _write_project(path, index, rng, params)
+        paths.append(path)
+    # Duplicates: same folder name and content in a second location
+    for path in rng.sample(paths, int(len(paths) * params["duplicate_ratio"])):
+        shutil.copytree(path, os.path.join(root, "kopien", os.path.basename(path)))
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(params, f)
+    return params
+
+
+# --- Mock-LLM-Server ---
+
+class MockLLMServer:
+    """OpenAI-compatible chat completion server with configurable latency and failure rate.
+
+    latency is the total time per request, spread over the streamed chunks. Failed
+    requests answer HTTP 500. capacity limits the requests generated in parallel (the
+    rest queue, like a local model server); above rate_limit concurrent requests the
+    server answers HTTP 429 (like a hosted API). Use as context manager or via start()/stop().
+    """
+
+    def __init__(self, port=0, latency=0.05, failure_rate=0.0, chunks=20, seed=1, host="127.0.0.1",
+                 capacity=None, rate_limit=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.chunks = max(1, chunks)
+        self.rate_limit = rate_limit
+        self.requests = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._capacity = threading.Semaphore(capacity) if capacity else None
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    def _should_fail(self):
+        with self._lock:
+            self.requests += 1
+            failed = self._rng.random() < self.failure_rate
+            if failed:
+                self.failures += 1
+            return failed
+
+    def _enter(self):
+        """Count a new request; False if it exceeds the rate limit."""
+        with self._lock:
+            if self.rate_limit is not None and self.in_flight >= self.rate_limit:
+                self.rate_limited += 1
+                return False
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            return True
+
+    def _leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not server._enter():
+                    self._send_json(429, {"error": {"message": "Mock-Server: zu viele Anfragen"}})
+                    return
+                try:
+                    if server._capacity is None:
+                        self._answer(request)
+                    else:
+                        with server._capacity:
+                            self._answer(request)
+                finally:
+                    server._leave()
+
+            def _answer(self, request):
+                prompt = "".join(m.get("content", "") for m in request.get("messages", []))
+                if server._should_fail():
+                    time.sleep(server.latency / server.chunks)
+                    self._send_json(500, {"error": {"message": "Mock-Server: simulierter Fehler"}})
+                    return
+                words = [f"Zusammenfassung{i}" for i in range(server.chunks)]
+                usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(words),
+                         "total_tokens": len(prompt) // 4 + len(words)}
+                if not request.get("stream"):
+                    time.sleep(server.latency)
+                    self._send_json(200, {"choices": [{"message": {"role": "assistant", "content": " ".join(words)}}],
+                                          "usage": usage})
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                try:
+                    for word in words:
+                        time.sleep(server.latency / server.chunks)
+                        chunk = {"choices": [{"delta": {"content": word + " "}}]}
+                        self.wfile.write(b"data: " + json.dumps(chunk).encode() + b"\n\n")
+                        self.wfile.flush()
+                    if request.get("stream_options", {}).get("include_usage"):
+                        self.wfile.write(b"data: " + json.dumps({"choices": [], "usage": usage}).encode() + b"\n\n")
+                    self.wfile.write(b"data: [DONE]\n\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client aborted (cancellation)
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def serve_forever(self):
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# --- Benchmarks ---
+
+class BenchmarkContext:
+    """Shared inputs of all benchmarks; derived data is computed once, untimed."""
+
+    def __init__(self, tree, params, workdir, llm_latency, llm_failure_rate):
+        import extract_documentation_deep as extractor
+        self.extractor = extractor
+        self.tree = tree
+        self.params = params
+        self.workdir = workdir
+        self.llm_latency = llm_latency
+        self.llm_failure_rate = llm_failure_rate
+        self._projects = None
+        self._doc_files = None
+
+    def config(self, **overrides):
+        # Output outside the tree; depth covers the generated group levels
+        base = dict(start_paths=[self.tree], max_depth=max(2, self.params["depth"]),
+                    output_dir=os.path.join(self.workdir, "ausgabe"), events_file=None,
+                    shard_mode=False, profile_mode=None, prometheus_textfile=None)
+        base.update(overrides)
+        return self.extractor.default_config(**base)
+
+    @property
+    def projects(self):
+        if self._projects is None:
+            with contextlib.redirect_stdout(io.StringIO()):
+                self._projects = self.extractor.find_all_projects(self.config())
+        return self._projects
+
+    @property
+    def doc_files(self):
+        if self._doc_files is None:
+            ignore = self.extractor.create_ignore_engine(self.config())
+            self._doc_files = {proj: self.extractor.collect_doc_files(proj, ignore=ignore) for proj in self.projects}
+        return self._doc_files
+
+    def fresh_dir(self, name):
+        path = os.path.join(self.workdir, name)
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        return path
+
+def bench_discovery(ctx, measure):
+    config = ctx.config()
+    with measure():
+        ctx.extractor.find_all_projects(config)
+
+def bench_collection(ctx, measure):
+    projects = ctx.projects
+    ignore = ctx.extractor.create_ignore_engine(ctx.config())
+    with measure():
+        for proj in projects:
+            ctx.extractor.collect_doc_files(proj, ignore=ignore)
+
+def bench_scoring(ctx, measure):
+    doc_files = ctx.doc_files
+    with measure():
+        for proj, files in doc_files.items():
+            ctx.extractor.evaluate_doc_quality(files, proj)
+
+def bench_ranking(ctx, measure):
+    # Columnar table of all projects (as loaded from the catalog), ranked and reported
+    from scoring import DocTable
+    table = DocTable()
+    for proj, files in ctx.doc_files.items():
+        table.add(proj, ctx.extractor.doc_columns(files))
+    with measure():
+        table.rank(top=20)
+        table.report()
+
+def bench_archiving(ctx, measure):
+    doc_files = ctx.doc_files
+    target = ctx.fresh_dir("archive")
+    with measure():
+        for i, (proj, files) in enumerate(doc_files.items()):
+            ctx.extractor.write_project_zip(os.path.join(target, f"{i}.zip"), files, proj)
+    shutil.rmtree(target, ignore_errors=True)
+
+def bench_extraction(ctx, measure):
+    import summarize
+    files = []
+    for doc_paths in ctx.doc_files.values():
+        files.extend(path for path in doc_paths if not os.path.isdir(path))
+    usable = []
+    for path in files:
+        extension = os.path.splitext(path)[1]
+        try:
+            if summarize.get_extractor(extension) is not None:  # parsers are loaded untimed
+                usable.append(path)
+        except ImportError:
+            pass
+    with measure():
+        for path in usable:
+            summarize.extract_text_from_file(path)
+
+def _run_main(ctx, output):
+    with MockLLMServer(latency=ctx.llm_latency, failure_rate=ctx.llm_failure_rate) as server:
+        config = ctx.config(output_dir=output, enable_summarization=True, use_openai=False,
+                            local_llm_url=server.url)
+        with contextlib.redirect_stdout(io.StringIO()):
+            ctx.extractor.main(config=config)
+
+def bench_end_to_end(ctx, measure):
+    output = ctx.fresh_dir("main")
+    with measure():
+        _run_main(ctx, output)
+
+def bench_end_to_end_warm(ctx, measure):
+    # Second run on an unchanged tree: measures the skip paths
+    output = ctx.fresh_dir("main_warm")
+    _run_main(ctx, output)
+    with measure():
+        _run_main(ctx, output)
+
+BENCHMARKS = {
+    "discovery": bench_discovery,
+    "collection": bench_collection,
+    "scoring": bench_scoring,
+    "ranking": bench_ranking,
+    "archiving": bench_archiving,
+    "extraction": bench_extraction,
+    "end_to_end": bench_end_to_end,
+    "end_to_end_warm": bench_end_to_end_warm,
+}
+
+def run_benchmark(func, ctx, repeat):
+    """Run one benchmark repeat times. Returns wall/CPU statistics in seconds."""
+    walls, cpus = [], []
+    for _ in range(repeat):
+        sample = {}
+
+        @contextlib.contextmanager
+        def measure():
+            wall_started, cpu_started = time.perf_counter(), time.process_time()
+            yield
+            sample["wall"] = time.perf_counter() - wall_started
+            sample["cpu"] = time.process_time() - cpu_started
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            func(ctx, measure)
+        walls.append(sample["wall"])
+        cpus.append(sample["cpu"])
+    return {"median": statistics.median(walls), "min": min(walls), "max": max(walls),
+            "cpu_median": statistics.median(cpus), "runs": walls}
+
+
+# --- Ergebnisse ---
+
+def code_version():
+    """Commit of the checkout this file belongs to (read without calling git)."""
+    from git_state import read_git_state
+    state = read_git_state(os.path.dirname(os.path.abspath(__file__)))
+    return state["commit"] if state else None
+
+def load_results(path):
+    results = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    results.append(json.loads(line))
+    except FileNotFoundError:
+        pass
+    return results
+
+def previous_results(results, result):
+    """Latest stored measurement per benchmark for the same tree, LLM settings and machine."""
+    previous = {}
+    for old in results:
+        if (old.get("tree") == result["tree"] and old.get("llm") == result["llm"]
+                and old.get("host") == result["host"]):
+            for name, stats in old.get("benchmarks", {}).items():
+                previous[name] = dict(stats, version=old.get("version"))
+    return previous
+
+def compare(result, previous, threshold=REGRESSION_THRESHOLD):
+    """Print the comparison table. Returns the names of regressed benchmarks."""
+    regressions = []
+    print(f"{'Benchmark':<18}{'Median s':>10}{'Min s':>9}{'CPU s':>9}{'Vorher s':>10}{'Änderung':>10}")
+    for name, stats in result["benchmarks"].items():
+        old = previous.get(name)
+        line = f"{name:<18}{stats['median']:>10.3f}{stats['min']:>9.3f}{stats['cpu_median']:>9.3f}"
+        if old:
+            change = (stats["median"] - old["median"]) / old["median"] if old["median"] else 0.0
+            line += f"{old['median']:>10.3f}{change:>+9.1%}"
+            if change > threshold and stats["median"] - old["median"] >= REGRESSION_MIN_SECONDS:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+    return regressions
+
+def run_suite(tree=None, names=None, repeat=3, results_path=BENCHMARK_RESULTS_FILE,
+              llm_latency=0.05, llm_failure_rate=0.0, **tree_params):
+    """Generate/reuse the tree, run the benchmarks, store and compare the result."""
+    from metrics import METRICS
+
+    names = names or list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unbekannte Benchmarks: {', '.join(unknown)}")
+
+    workdir = tempfile.mkdtemp(prefix="dokuanalyse-bench-")
+    tree = tree or os.path.join(tempfile.gettempdir(), "dokuanalyse-bench-baum")
+    try:
+        started = time.perf_counter()
+        params = generate_tree(tree, **tree_params)
+        print(f"Testbaum: {tree} ({params['projects']} Projekte, {time.perf_counter() - started:.1f}s)")
+        ctx = BenchmarkContext(tree, params, workdir, llm_latency, llm_failure_rate)
+
+        result = {
+            "timestamp": time.time(),
+            "version": code_version(),
+            "python": platform.python_version(),
+            "host": platform.node(),
+            "tree": params,
+            "llm": {"latency": llm_latency, "failure_rate": llm_failure_rate},
+            "repeat": repeat,
+            "benchmarks": {},
+        }
+        for name in names:
+            print(f"  {name} ...", flush=True)
+            METRICS.reset()
+            result["benchmarks"][name] = run_benchmark(BENCHMARKS[name], ctx, repeat)
+            # Per-operation totals show where a regression comes from
+            result["benchmarks"][name]["operations"] = {
+                op: round(stats["wall_seconds"] / repeat, 6) for op, stats in METRICS.to_dict()["operations"].items()
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    previous = previous_results(load_results(results_path), result)
+    regressions = compare(result, previous)
+    with open(results_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result) + "\n")
+    versions = sorted({(stats.get("version") or "unbekannt")[:10] for stats in previous.values()})
+    print(f"Ergebnis gespeichert in {results_path}" + (f" (verglichen mit {', '.join(versions)})" if versions else ""))
+    return result, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks für die Dokumentationsanalyse")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def tree_options(p):
+        p.add_argument("--projects", type=int)
+        p.add_argument("--depth", type=int)
+        p.add_argument("--fanout", type=int)
+        p.add_argument("--doc-kb", type=int, dest="doc_kb")
+        p.add_argument("--docs-per-project", type=int, dest="docs_per_project")
+        p.add_argument("--pdf-ratio", type=float, dest="pdf_ratio")
+        p.add_argument("--docx-ratio", type=float, dest="docx_ratio")
+        p.add_argument("--git-ratio", type=float, dest="git_ratio")
+        p.add_argument("--nested-ratio", type=float, dest="nested_ratio")
+        p.add_argument("--duplicate-ratio", type=float, dest="duplicate_ratio")
+        p.add_argument("--seed", type=int)
+
+    gen = sub.add_parser("generate", help="Synthetischen Projektbaum erzeugen")
+    gen.add_argument("root")
+    tree_options(gen)
+
+    mock = sub.add_parser("mock-llm", help="Mock-LLM-Server starten (Ersatz für localhost:1234)")
+    mock.add_argument("--port", type=int, default=1234)
+    mock.add_argument("--latency", type=float, default=0.5, help="Sekunden pro Anfrage")
+    mock.add_argument("--failure-rate", type=float, default=0.0, help="Anteil fehlschlagender Anfragen (0-1)")
+    mock.add_argument("--capacity", type=int, help="Parallel bearbeitete Anfragen (weitere warten)")
+    mock.add_argument("--rate-limit", type=int, help="Ab so vielen gleichzeitigen Anfragen HTTP 429")
+
+    run = sub.add_parser("run", help="Benchmarks ausführen und Ergebnis speichern")
+    run.add_argument("--tree", help="Testbaum (wird erzeugt oder wiederverwendet)")
+    run.add_argument("--only", help="Kommagetrennte Auswahl: " + ",".join(BENCHMARKS))
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--results", default=BENCHMARK_RESULTS_FILE)
+    run.add_argument("--latency", type=float, default=0.05, help="Latenz des Mock-LLM in Sekunden")
+    run.add_argument("--failure-rate", type=float, default=0.0)
+    run.add_argument("--fail-on-regression", action="store_true", help="Exit-Code 1 bei Regression")
+    tree_options(run)
+
+    args = vars(parser.parse_args(argv))
+    command = args.pop("command")
+    if command == "generate":
+        params = generate_tree(args.pop("root"), **args)
+        print(json.dumps(params, indent=2))
+        return 0
+    if command == "mock-llm":
+        server = MockLLMServer(args["port"], args["latency"], args["failure_rate"],
+                               capacity=args["capacity"], rate_limit=args["rate_limit"])
+        print(f"Mock-LLM läuft unter {server.url} (Strg+C zum Beenden)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    fail_on_regression = args.pop("fail_on_regression")
+    only = args.pop("only")
+    _, regressions = run_suite(
+        tree=args.pop("tree"), names=only.split(",") if only else None, repeat=args.pop("repeat"),
+        results_path=args.pop("results"), llm_latency=args.pop("latency"),
+        llm_failure_rate=args.pop("failure_rate"), **args)
+    return 1 if regressions and fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+import threading
+
+# Kooperativer Abbruch: ein Token wird durch alle Stufen gereicht und an sicheren Stellen geprüft
+
+
+class AnalysisCancelled(BaseException):
+    """Raised inside the pipeline once cancellation was requested.
+
+    Derives from BaseException (like KeyboardInterrupt) so the many
+    ``except Exception`` blocks in the pipeline do not swallow it.
+    """
+
+
+class CancelToken:
+    """Thread-safe cancellation flag shared by the UI and the worker thread."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        self._event.set()
+
+    def check(self):
+        if self._event.is_set():
+            raise AnalysisCancelled()
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+
+def check_cancelled(cancel):
+    """Raise AnalysisCancelled if the (optional) token was cancelled."""
+    if cancel is not None:
+        cancel.check()
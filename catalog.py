@@ -0,0 +1,458 @@
+import os
+import sqlite3
+import datetime
+import threading
+from contextlib import contextmanager
+
+# SQLite-Katalog für den gesamten Laufzustand (Projekte, Läufe, Archive, Scores, Zusammenfassungen).
+# Ersetzt summary_batches.txt und das Auflisten der Ausgabeordner.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    path TEXT,
+    is_git INTEGER NOT NULL DEFAULT 0,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    last_scan_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_projects_path ON projects(path);
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    start_paths TEXT,
+    total_projects INTEGER,
+    best_projects INTEGER,
+    summaries_created INTEGER
+);
+CREATE TABLE IF NOT EXISTS archives (
+    project_id INTEGER PRIMARY KEY REFERENCES projects(id),
+    zip_path TEXT NOT NULL,
+    size INTEGER,
+    category TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_archives_category ON archives(category);
+CREATE TABLE IF NOT EXISTS scores (
+    project_id INTEGER NOT NULL REFERENCES projects(id),
+    scan_id INTEGER NOT NULL REFERENCES scans(id),
+    score INTEGER NOT NULL,
+    PRIMARY KEY (project_id, scan_id)
+);
+CREATE TABLE IF NOT EXISTS summaries (
+    project_id INTEGER PRIMARY KEY REFERENCES projects(id),
+    summary_path TEXT,
+    backend TEXT,
+    created_at TEXT NOT NULL,
+    in_batch INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_summaries_batch ON summaries(in_batch);
+CREATE TABLE IF NOT EXISTS summary_state (
+    project_id INTEGER PRIMARY KEY REFERENCES projects(id),
+    summary_text TEXT NOT NULL,
+    fingerprint TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS summary_sections (
+    project_id INTEGER NOT NULL REFERENCES projects(id),
+    position INTEGER NOT NULL,
+    section_key TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    digest TEXT,
+    PRIMARY KEY (project_id, section_key)
+);
+CREATE TABLE IF NOT EXISTS git_states (
+    project_id INTEGER PRIMARY KEY REFERENCES projects(id),
+    head TEXT,
+    commit_id TEXT,
+    index_mtime_ns INTEGER,
+    index_size INTEGER,
+    checked_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS doc_columns (
+    project_id INTEGER PRIMARY KEY REFERENCES projects(id),
+    sizes BLOB NOT NULL,
+    kinds BLOB NOT NULL,
+    flags BLOB NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS calibration (
+    scan_id INTEGER NOT NULL REFERENCES scans(id),
+    measure TEXT NOT NULL,
+    amount REAL NOT NULL,
+    units REAL NOT NULL,
+    PRIMARY KEY (scan_id, measure)
+);
+CREATE TABLE IF NOT EXISTS journal (
+    scan_id INTEGER NOT NULL REFERENCES scans(id),
+    stage TEXT NOT NULL,
+    item TEXT NOT NULL,
+    completed_at TEXT NOT NULL,
+    PRIMARY KEY (scan_id, stage, item)
+);
+"""
+
+
+def read_only_uri(db_path):
+    """SQLite URI for reading db_path without creating or changing any file (dry run).
+
+    Even a read-only connection creates -wal/-shm files for a WAL database; unless a
+    writer has them open already, the database is therefore opened as immutable.
+    """
+    uri = f"file:{db_path}?mode=ro"
+    try:
+        with open(db_path, "rb") as f:
+            header = f.read(20)
+    except OSError:
+        return uri
+    # Header bytes 18/19 (file format versions) are 2 in WAL mode
+    if header[18:20] == b"\x02\x02" and not os.path.exists(db_path + "-wal"):
+        uri += "&immutable=1"
+    return uri
+
+
+def _now():
+    return datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class Catalog:
+    """Transaktionaler Zugriff auf den Projektkatalog (SQLite im WAL-Modus)."""
+
+    def __init__(self, db_path, journal_mode="WAL", read_only=False):
+        # journal_mode="DELETE" for catalogs shared by several hosts (WAL needs local shared memory).
+        # read_only (dry run): no pragmas and no schema script, the file is left exactly as it is
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        if read_only:
+            self.conn = sqlite3.connect(read_only_uri(db_path), uri=True, timeout=30, check_same_thread=False)
+            return
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """Group several writes into one atomic transaction."""
+        with self._lock:
+            with self.conn:
+                yield self.conn
+
+    # --- Meta ---
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    # --- Läufe ---
+
+    def start_scan(self, start_paths):
+        with self.transaction() as conn:
+            cur = conn.execute(
+                "INSERT INTO scans (started_at, start_paths) VALUES (?, ?)",
+                (_now(), "\n".join(start_paths))
+            )
+            return cur.lastrowid
+
+    def finish_scan(self, scan_id, total_projects, best_projects, summaries_created):
+        """Close a scan. Without totals (cancelled run) the scan stays resumable."""
+        with self.transaction() as conn:
+            conn.execute(
+                "UPDATE scans SET finished_at = ?, total_projects = ?, best_projects = ?, summaries_created = ? WHERE id = ?",
+                (_now(), total_projects, best_projects, summaries_created, scan_id)
+            )
+            if total_projects is not None:
+                conn.execute("DELETE FROM journal WHERE scan_id = ?", (scan_id,))
+
+    def resumable_scan(self, start_paths):
+        """Id of the latest scan if it crashed or was cancelled with the same start paths, else None."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT id, start_paths, total_projects FROM scans ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+        if row is None or row[2] is not None or row[1] != "\n".join(start_paths):
+            return None
+        return row[0]
+
+    # --- Journal (Fortschritt pro Lauf, Stufe und Projekt) ---
+
+    def journal_done(self, scan_id, stage, item=""):
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO journal (scan_id, stage, item, completed_at) VALUES (?, ?, ?, ?)",
+                (scan_id, stage, item, _now())
+            )
+
+    def journal_items(self, scan_id, stage):
+        """Items (project paths) completed in a stage of a scan, in completion order."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT item FROM journal WHERE scan_id = ? AND stage = ? AND item != '' ORDER BY rowid",
+                (scan_id, stage)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def journal_stage_done(self, scan_id, stage):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM journal WHERE scan_id = ? AND stage = ? AND item = ''", (scan_id, stage)
+            ).fetchone()
+        return row is not None
+
+    def record_discovery(self, scan_id, projects):
+        """Store the discovered project list and mark discovery as complete."""
+        now = _now()
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO journal (scan_id, stage, item, completed_at) VALUES (?, 'discovery', ?, ?)",
+                [(scan_id, proj, now) for proj in projects]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO journal (scan_id, stage, item, completed_at) VALUES (?, 'discovery', '', ?)",
+                (scan_id, now)
+            )
+
+    # --- Projekte ---
+
+    def _project_id(self, conn, name, path=None, is_git=None, scan_id=None):
+        now = _now()
+        conn.execute(
+            "INSERT INTO projects (name, path, is_git, first_seen, last_seen, last_scan_id) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET "
+            "path = COALESCE(excluded.path, projects.path), "
+            "is_git = CASE WHEN ? IS NULL THEN projects.is_git ELSE excluded.is_git END, "
+            "last_seen = excluded.last_seen, "
+            "last_scan_id = COALESCE(excluded.last_scan_id, projects.last_scan_id)",
+            (name, path, int(bool(is_git)), now, now, scan_id, is_git)
+        )
+        return conn.execute("SELECT id FROM projects WHERE name = ?", (name,)).fetchone()[0]
+
+    def project_id(self, name):
+        with self._lock:
+            row = self.conn.execute("SELECT id FROM projects WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def upsert_project(self, name, path=None, is_git=None, scan_id=None):
+        with self.transaction() as conn:
+            return self._project_id(conn, name, path, is_git, scan_id)
+
+    def record_project(self, name, path, is_git, scan_id, score, zip_path=None, zip_size=None, category=None,
+                       git_state=None, doc_columns=None):
+        """Write project, score and (optionally) archive, git state and doc rows in one transaction."""
+        with self.transaction() as conn:
+            project_id = self._project_id(conn, name, path, is_git, scan_id)
+            conn.execute(
+                "INSERT OR REPLACE INTO scores (project_id, scan_id, score) VALUES (?, ?, ?)",
+                (project_id, scan_id, score)
+            )
+            if zip_path is not None:
+                self._record_archive(conn, project_id, zip_path, zip_size, category)
+            if git_state is not None:
+                self._record_git_state(conn, project_id, git_state)
+            if doc_columns is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO doc_columns (project_id, sizes, kinds, flags, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (project_id, *doc_columns.to_bytes(), _now())
+                )
+            return project_id
+
+    def doc_columns(self):
+        """(name, sizes, kinds, flags) of all projects with doc rows; columns as bytes (scoring.DocTable)."""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT p.name, c.sizes, c.kinds, c.flags FROM doc_columns c JOIN projects p ON p.id = c.project_id "
+                "ORDER BY p.name"
+            ).fetchall()
+
+    def get_score(self, name):
+        """Latest known quality score of a project, or None."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT s.score FROM scores s JOIN projects p ON p.id = s.project_id "
+                "WHERE p.name = ? ORDER BY s.scan_id DESC LIMIT 1",
+                (name,)
+            ).fetchone()
+        return row[0] if row else None
+
+    # --- Git-Stand ---
+
+    def _record_git_state(self, conn, project_id, state):
+        conn.execute(
+            "INSERT OR REPLACE INTO git_states (project_id, head, commit_id, index_mtime_ns, index_size, checked_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (project_id, state["head"], state["commit"], state["index_mtime_ns"], state["index_size"], _now())
+        )
+
+    def get_git_state(self, name):
+        """Git state stored with the last completed archive of a project, or None."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT g.head, g.commit_id, g.index_mtime_ns, g.index_size FROM git_states g "
+                "JOIN projects p ON p.id = g.project_id WHERE p.name = ?",
+                (name,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"head": row[0], "commit": row[1], "index_mtime_ns": row[2], "index_size": row[3]}
+
+    def mark_seen(self, name, scan_id):
+        """Carry an unchanged project over into a scan (last_seen and score of the previous scan)."""
+        with self.transaction() as conn:
+            project_id = self._project_id(conn, name, scan_id=scan_id)
+            conn.execute(
+                "INSERT OR IGNORE INTO scores (project_id, scan_id, score) "
+                "SELECT project_id, ?, score FROM scores WHERE project_id = ? AND scan_id < ? "
+                "ORDER BY scan_id DESC LIMIT 1",
+                (scan_id, project_id, scan_id)
+            )
+
+    # --- Archive ---
+
+    def _record_archive(self, conn, project_id, zip_path, size, category):
+        conn.execute(
+            "INSERT INTO archives (project_id, zip_path, size, category, created_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(project_id) DO UPDATE SET zip_path = excluded.zip_path, size = excluded.size, "
+            "category = COALESCE(excluded.category, archives.category), created_at = excluded.created_at",
+            (project_id, zip_path, size, category, _now())
+        )
+
+    def record_archive(self, name, zip_path, size=None, category=None):
+        with self.transaction() as conn:
+            project_id = self._project_id(conn, name)
+            self._record_archive(conn, project_id, zip_path, size, category)
+
+    def has_archive(self, name):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM archives a JOIN projects p ON p.id = a.project_id WHERE p.name = ?",
+                (name,)
+            ).fetchone()
+        return row is not None
+
+    def best_projects(self, category):
+        """Names of the projects archived in a best_docs category ('git' or 'local')."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT p.name FROM archives a JOIN projects p ON p.id = a.project_id "
+                "WHERE a.category = ? ORDER BY p.name",
+                (category,)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    # --- Zusammenfassungen ---
+
+    def record_summary(self, name, summary_path, backend=None, path=None):
+        with self.transaction() as conn:
+            project_id = self._project_id(conn, name, path)
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries (project_id, summary_path, backend, created_at, in_batch) "
+                "VALUES (?, ?, ?, ?, 1)",
+                (project_id, summary_path, backend, _now())
+            )
+
+    def has_summary(self, name):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM summaries s JOIN projects p ON p.id = s.project_id WHERE p.name = ?",
+                (name,)
+            ).fetchone()
+        return row is not None
+
+    def summarized_projects(self):
+        """Project paths that are marked as summarized in the current batch."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT p.path FROM summaries s JOIN projects p ON p.id = s.project_id "
+                "WHERE s.in_batch = 1 AND p.path IS NOT NULL"
+            ).fetchall()
+        return set(r[0] for r in rows)
+
+    def summary_state(self, name):
+        """(summary_text, {section_key: (input_hash, digest)}) of the last summary, or None."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT st.project_id, st.summary_text FROM summary_state st JOIN projects p ON p.id = st.project_id "
+                "WHERE p.name = ?", (name,)
+            ).fetchone()
+            if row is None:
+                return None
+            sections = self.conn.execute(
+                "SELECT section_key, input_hash, digest FROM summary_sections WHERE project_id = ? ORDER BY position",
+                (row[0],)
+            ).fetchall()
+        return row[1], {key: (input_hash, digest) for key, input_hash, digest in sections}
+
+    def summary_fingerprint(self, name):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT st.fingerprint FROM summary_state st JOIN projects p ON p.id = st.project_id WHERE p.name = ?",
+                (name,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def record_summary_state(self, name, summary_text, sections, fingerprint):
+        """Store summary text, input fingerprint and the sections [(key, input_hash, digest)]."""
+        with self.transaction() as conn:
+            project_id = self._project_id(conn, name)
+            conn.execute(
+                "INSERT OR REPLACE INTO summary_state (project_id, summary_text, fingerprint, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (project_id, summary_text, fingerprint, _now())
+            )
+            conn.execute("DELETE FROM summary_sections WHERE project_id = ?", (project_id,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO summary_sections (project_id, position, section_key, input_hash, digest) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(project_id, i, key, input_hash, digest) for i, (key, input_hash, digest) in enumerate(sections)]
+            )
+
+    # --- Kalibrierung (Durchsatz früherer Läufe für den Trockenlauf) ---
+
+    def record_calibration(self, scan_id, figures):
+        """Store the throughput figures of a run: {measure: (amount, units)}."""
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO calibration (scan_id, measure, amount, units) VALUES (?, ?, ?, ?)",
+                [(scan_id, measure, amount, units) for measure, (amount, units) in figures.items()]
+            )
+
+    def calibration(self, runs=10):
+        """measure -> amount per unit over the latest runs that measured it."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT measure, amount, units FROM calibration ORDER BY scan_id DESC"
+            ).fetchall()
+        totals = {}
+        for measure, amount, units in rows:
+            total = totals.setdefault(measure, [0.0, 0.0, 0])
+            if total[2] < runs:
+                total[0] += amount
+                total[1] += units
+                total[2] += 1
+        return {measure: amount / units for measure, (amount, units, _) in totals.items() if units > 0}
+
+    def count_summaries(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM summaries WHERE summary_path IS NOT NULL").fetchone()[0]
+
+    def reset_summary_batch(self):
+        with self.transaction() as conn:
+            conn.execute("UPDATE summaries SET in_batch = 0")
@@ -0,0 +1,425 @@
+import os
+import sys
+import json
+import mmap
+import time
+import struct
+import hashlib
+import argparse
+import threading
+import unicodedata
+
+from atomic_io import atomic_write
+from summarize import extract_text_from_file, expand_doc_files
+from metrics import METRICS
+from cancellation import check_cancelled
+
+# Korpus-Export: der extrahierte, normalisierte Text aller Dokumente in einer einzigen
+# Binärdatei, die nur angehängt wird, dazu ein Index mit Datensätzen fester Breite
+# (Projekt-ID, Pfad-Schlüssel, Byte-Bereich, Inhalts-Hash). CorpusReader bildet beide per
+# mmap ab und liefert jedes Dokument ohne Kopie (memoryview). Geänderte Dokumente werden
+# neu angehängt, ihr alter Text bleibt als Leerstand, bis compact() die Dateien neu schreibt.
+#
+# Dateien im ZIELORDNER:
+#   korpus.json          aktuelle Generation (wird atomar ersetzt)
+#   korpus-NNNN.bin      Kopf + Einträge: Metadaten (JSON) gefolgt vom Text (UTF-8)
+#   korpus-NNNN.idx      Kopf + Indexsätze (RECORD), der jeweils letzte Satz je Schlüssel gilt
+
+CORPUS_POINTER_FILE = "korpus.json"
+CORPUS_FORMAT = 1
+DATA_MAGIC = b"DOKKORP1"
+INDEX_MAGIC = b"DOKIDX01"
+HEADER_SIZE = 8
+
+# key_hash, content_hash, data_offset, source_size, source_mtime_ns, written_at,
+# meta_length, text_length, project_id, flags
+RECORD = struct.Struct("<16s16sQQqdIIII")
+FLAG_DELETED = 1
+
+COMPACT_RATIO = 0.3  # Compact once this share of the data file is superseded or deleted text
+COMPACT_MIN_BYTES = 1024 * 1024  # ... and at least this much is dead
+
+
+def _hash(data):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def document_key(project, path):
+    """Fixed-width key of a document: hash of project name and relative path."""
+    return _hash(f"{project}\0{path}".encode("utf-8"))
+
+
+def normalize_text(text):
+    """Unicode NFC, \\n line ends, no trailing whitespace, at most one blank line in a row."""
+    text = unicodedata.normalize("NFC", text.replace("\x00", ""))
+    lines = [line.rstrip() for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    result = []
+    blank = 0
+    for line in lines:
+        blank = blank + 1 if not line else 0
+        if blank <= 1:
+            result.append(line)
+    return "\n".join(result).strip("\n") + "\n" if any(lines) else ""
+
+
+def _generation_files(directory, generation):
+    base = os.path.join(directory, f"korpus-{generation:04d}")
+    return base + ".bin", base + ".idx"
+
+
+def read_generation(directory):
+    """Current generation from korpus.json, or None if there is no corpus yet."""
+    try:
+        with open(os.path.join(directory, CORPUS_POINTER_FILE), "r", encoding="utf-8") as f:
+            pointer = json.load(f)
+    except FileNotFoundError:
+        return None
+    if pointer.get("format") != CORPUS_FORMAT:
+        raise ValueError(f"Unbekanntes Korpusformat: {pointer.get('format')}")
+    return pointer["generation"]
+
+
+class Record:
+    """One index entry (the decoded RECORD)."""
+
+    __slots__ = ("key_hash", "content_hash", "data_offset", "source_size", "source_mtime_ns", "written_at",
+                 "meta_length", "text_length", "project_id", "flags")
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def pack(self):
+        return RECORD.pack(*(getattr(self, name) for name in self.__slots__))
+
+    @property
+    def deleted(self):
+        return bool(self.flags & FLAG_DELETED)
+
+    @property
+    def text_offset(self):
+        return self.data_offset + self.meta_length
+
+    @property
+    def end(self):
+        return self.data_offset + self.meta_length + self.text_length
+
+
+def _records(buffer, data_size):
+    """Decode the records of an index buffer; stops at the first incomplete one (crash tail)."""
+    records = []
+    for values in RECORD.iter_unpack(buffer[HEADER_SIZE:HEADER_SIZE + (len(buffer) - HEADER_SIZE) // RECORD.size * RECORD.size]):
+        record = Record(*values)
+        if record.end > data_size:
+            break
+        records.append(record)
+    return records
+
+
+def _latest(records):
+    """key_hash -> last record of that key."""
+    latest = {}
+    for record in records:
+        latest[record.key_hash] = record
+    return latest
+
+
+class CorpusWriter:
+    """Appends changed documents of projects to the corpus (one writer at a time)."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        generation = read_generation(directory)
+        if generation is None:
+            generation = self._create_generation(1, [], None)
+        self._open(generation)
+
+    def _create_generation(self, generation, records, source):
+        """Write a new generation from the given live records (copied out of source) and switch to it."""
+        data_path, index_path = _generation_files(self.directory, generation)
+        with open(data_path, "wb") as data, open(index_path, "wb") as index:
+            data.write(DATA_MAGIC)
+            index.write(INDEX_MAGIC)
+            offset = HEADER_SIZE
+            for record in records:
+                entry = source[record.data_offset:record.end]
+                data.write(entry)
+                record = Record(*(getattr(record, name) for name in Record.__slots__))
+                record.data_offset = offset
+                index.write(record.pack())
+                offset += len(entry)
+            for f in (data, index):
+                f.flush()
+                os.fsync(f.fileno())
+        with atomic_write(os.path.join(self.directory, CORPUS_POINTER_FILE)) as f:
+            json.dump({"format": CORPUS_FORMAT, "generation": generation}, f)
+        return generation
+
+    def _open(self, generation):
+        self.generation = generation
+        self.data_path, self.index_path = _generation_files(self.directory, generation)
+        self.data = open(self.data_path, "r+b")
+        self.index = open(self.index_path, "r+b")
+        data_size = os.fstat(self.data.fileno()).st_size
+        self.index.seek(0)
+        records = _records(self.index.read(), data_size)
+        # Drop what a crashed writer left behind after the last complete record
+        self.index.truncate(HEADER_SIZE + len(records) * RECORD.size)
+        self.data.truncate(max([HEADER_SIZE] + [record.end for record in records]))
+        self.data.seek(0, os.SEEK_END)
+        self.index.seek(0, os.SEEK_END)
+        self.latest = _latest(records)
+
+    def close(self):
+        with self._lock:
+            self.data.close()
+            self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _append(self, record, entry=None):
+        if entry is not None:
+            record.data_offset = self.data.tell()
+            self.data.write(entry)
+        self.latest[record.key_hash] = record
+        return record.pack()
+
+    def export_project(self, project, project_id, project_path, doc_paths, cancel=None):
+        """Append new and changed documents of a project and tombstones for removed ones.
+
+        Unchanged files (same size and mtime) are not even read. Returns (written, removed).
+        """
+        files = expand_doc_files(doc_paths)
+        entries = []
+        seen = set()
+        for file_path in files:
+            check_cancelled(cancel)
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            rel_path = os.path.relpath(file_path, project_path).replace(os.sep, "/")
+            key = document_key(project, rel_path)
+            seen.add(key)
+            old = self.latest.get(key)
+            if (old is not None and not old.deleted and old.source_size == st.st_size
+                    and old.source_mtime_ns == st.st_mtime_ns):
+                continue
+            text = normalize_text(extract_text_from_file(file_path)).encode("utf-8")
+            entries.append((key, rel_path, st, text))
+
+        with self._lock:
+            removed = [record for key, record in self.latest.items()
+                       if record.project_id == project_id and not record.deleted and key not in seen]
+            if not entries and not removed:
+                return 0, 0
+            now = time.time()
+            index_bytes = []
+            written = 0
+            for key, rel_path, st, text in entries:
+                content_hash = _hash(text)
+                old = self.latest.get(key)
+                record = Record(key, content_hash, 0, st.st_size, st.st_mtime_ns, now, 0, len(text), project_id, 0)
+                if old is not None and not old.deleted and old.content_hash == content_hash:
+                    # Same text, only the file was touched: new record, no new data
+                    record.data_offset, record.meta_length = old.data_offset, old.meta_length
+                    index_bytes.append(self._append(record))
+                    continue
+                meta = json.dumps({"project": project, "project_path": project_path, "path": rel_path},
+                                  ensure_ascii=False).encode("utf-8")
+                record.meta_length = len(meta)
+                index_bytes.append(self._append(record, meta + text))
+                written += 1
+            for old in removed:
+                tombstone = Record(old.key_hash, old.content_hash, old.data_offset, 0, 0, now,
+                                   old.meta_length, 0, project_id, FLAG_DELETED)
+                index_bytes.append(self._append(tombstone))
+            # Data first, then the records pointing to it: a crash never leaves a dangling record
+            self.data.flush()
+            os.fsync(self.data.fileno())
+            self.index.write(b"".join(index_bytes))
+            self.index.flush()
+            os.fsync(self.index.fileno())
+        METRICS.add("corpus_bytes_written", sum(len(text) for _, _, _, text in entries))
+        return written, len(removed)
+
+    def live_records(self):
+        return [record for record in self.latest.values() if not record.deleted]
+
+    def dead_bytes(self):
+        live = sum(record.end - record.data_offset for record in self.live_records())
+        return self.data.tell() - HEADER_SIZE - live
+
+    def needs_compaction(self):
+        dead = self.dead_bytes()
+        return dead >= COMPACT_MIN_BYTES and dead > COMPACT_RATIO * (self.data.tell() - HEADER_SIZE)
+
+    def compact(self):
+        """Rewrite the live documents into a new generation and remove the old files.
+
+        Readers that still map the old generation keep working until they reopen.
+        """
+        with self._lock:
+            self.data.flush()
+            old_files = (self.data_path, self.index_path)
+            live = sorted(self.live_records(), key=lambda record: record.data_offset)
+            with mmap.mmap(self.data.fileno(), 0, access=mmap.ACCESS_READ) as source:
+                generation = self._create_generation(self.generation + 1, live, source)
+            self.data.close()
+            self.index.close()
+            self._open(generation)
+        for path in old_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # still mapped by a reader (Windows); removed by the next compaction
+        return generation
+
+
+class Document:
+    """A document in the corpus; text is a zero-copy memoryview of the mapped data file."""
+
+    __slots__ = ("project", "project_path", "path", "project_id", "content_hash", "text")
+
+    def __init__(self, project, project_path, path, project_id, content_hash, text):
+        self.project = project
+        self.project_path = project_path
+        self.path = path
+        self.project_id = project_id
+        self.content_hash = content_hash
+        self.text = text
+
+    def __str__(self):
+        return str(self.text, "utf-8")
+
+
+class CorpusReader:
+    """Read-only random access to the corpus via mmap (no extraction, no copies)."""
+
+    def __init__(self, directory):
+        generation = read_generation(directory)
+        if generation is None:
+            raise FileNotFoundError(f"Kein Korpus gefunden unter {directory}")
+        self.generation = generation
+        data_path, index_path = _generation_files(directory, generation)
+        with open(data_path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(index_path, "rb") as f:
+            self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._data[:HEADER_SIZE] != DATA_MAGIC or self._index[:HEADER_SIZE] != INDEX_MAGIC:
+            self.close()
+            raise ValueError(f"{data_path}: keine Korpusdatei")
+        self._view = memoryview(self._data)
+        self._live = [record for record in _latest(_records(self._index, len(self._data))).values()
+                      if not record.deleted]
+        self._by_key = {record.key_hash: record for record in self._live}
+
+    def close(self):
+        if getattr(self, "_view", None) is not None:
+            self._view.release()
+            self._view = None
+        try:
+            self._data.close()
+        except BufferError:
+            pass  # documents still in use keep the mapping alive until they are released
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._live)
+
+    def _document(self, record):
+        meta = json.loads(bytes(self._view[record.data_offset:record.text_offset]))
+        return Document(meta["project"], meta["project_path"], meta["path"], record.project_id,
+                        record.content_hash.hex(), self._view[record.text_offset:record.end])
+
+    def __getitem__(self, i):
+        """The i-th live document (in index order)."""
+        return self._document(self._live[i])
+
+    def __iter__(self):
+        for record in self._live:
+            yield self._document(record)
+
+    def get(self, project, path):
+        """Document by project name and path relative to the project, or None."""
+        record = self._by_key.get(document_key(project, path))
+        return self._document(record) if record is not None else None
+
+    def source_state(self, project, path):
+        """(size, mtime_ns) of the source file when the document was exported, or None."""
+        record = self._by_key.get(document_key(project, path))
+        return (record.source_size, record.source_mtime_ns) if record is not None else None
+
+    def project_documents(self, project_id):
+        return [self._document(record) for record in self._live if record.project_id == project_id]
+
+    def stats(self):
+        live_bytes = sum(record.end - record.data_offset for record in self._live)
+        return {
+            "generation": self.generation,
+            "documents": len(self._live),
+            "text_bytes": sum(record.text_length for record in self._live),
+            "data_bytes": len(self._data) - HEADER_SIZE,
+            "dead_bytes": len(self._data) - HEADER_SIZE - live_bytes,
+            "index_records": (len(self._index) - HEADER_SIZE) // RECORD.size,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Korpus der extrahierten Dokumentationstexte")
+    parser.add_argument("--dir", help="Ordner des Korpus (Standard: ZIELORDNER)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("info", help="Umfang und Leerstand anzeigen")
+    commands.add_parser("list", help="Alle Dokumente auflisten")
+    show = commands.add_parser("show", help="Text eines Dokuments ausgeben")
+    show.add_argument("project")
+    show.add_argument("path", help="Pfad relativ zum Projektordner")
+    commands.add_parser("compact", help="Leerstand entfernen (neue Generation schreiben)")
+    args = parser.parse_args(argv)
+
+    directory = args.dir
+    if not directory:
+        import extract_documentation_deep as extractor
+        directory = extractor.ZIELORDNER
+    if read_generation(directory) is None:
+        print(f"Kein Korpus gefunden unter {directory}")
+        return 1
+
+    if args.command == "compact":
+        with CorpusWriter(directory) as writer:
+            before = writer.dead_bytes()
+            generation = writer.compact()
+        print(f"Korpus kompaktiert: Generation {generation}, {before / 1024:.1f} KiB Leerstand entfernt")
+        return 0
+
+    with CorpusReader(directory) as reader:
+        if args.command == "info":
+            stats = reader.stats()
+            print(f"Generation {stats['generation']}: {stats['documents']} Dokumente, "
+                  f"{stats['text_bytes'] / 1024:.1f} KiB Text, {stats['index_records']} Indexsätze, "
+                  f"Leerstand {stats['dead_bytes'] / 1024:.1f} KiB")
+        elif args.command == "list":
+            for document in reader:
+                print(f"{document.project}\t{document.path}\t{len(document.text)}\t{document.content_hash}")
+        else:
+            document = reader.get(args.project, args.path)
+            if document is None:
+                print(f"Dokument nicht gefunden: {args.project}/{args.path}")
+                return 1
+            sys.stdout.write(str(document))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
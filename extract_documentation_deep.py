@@ -3,13 +3,33 @@ import shutil
 import zipfile
 import hashlib
 import datetime
-from pathlib import Path
-import dotenv
+import sys
+import time
+import threading
+import stat
 
 # Import the summarization module
-from summarize import summarize_project_local, summarize_with_openai
+from summarize import summarize_documentation, docs_fingerprint, OPENAI_API_URL
+from catalog import Catalog
+from cancellation import AnalysisCancelled, check_cancelled
+from progress import ProgressBus, ConsoleLog, JsonLinesWriter, STAGES, print_line
+from pipeline import Pipeline
+from work_queue import WorkQueue, WORK_QUEUE_FILE
+from ignore_rules import IgnoreEngine, IGNORE_FILE_NAMES
+from git_state import read_git_state
+from atomic_io import atomic_write, atomic_copy, zip_is_intact, remove_stale_temp_files
+from search_index import SearchIndex, SEARCH_INDEX_FILE
+from corpus import CorpusWriter, CORPUS_POINTER_FILE
+from segments import SegmentArchive, SEGMENT_FOLDER
+from metrics import METRICS, ProfileCapture
+from llm_concurrency import limiter_for, limiter_snapshots, format_snapshot, backend_key
+from planner import calibration_figures, plan_run, print_plan
+from scoring import (DocColumns, score_project, effective_weights, kind_of, FLAG_DIRECT, FLAG_IN_DOCS,
+                     FLAG_DOCS_DIR, FLAG_README, FLAG_MANIFEST, FLAG_OTHER_DOC)
+from run_config import RunConfig, config_from_args, GIT_CLONES_FOLDER, LOCAL_PROJECTS_FOLDER
 
-# Konfiguration - Diese Werte können durch die UI überschrieben werden
+# Standardkonfiguration - Ausgangswerte für default_config(); ein Lauf erhält seine Einstellungen
+# als RunConfig (UI, Kommandozeile, Konfigurationsdatei) und liest diese Werte nicht direkt
 STARTPFADEN = [
     r"C:\Users\ardah",
     r"C:\Users\ardah\CascadeProjects"
@@ -21,18 +41,83 @@ STARTPFADEN = [
 MAX_DEPTH = 2  # Adjust as needed
 ZIELORDNER = r"C:\Users\ardah\alle_dokumentationen"
 
-# Subfolder for best documented projects
-BEST_DOCS_FOLDER = "best_docs"
-GIT_CLONES_FOLDER = "git_clones"  # Subfolder for Git repositories
-LOCAL_PROJECTS_FOLDER = "local_projects"  # Subfolder for local projects
-SUMMARIES_FOLDER = "summaries"  # Subfolder for AI-generated summaries
-
 # Summarization settings
 ENABLE_SUMMARIZATION = True  # Set to False to disable summarization
 USE_OPENAI = False  # Set to True to use OpenAI API instead of local LLM
 MIN_SUMMARIES_PER_RUN = 5  # Minimum number of summaries to create per run
 MAX_SUMMARIES_PER_RUN = 10  # Maximum number of summaries to create per run
-SUMMARY_BATCH_FILE = "summary_batches.txt"  # File to track which projects have been summarized
+SUMMARY_BATCH_FILE = "summary_batches.txt"  # Legacy file, wird einmalig in den Katalog übernommen
+CATALOG_FILE = "katalog.sqlite3"  # SQLite catalog with projects, scans, archives, scores and summaries
+ENABLE_SEARCH_INDEX = True  # Build/update the full-text search index (suchindex.sqlite3) after archiving
+ENABLE_CORPUS_EXPORT = False  # Append extracted text to the binary corpus (korpus-*.bin/.idx, see corpus.py)
+ENABLE_SEGMENT_ARCHIVES = False  # Append all projects to a few segment archives (archiv/, see segments.py) instead of one ZIP each
+EVENTS_FILE = None  # Optional path: write all progress events as JSON lines (headless runs)
+RESUME_RUNS = True  # Continue a crashed or cancelled run where it stopped (same STARTPFADEN)
+
+# Ignore-Regeln beim Durchsuchen
+RESPECT_IGNORE_FILES = True  # Honour .gitignore/.ignore files in start paths and projects
+EXCLUDE_PATTERNS = []  # Additional gitignore-style patterns, e.g. ["coverage/", "data/", "docs/_build/"]
+
+# Git-Repositories mit unverändertem HEAD und Index überspringen
+GIT_FAST_PATH = True
+
+# Pipeline: Worker-Threads pro Stufe und Länge der Warteschlangen zwischen den Stufen.
+# "summarize" ist die Obergrenze gleichzeitiger LLM-Anfragen; wie viele davon tatsächlich
+# laufen, regelt llm_concurrency.py je Backend anhand von Durchsatz, Latenz und Fehlern.
+PIPELINE_WORKERS = {"collect": 4, "archive": 2, "index": 1, "export": 1, "summarize": 4}
+PIPELINE_QUEUE_SIZE = 32
+
+# Verteilter Lauf: mehrere Worker (Prozesse oder Rechner) teilen sich die Projekte über
+# eine Arbeitsliste im ZIELORDNER (Start mit "python extract_documentation_deep.py --worker")
+SHARD_MODE = False
+CLAIM_POLL_SECONDS = 1.0  # Wait time when no project is claimable yet
+
+# Watch-Modus (Linux: inotify, sonst/bei erschöpften Watch-Limits: mtime-Polling)
+WATCH_DEBOUNCE_SECONDS = 2.0  # Quiet time after the last change before a project is synced
+WATCH_MAX_DELAY_SECONDS = 30.0  # Sync at the latest this long after the first change of a batch
+WATCH_POLL_SECONDS = 10.0  # Interval of the polling fallback
+WATCH_RESCAN_SECONDS = 3600.0  # Periodic project discovery (catches changes inotify cannot see)
+
+# Metriken und Profiling: Zeiten je Operation (Wand/CPU, p50/p95/p99), Bytes und stat-Aufrufe
+ENABLE_METRICS = True
+METRICS_FILE = "metriken.json"  # Written to ZIELORDNER after each run
+PROMETHEUS_TEXTFILE = None  # Optional path for the node_exporter textfile collector, e.g. "/var/lib/node_exporter/dokuanalyse.prom"
+PROFILE_MODE = None  # None, "cprofile" or "tracemalloc" (report in ZIELORDNER/profil.*)
+
+# Laufkonfiguration aus den Standardwerten oben
+def default_config(**overrides):
+    """Return a RunConfig built from the module defaults, with optional changes."""
+    config = RunConfig(
+        start_paths=list(STARTPFADEN),
+        output_dir=ZIELORDNER,
+        max_depth=MAX_DEPTH,
+        enable_summarization=ENABLE_SUMMARIZATION,
+        use_openai=USE_OPENAI,
+        min_summaries=MIN_SUMMARIES_PER_RUN,
+        max_summaries=MAX_SUMMARIES_PER_RUN,
+        enable_search_index=ENABLE_SEARCH_INDEX,
+        enable_corpus_export=ENABLE_CORPUS_EXPORT,
+        segment_archives=ENABLE_SEGMENT_ARCHIVES,
+        events_file=EVENTS_FILE,
+        resume_runs=RESUME_RUNS,
+        respect_ignore_files=RESPECT_IGNORE_FILES,
+        exclude_patterns=list(EXCLUDE_PATTERNS),
+        git_fast_path=GIT_FAST_PATH,
+        pipeline_workers=dict(PIPELINE_WORKERS),
+        pipeline_queue_size=PIPELINE_QUEUE_SIZE,
+        shard_mode=SHARD_MODE,
+        claim_poll_seconds=CLAIM_POLL_SECONDS,
+        enable_metrics=ENABLE_METRICS,
+        metrics_file=METRICS_FILE,
+        prometheus_textfile=PROMETHEUS_TEXTFILE,
+        profile_mode=PROFILE_MODE,
+        scoring_weights=dict(SCORING_WEIGHTS),
+        watch_debounce_seconds=WATCH_DEBOUNCE_SECONDS,
+        watch_max_delay_seconds=WATCH_MAX_DELAY_SECONDS,
+        watch_poll_seconds=WATCH_POLL_SECONDS,
+        watch_rescan_seconds=WATCH_RESCAN_SECONDS,
+    )
+    return config.replace(**overrides) if overrides else config
 
 # Projekt-Identifikatoren
 PROJECT_MARKERS = [
@@ -51,8 +136,12 @@ OTHER_DOC_FILES = ["LICENSE", "CHANGELOG", "CONTRIBUTING", "CONTRIBUTING.md", "C
 # Minimum quality score to be considered a well-documented project
 MIN_QUALITY_SCORE = 3
 
-# Minimum size in bytes for a README to be considered substantial
-MIN_README_SIZE = 500
+# Gewichte und Schwellen des Qualitätsscores, z. B. {"docs_folder": 3, "min_readme_size": 1000}
+# (ersetzen einzelne Einträge von scoring.DEFAULT_WEIGHTS)
+SCORING_WEIGHTS = {}
+
+# KI-Zusammenfassung, die zusätzlich im Projektordner gespeichert wird
+PROJECT_SUMMARY_FILE = "AI_Zusammenfassung.md"
 
 # Hilfsfunktion: Erzeuge einen eindeutigen Ordnernamen
 
@@ -76,6 +165,7 @@ def is_git_repository(path):
     return False
 
 # Prüfen, ob eine Datei bereits existiert und identisch ist
+@METRICS.timed("is_identical_file")
 def is_identical_file(source_path, target_path):
     """Check if two files are identical based on size and hash."""
     if not os.path.exists(target_path):
@@ -94,10 +184,12 @@ def is_identical_file(source_path, target_path):
     
     with open(target_path, 'rb') as f:
         target_hash.update(f.read())
+    METRICS.add("bytes_read", 2 * os.path.getsize(source_path))
     
     return source_hash.hexdigest() == target_hash.hexdigest()
 
 # Projekt-Root erkennen: Enthält mindestens eine Marker-Datei/-Ordner
+@METRICS.timed("is_project_root")
 def is_project_root(dirpath):
     entries = set(os.listdir(dirpath))
     for marker in PROJECT_MARKERS:
@@ -112,6 +204,15 @@ SKIP_DIRS = {
     'dist', 'build', '.vscode', '.idea', '.mypy_cache', '.pytest_cache', '.cache'
 }
 
+# Core set of directories to always skip during project discovery
+ALWAYS_SKIP = frozenset({
+    'node_modules', 'venv', '.venv', 'env', '__pycache__', '.git', '.idea', '.vscode',
+    'dist', 'build', 'bin', 'obj', 'target', 'out', 'output', 'Debug', 'Release'
+})
+
+# Additional directories skipped inside projects (compared lowercase)
+COLLECT_SKIP_LOWER = frozenset({"node_modules", "vendor", "__pycache__", "venv", ".venv", "env"})
+
 COMMON_NON_PROJECT_FOLDERS = {
     "android", "ios", "web", "app", "public", "assets", "Assets.xcassets",
     "tests", "docs", "frontend", "backend", "vendor", "node_modules", "packages", "src"
@@ -124,30 +225,129 @@ def is_under_existing_project(root, project_roots):
             return True
     return False
 
-def find_all_projects(startpaths):
+# Helper: Check if path equals or lies below base (both absolute)
+def is_path_within(path, base):
+    return path == base or path.startswith(base.rstrip(os.sep) + os.sep)
+
+# Eine Zeile des Lauf-Logs: als "log"-Event über den Bus, ohne Bus direkt (ganze Zeile) auf die Konsole
+def log(events, message):
+    if events is not None:
+        events.log(message)
+    else:
+        print_line(message)
+
+# Startpfade kanonisieren: Duplikate entfernen, verschachtelte Startpfade melden
+def canonicalize_start_paths(startpaths, events=None):
+    """Return (abspath, realpath) pairs without duplicates, outermost paths first.
+
+    Nested start paths are kept (they may reach deeper than max_depth of their
+    parent), but are walked together with their parent; see find_all_projects.
+    """
+    result = []
+    seen = {}
+    for sp in startpaths:
+        abs_sp = os.path.abspath(sp)
+        real_sp = os.path.realpath(abs_sp)
+        if real_sp in seen:
+            log(events, f"Startpfad doppelt angegeben, wird übersprungen: {abs_sp} (= {seen[real_sp]})")
+            continue
+        seen[real_sp] = abs_sp
+        result.append((abs_sp, real_sp))
+
+    result.sort(key=lambda s: s[1].rstrip(os.sep).count(os.sep))
+    for abs_sp, real_sp in result:
+        for other_abs, other_real in result:
+            if other_real != real_sp and is_path_within(real_sp, other_real):
+                log(events, f"Startpfad {abs_sp} liegt innerhalb von {other_abs} und wird nur einmal durchsucht")
+                break
+    return result
+
+# Tiefe eines Ordners relativ zum nächstgelegenen Startpfad
+def depth_below_start(root, start_paths):
+    depth = None
+    for sp in start_paths:
+        if is_path_within(root, sp):
+            rel_path = os.path.relpath(root, sp)
+            d = 0 if rel_path == '.' else rel_path.count(os.sep) + 1
+            if depth is None or d < depth:
+                depth = d
+    return depth
+
+# Ignore-Engine für einen Lauf erzeugen
+def create_ignore_engine(config):
+    return IgnoreEngine(config.exclude_patterns, IGNORE_FILE_NAMES if config.respect_ignore_files else ())
+
+# os.walk mit Zeitmessung je Verzeichnisauflistung
+def timed_walk(top, operation):
+    walker = os.walk(top, topdown=True)
+    while True:
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        entry = next(walker, None)
+        if entry is None:
+            return
+        METRICS.observe(operation, time.perf_counter() - started, time.thread_time() - cpu_started)
+        METRICS.add("dirs_walked")
+        METRICS.add("files_seen", len(entry[2]))
+        yield entry
+
+@METRICS.timed("find_all_projects")
+def find_all_projects(config, cancel=None, events=None, ignore=None):
+    return sorted(iter_projects(config, cancel, events, ignore))
+
+# Projekte einzeln liefern, sobald sie gefunden werden (Quelle der Pipeline)
+def iter_projects(config, cancel=None, events=None, ignore=None, searched_dirs=None):
+    """Yield the project roots below the start paths.
+
+    searched_dirs (a list) receives the directories searched that are not projects
+    themselves - where a new project would appear (watch mode).
+    """
     projects = set() # Use a set to automatically handle duplicates
     
-    # Normalize startpaths to absolute paths for reliable comparison
-    normalized_startpaths = [os.path.abspath(sp) for sp in startpaths]
-    abs_zielordner = os.path.abspath(ZIELORDNER)
-
-    # Core set of directories to always skip
-    ALWAYS_SKIP = {
-        'node_modules', 'venv', '.venv', 'env', '__pycache__', '.git', '.idea', '.vscode',
-        'dist', 'build', 'bin', 'obj', 'target', 'out', 'output', 'Debug', 'Release'
-    }
+    # Normalize startpaths to absolute paths; nested and duplicate start paths are collapsed
+    canonical_startpaths = canonicalize_start_paths(config.start_paths, events)
+    normalized_startpaths = [abs_sp for abs_sp, _ in canonical_startpaths]
+    abs_zielordner = os.path.abspath(config.output_dir)
+    if ignore is None:
+        ignore = create_ignore_engine(config)
+    
+    # Physical directories (st_dev, st_ino) already scanned in this run -> first path seen.
+    # Catches nested start paths, bind mounts and symlinked start paths.
+    visited = {}
 
     for spath in normalized_startpaths:
-        print(f"Durchsuche: {spath}")
+        if not os.path.isdir(spath):
+            log(events, f"Startpfad nicht gefunden: {spath}")
+            continue
+        st = os.stat(spath)
+        if st.st_ino and (st.st_dev, st.st_ino) in visited:
+            log(events, f"Startpfad bereits durchsucht (als {visited[(st.st_dev, st.st_ino)]}): {spath}")
+            continue
+        log(events, f"Durchsuche: {spath}")
         
-        # Track depth relative to start path
-        for root, dirs, files in os.walk(spath, topdown=True):
-            # Calculate current depth (how many directory levels from start path)
-            rel_path = os.path.relpath(root, spath)
-            current_depth = 0 if rel_path == '.' else rel_path.count(os.sep) + 1
+        # Track depth relative to the nearest start path
+        for root, dirs, files in timed_walk(spath, "discovery.listdir"):
+            check_cancelled(cancel)
+            
+            # Scan each physical directory at most once per run
+            try:
+                METRICS.add("files_stat")
+                st = os.stat(root)
+                key = (st.st_dev, st.st_ino)
+            except OSError:
+                key = None
+            if key is not None and st.st_ino:
+                if key in visited:
+                    log(events, f"Übersprungen, bereits durchsucht als {visited[key]}: {root}")
+                    dirs[:] = []
+                    continue
+                visited[key] = root
+            
+            # Calculate current depth (how many directory levels from the nearest start path)
+            current_depth = depth_below_start(root, normalized_startpaths)
             
             # Skip if we've exceeded max depth
-            if current_depth > MAX_DEPTH:
+            if current_depth > config.max_depth:
                 dirs[:] = [] # Don't go deeper
                 continue
                 
@@ -156,11 +356,15 @@ def find_all_projects(startpaths):
                 dirs[:] = [] 
                 continue
                 
-            # Prune problematic directories early
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d.lower() not in ALWAYS_SKIP]
+            # Prune problematic and ignored (.gitignore/.ignore/EXCLUDE_PATTERNS) directories early
+            matcher = ignore.matcher_for(spath, root, files)
+            dirs[:] = [d for d in dirs if not d.startswith('.') and d.lower() not in ALWAYS_SKIP
+                       and not matcher.is_ignored(d, True)]
             
             # Skip this directory if it's a start path (not a project itself)
             if os.path.abspath(root) in normalized_startpaths:
+                if searched_dirs is not None:
+                    searched_dirs.append(os.path.abspath(root))
                 continue
                 
             # Skip if under an existing project
@@ -172,480 +376,1107 @@ def find_all_projects(startpaths):
                 if is_project_root(root):
                     abs_path = os.path.abspath(root)
                     projects.add(abs_path)
-                    print(f"Projekt gefunden: {abs_path}")
+                    log(events, f"Projekt gefunden: {abs_path}")
+                    if events is not None:
+                        events.emit("project_discovered", stage="discovery", path=abs_path)
                     dirs[:] = [] # Don't look for projects inside this one
+                    yield abs_path
+                elif searched_dirs is not None:
+                    searched_dirs.append(os.path.abspath(root))
             except PermissionError:
                 dirs[:] = [] # Skip inaccessible directories
                 continue
             except Exception as e:
-                print(f"Fehler bei {root}: {e}")
+                log(events, f"Fehler bei {root}: {e}")
                 continue
-                
-    return sorted(list(projects))
+
+# Projektordner durchlaufen wie beim Sammeln (übersprungene und ignorierte Ordner ausgenommen)
+def walk_project(proj_path, cancel=None, ignore=None, top=None, operation="collect.listdir"):
+    """Yield (dirpath, dirnames, filenames) of the directories doc collection looks at.
+
+    dirnames and filenames are already pruned; top restricts the walk to a subtree.
+    """
+    if ignore is None:
+        ignore = IgnoreEngine()
+    for dirpath, dirnames, filenames in timed_walk(top or proj_path, operation):
+        check_cancelled(cancel)
+        # Prune SKIP_DIRS, hidden and ignored directories from dirnames
+        matcher = ignore.matcher_for(proj_path, dirpath, filenames)
+        dirnames[:] = [d for d in dirnames if not d.startswith('.') and d not in SKIP_DIRS
+                       and d.lower() not in COLLECT_SKIP_LOWER and not matcher.is_ignored(d, True)]
+        # Files ignored by the project's ignore rules are not part of its documentation
+        yield dirpath, dirnames, [f for f in filenames if not matcher.is_ignored(f, False)]
+
+# Doku-Dateien, die überall im Projekt anhand ihres Namens gesammelt werden
+DIRECT_DOC_NAMES = frozenset(README_FILES + MANIFEST_FILES + OTHER_DOC_FILES)
+
+def is_direct_doc(name):
+    # Standard doc files and all .md files, as they're likely documentation
+    return name in DIRECT_DOC_NAMES or name.lower().endswith('.md')
 
 # Sammle alle relevanten Doku-Dateien/-Ordner im Projekt (rekursiv)
-def collect_doc_files(proj_path):
+@METRICS.timed("collect_doc_files")
+def collect_doc_files(proj_path, cancel=None, ignore=None):
+    """Docs folders and documentation files of a project, in walk order.
+
+    A docs folder is listed as a marker entry followed by every file below it;
+    other files are collected by name. Skipped and ignored directories and files
+    are left out, so consumers use the list as is and never walk a folder again.
+    """
     doc_paths = []
+    docs_dirs = set()  # directories at or below a docs folder
     # When collecting docs within a project, also skip irrelevant subdirectories
-    for dirpath, dirnames, filenames in os.walk(proj_path, topdown=True):
-        # Prune SKIP_DIRS and hidden directories from dirnames
-        dirnames[:] = [d for d in dirnames if not d.startswith('.') and d not in SKIP_DIRS and d.lower() not in {"node_modules", "vendor", "__pycache__", "venv", ".venv", "env"}]
-        # Optionally, filter filenames too if needed, e.g., skip all .pyc files
-        # filenames[:] = [f for f in filenames if not f.endswith('.pyc')]
-
+    for dirpath, dirnames, filenames in walk_project(proj_path, cancel, ignore):
+        in_docs = dirpath in docs_dirs
         # Docs-Folder
         for d in dirnames:
+            if in_docs or d in DOCS_FOLDERS:
+                docs_dirs.add(os.path.join(dirpath, d))
             if d in DOCS_FOLDERS:
                 doc_paths.append(os.path.join(dirpath, d))
-        # Einzeldateien
+        # Einzeldateien (inside docs folders all of them)
         for fname in filenames:
-            # Include standard doc files
-            if fname in README_FILES + MANIFEST_FILES + OTHER_DOC_FILES:
-                doc_paths.append(os.path.join(dirpath, fname))
-            # Include all .md files as they're likely documentation
-            elif fname.lower().endswith('.md'):
+            if in_docs or is_direct_doc(fname):
                 doc_paths.append(os.path.join(dirpath, fname))
     return doc_paths
 
+# Eingaben der KI-Zusammenfassung: die gesammelten Doku-Dateien ohne die eigene Zusammenfassung
+def summary_input_files(doc_files):
+    return [p for p in doc_files if os.path.basename(p) != PROJECT_SUMMARY_FILE]
+
+# Doku-Dateien eines Projekts als Zeilen für die spaltenbasierte Bewertung (scoring.py)
+README_NAMES_LOWER = frozenset(name.lower() for name in README_FILES)
+MANIFEST_NAMES = frozenset(MANIFEST_FILES)
+OTHER_DOC_NAMES = frozenset(OTHER_DOC_FILES)
+
+def doc_columns(doc_files):
+    """Size, type code and flags of every collected doc file (one stat per file)."""
+    columns = DocColumns()
+    stat_calls = 0
+    docs_dirs = []
+    for doc_path in doc_files:
+        name = os.path.basename(doc_path)
+        try:
+            st = os.stat(doc_path)
+        except OSError:
+            continue
+        stat_calls += 1
+        if stat.S_ISDIR(st.st_mode):
+            if name in DOCS_FOLDERS:
+                columns.add(0, kind_of(name), FLAG_DOCS_DIR)
+                docs_dirs.append(doc_path)
+            continue
+        size = st.st_size if stat.S_ISREG(st.st_mode) else 0
+        # Files of a docs folder follow its marker; those also collected by name count twice
+        if any(is_path_within(doc_path, d) for d in docs_dirs):
+            columns.add(size, kind_of(name), FLAG_IN_DOCS)
+            if not is_direct_doc(name):
+                continue
+        flags = FLAG_DIRECT
+        if name.lower() in README_NAMES_LOWER:
+            flags |= FLAG_README
+        if name in MANIFEST_NAMES:
+            flags |= FLAG_MANIFEST
+        if name in OTHER_DOC_NAMES:
+            flags |= FLAG_OTHER_DOC
+        columns.add(size, kind_of(name), flags)
+    METRICS.add("files_stat", stat_calls)
+    return columns
+
 # Evaluate the documentation quality of a project
-def evaluate_doc_quality(doc_files, proj_path):
+@METRICS.timed("evaluate_doc_quality")
+def evaluate_doc_quality(doc_files, proj_path, weights=None, columns=None):
     """Evaluate the quality of a project's documentation.
-    Returns a score based on various factors:
+    Returns a score based on various factors (weights see scoring.DEFAULT_WEIGHTS):
     - Presence of README
     - Size of README
     - Number of markdown files
     - Presence of docs folder
     - Total documentation size
     """
-    score = 0
-    total_size = 0
-    readme_size = 0
-    md_count = 0
-    has_docs_folder = False
-    
-    for doc_path in doc_files:
-        # Check if it's a README file
-        basename = os.path.basename(doc_path)
-        if basename.lower() in [r.lower() for r in README_FILES]:
-            if os.path.isfile(doc_path):
-                readme_size = os.path.getsize(doc_path)
-                if readme_size >= MIN_README_SIZE:
-                    score += 2  # Substantial README
-                else:
-                    score += 1  # Small README
-        
-        # Count markdown files
-        if doc_path.lower().endswith('.md') and os.path.isfile(doc_path):
-            md_count += 1
-            total_size += os.path.getsize(doc_path)
-        
-        # Check for docs folder
-        if os.path.isdir(doc_path) and os.path.basename(doc_path) in DOCS_FOLDERS:
-            has_docs_folder = True
-            # Count files in docs folder
-            for root, _, files in os.walk(doc_path):
-                for file in files:
-                    if file.lower().endswith('.md'):
-                        md_count += 1
-                    file_path = os.path.join(root, file)
-                    if os.path.isfile(file_path):
-                        total_size += os.path.getsize(file_path)
-    
-    # Add points for various quality indicators
-    if has_docs_folder:
-        score += 2
-    if md_count > 5:
-        score += 2
-    elif md_count > 2:
-        score += 1
-    if total_size > 50000:  # 50KB
-        score += 2
-    elif total_size > 10000:  # 10KB
-        score += 1
-    
-    return score
+    if columns is None:
+        columns = doc_columns(doc_files)
+    return score_project(columns, weights)
 
-# Kopiere die relevanten Dateien/Ordner in Zielstruktur
+# Kopiere die relevanten Dateien in Zielstruktur
 def copy_docs(doc_paths, proj_path, dest_dir):
     for src in doc_paths:
+        if os.path.isdir(src):
+            continue  # docs folder marker, its files follow in doc_paths
         rel = os.path.relpath(src, proj_path)
         dst = os.path.join(dest_dir, rel)
         os.makedirs(os.path.dirname(dst), exist_ok=True)
-        if os.path.isdir(src):
-            shutil.copytree(src, dst, dirs_exist_ok=True)
-        else:
-            shutil.copy2(src, dst)
+        shutil.copy2(src, dst)
+
+# Dateien eines Projekts mit ihrem Pfad im Archiv (ZIP oder Segment)
+def archive_members(doc_files, proj_path):
+    """Yield (file_path, arcname) for all doc files of a project, each arcname once."""
+    # Track already added files to prevent duplicates
+    added_files = set()
+    for doc_path in doc_files:
+        # Docs folders are markers; collect_doc_files lists their (not ignored) files
+        if os.path.isdir(doc_path):
+            continue
+        arcname = os.path.relpath(doc_path, proj_path)
+        if arcname not in added_files:
+            added_files.add(arcname)
+            yield doc_path, arcname
+
+# ZIP-Archiv mit der Dokumentation eines Projekts schreiben
+@METRICS.timed("write_project_zip")
+def write_project_zip(zip_path, doc_files, proj_path, cancel=None, events=None):
+    """Write all doc files of a project into zip_path.
+
+    The archive is written to a temporary file and renamed when complete, so a
+    crash or cancellation never leaves a truncated zip_path behind.
+    """
+    with atomic_write(zip_path, 'wb') as f_out:
+        with zipfile.ZipFile(f_out, 'w') as zipf:
+            for file_path, arcname in archive_members(doc_files, proj_path):
+                check_cancelled(cancel)
+                
+                try:
+                    # Create ZipInfo object from file
+                    zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+                    
+                    # Check and adjust timestamp if before 1980
+                    if zinfo.date_time[0] < 1980:
+                        zinfo.date_time = (1980, 1, 1, 0, 0, 0)
+                    
+                    # Read file content
+                    with open(file_path, 'rb') as f_in:
+                        file_data = f_in.read()
+                    METRICS.add("bytes_read", len(file_data))
+                    METRICS.add("archive_bytes", len(file_data))
+                    METRICS.add("files_stat")
+                    
+                    # Add to zip with compression
+                    zipf.writestr(zinfo, file_data, compress_type=zipfile.ZIP_DEFLATED)
+                except Exception as e:
+                    log(events, f"Error adding {file_path} to ZIP: {e}")
+                    continue
+    METRICS.add("bytes_written", os.path.getsize(zip_path))
+
+# Archiv in den Kategorie-Ordner kopieren (mit Zeit- und Byte-Messung)
+def copy_archive(zip_path, target_zip):
+    with METRICS.timer("copy_archive"):
+        atomic_copy(zip_path, target_zip)
+    size = os.path.getsize(target_zip)
+    METRICS.add("bytes_read", size)
+    METRICS.add("bytes_written", size)
+
+# Katalog öffnen und einmalig den alten Zustand (Batch-Datei, vorhandene Dateien) übernehmen
+def open_catalog(config, events=None):
+    """Open the run catalog in the output folder and migrate legacy state on first use."""
+    output_dir = config.output_dir
+    catalog = Catalog(os.path.join(output_dir, CATALOG_FILE), "DELETE" if config.shard_mode else "WAL")
+    if catalog.get_meta("legacy_imported"):
+        return catalog
+
+    best_docs_dir = config.best_docs_dir
+    summaries_dir = config.summaries_dir
+
+    # Existing archives
+    for f in os.listdir(output_dir):
+        if f.endswith('_dokumentation.zip'):
+            catalog.record_archive(f.replace('_dokumentation.zip', ''), os.path.join(output_dir, f))
+    for category, folder in (("git", GIT_CLONES_FOLDER), ("local", LOCAL_PROJECTS_FOLDER)):
+        category_dir = os.path.join(best_docs_dir, folder)
+        if os.path.isdir(category_dir):
+            for f in os.listdir(category_dir):
+                if f.endswith('_dokumentation.zip'):
+                    name = f.replace('_dokumentation.zip', '')
+                    catalog.record_archive(name, os.path.join(output_dir, f), category=category)
+
+    # Existing summaries
+    if os.path.isdir(summaries_dir):
+        for f in os.listdir(summaries_dir):
+            if f.endswith('_zusammenfassung.md'):
+                catalog.record_summary(f.replace('_zusammenfassung.md', ''), os.path.join(summaries_dir, f))
+
+    # Legacy batch file
+    batch_file = os.path.join(output_dir, SUMMARY_BATCH_FILE)
+    if os.path.exists(batch_file):
+        try:
+            with open(batch_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    proj = line.strip()
+                    if not proj:
+                        continue
+                    name = unique_project_name(proj)
+                    if catalog.has_summary(name):
+                        catalog.upsert_project(name, path=proj)
+                    else:
+                        catalog.record_summary(name, None, path=proj)
+            os.replace(batch_file, batch_file + ".migrated")
+        except Exception as e:
+            log(events, f"Error migrating {batch_file}: {e}")
+
+    catalog.set_meta("legacy_imported", 1)
+    return catalog
+
+# Index-Dateien als Sicht auf den Katalog erzeugen
+def write_index_files(catalog, best_docs_dir, git_clones_dir, local_projects_dir, git_projects, local_dev_projects):
+    main_index_path = os.path.join(best_docs_dir, "_index.txt")
+    git_index_path = os.path.join(git_clones_dir, "_index.txt")
+    local_index_path = os.path.join(local_projects_dir, "_index.txt")
+
+    git_names = catalog.best_projects("git")
+    local_names = catalog.best_projects("local")
+    created_at = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    # Create main index file
+    with atomic_write(main_index_path) as index_file:
+        index_file.write(f"Hochwertige Projektdokumentation\n")
+        index_file.write(f"Erstellt am: {created_at}\n\n")
+        index_file.write(f"Git-Repositories: {git_projects}\n")
+        index_file.write(f"Lokale Projekte: {local_dev_projects}\n\n")
+
+        # List Git repositories
+        index_file.write(f"=== Git-Repositories ===\n")
+        for proj_name in git_names:
+            index_file.write(f"- {proj_name}\n")
+
+        # List local projects
+        index_file.write(f"\n=== Lokale Projekte ===\n")
+        for proj_name in local_names:
+            index_file.write(f"- {proj_name}\n")
+
+    # Create Git repositories index
+    with atomic_write(git_index_path) as index_file:
+        index_file.write(f"Git-Repository Dokumentation\n")
+        index_file.write(f"Erstellt am: {created_at}\n\n")
+        for proj_name in git_names:
+            index_file.write(f"- {proj_name}\n")
+
+    # Create local projects index
+    with atomic_write(local_index_path) as index_file:
+        index_file.write(f"Lokale Projekt-Dokumentation\n")
+        index_file.write(f"Erstellt am: {created_at}\n\n")
+        for proj_name in local_names:
+            index_file.write(f"- {proj_name}\n")
+
+    return main_index_path, git_index_path, local_index_path
 
 # Hauptfunktion
-def load_summarized_projects():
-    """Load the list of projects that have already been summarized"""
-    batch_file = os.path.join(ZIELORDNER, SUMMARY_BATCH_FILE)
-    if not os.path.exists(batch_file):
-        return set()
+def main(cancel=None, events=None, config=None):
+    """Run one analysis. Without config the module defaults are used (default_config())."""
+    if config is None:
+        config = default_config()
+    config.validate()
+    
+    # Progress events and log lines of this run (UI subscribers, console and/or JSON lines file)
+    if events is None:
+        events = ProgressBus()
+        events.subscribe(ConsoleLog())
     
-    try:
-        with open(batch_file, 'r', encoding='utf-8') as f:
-            return set(line.strip() for line in f if line.strip())
-    except Exception as e:
-        print(f"Error loading summarized projects: {e}")
-        return set()
-
-def save_summarized_project(project_path):
-    """Add a project to the list of summarized projects"""
-    batch_file = os.path.join(ZIELORDNER, SUMMARY_BATCH_FILE)
-    try:
-        with open(batch_file, 'a', encoding='utf-8') as f:
-            f.write(f"{project_path}\n")
-    except Exception as e:
-        print(f"Error saving summarized project: {e}")
-
-def main():
     # Load environment variables from .env file if it exists
+    import dotenv
     dotenv.load_dotenv()
     
-    # Create main output directory and best docs subdirectory
-    os.makedirs(ZIELORDNER, exist_ok=True)
-    best_docs_dir = os.path.join(ZIELORDNER, BEST_DOCS_FOLDER)
-    os.makedirs(best_docs_dir, exist_ok=True)
+    # Create the output directory with its best docs (Git/local) and summaries subdirectories
+    output_dirs = [config.output_dir, config.best_docs_dir, config.git_clones_dir,
+                   config.local_projects_dir, config.summaries_dir]
+    for directory in output_dirs:
+        os.makedirs(directory, exist_ok=True)
     
-    # Create subdirectories for Git repositories and local projects
-    git_clones_dir = os.path.join(best_docs_dir, GIT_CLONES_FOLDER)
-    local_projects_dir = os.path.join(best_docs_dir, LOCAL_PROJECTS_FOLDER)
-    os.makedirs(git_clones_dir, exist_ok=True)
-    os.makedirs(local_projects_dir, exist_ok=True)
+    # Remove temporary files of crashed runs
+    remove_stale_temp_files(output_dirs)
     
-    # Create directory for AI-generated summaries
-    summaries_dir = os.path.join(ZIELORDNER, SUMMARIES_FOLDER)
-    os.makedirs(summaries_dir, exist_ok=True)
+    # Open the run catalog (replaces summary_batches.txt and directory listings)
+    catalog = open_catalog(config, events)
+    work_queue = None
+    if config.shard_mode:
+        # Crashed workers are covered by lease expiry in the shared work queue
+        work_queue = WorkQueue(os.path.join(config.output_dir, WORK_QUEUE_FILE))
+        run_id = work_queue.join_run()
+        events.log(f"Verteilter Lauf #{run_id}, Worker {work_queue.worker}")
+        scan_id = catalog.start_scan(config.start_paths)
+    else:
+        scan_id = catalog.resumable_scan(config.start_paths) if config.resume_runs else None
+        if scan_id is not None:
+            events.log(f"Setze unterbrochenen Lauf #{scan_id} fort")
+        else:
+            scan_id = catalog.start_scan(config.start_paths)
     
     # Load the list of projects that have already been summarized
-    summarized_projects = load_summarized_projects()
+    summarized_projects = catalog.summarized_projects()
     
-    projects = find_all_projects(STARTPFADEN)
-    print(f"Gefundene Projekte: {len(projects)}")
+    events_writer = None
+    if config.events_file:
+        events_writer = events.subscribe(JsonLinesWriter(config.events_file))
     
-    # Track statistics
-    total_projects = 0
-    best_projects = 0
-    git_projects = 0
-    local_dev_projects = 0
-    skipped_existing = 0
+    # Metrics cover this run (and runs overlapping it); the profiler (if any) all threads
+    METRICS.begin_run()
+    profile = None
+    if config.profile_mode:
+        profile = ProfileCapture(config.profile_mode, os.path.join(config.output_dir, "profil"))
+        profile.start()
     
-    for proj in projects:
-        doc_files = collect_doc_files(proj)
-        if not doc_files:
-            continue  # Nichts zu extrahieren
+    try:
+        run_stages(config, catalog, scan_id, summarized_projects, cancel, events, work_queue)
+    except AnalysisCancelled:
+        events.log("\nAnalyse abgebrochen.")
+        events.end_open_stages(cancelled=True)
+        catalog.finish_scan(scan_id, None, None, None)
+        raise
+    finally:
+        catalog.close()
+        if work_queue is not None:
+            work_queue.close()
+        if events_writer is not None:
+            events.unsubscribe(events_writer)
+            events_writer.close()
+        write_metrics(config, profile, events)
+        METRICS.end_run()
+
+# Metriken (auch abgebrochener Läufe) und Profiling-Bericht schreiben
+def write_metrics(config, profile=None, events=None):
+    written = []
+    if profile is not None:
+        written.extend(profile.stop())
+    if config.enable_metrics:
+        try:
+            metrics_path = os.path.join(config.output_dir, config.metrics_file)
+            METRICS.write_json(metrics_path)
+            written.append(metrics_path)
+            if config.prometheus_textfile:
+                METRICS.write_prometheus(config.prometheus_textfile)
+                written.append(config.prometheus_textfile)
+        except OSError as e:
+            log(events, f"Metriken konnten nicht geschrieben werden: {e}")
+        log(events, "\n===== Metriken =====")
+        for line in METRICS.report_lines():
+            log(events, line)
+    for path in written:
+        log(events, f"  - {path}")
+
+class AnalysisRun:
+    """Stages of one analysis run, connected by a Pipeline.
+
+    Discovery feeds doc collection/scoring, which feeds archiving; archived projects
+    flow on to the search index, the corpus export and the summarizer. Counters are shared by the
+    worker threads of all stages.
+
+    With projects, only those are processed instead of discovering the start paths;
+    force rebuilds their archives and summaries even if nothing seems to have changed
+    (watch mode, which knows better than the git state).
+    """
+
+    def __init__(self, config, catalog, scan_id, summarized_projects, cancel, events, work_queue=None,
+                 projects=None, force=False):
+        self.config = config
+        self.catalog = catalog
+        self.work_queue = work_queue
+        self.projects = projects
+        self.force = force
+        self.scan_id = scan_id
+        self.summarized_projects = summarized_projects
+        self.git_clones_dir = config.git_clones_dir
+        self.local_projects_dir = config.local_projects_dir
+        self.summaries_dir = config.summaries_dir
+        self.cancel = cancel
+        self.events = events
+        self.ignore = create_ignore_engine(config)
+        self.scoring_weights = effective_weights(config.scoring_weights)
+        self.pipeline = None
+        self.search_index = None
+        self.corpus = None
+        self.segments = None
+        self.llm_backends = set()
+        self.llm_usage = {}  # backend -> tokens, characters and seconds of full summaries (calibration)
+        
+        # Track statistics
+        self.stats = {
+            "discovered": 0, "total_projects": 0, "best_projects": 0, "git_projects": 0,
+            "local_dev_projects": 0, "skipped_existing": 0, "unchanged_git": 0,
+            "index_queued": 0, "indexed_files": 0, "export_queued": 0, "exported_files": 0,
+            "summaries_queued": 0, "summaries_created": 0,
+        }
+        self._stats_lock = threading.Lock()
+        
+        # Projects finished by an interrupted run of this scan
+        self.archived = set(catalog.journal_items(scan_id, "archive"))
+        self.indexed = set(catalog.journal_items(scan_id, "index"))
+        self.exported = set(catalog.journal_items(scan_id, "export"))
+
+    def archive_intact(self, proj_folder, zip_path):
+        """The project's archive exists and is readable (ZIP file or entry in the segment archive)."""
+        if self.segments is not None:
+            return self.segments.has_project(proj_folder)
+        return zip_is_intact(zip_path)
+
+    def log(self, message):
+        # Per-project lines of all worker threads go through the bus, each printed whole
+        self.events.log(message)
+
+    def count(self, key, n=1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def run(self):
+        config, events = self.config, self.events
+        workers, queue_size = config.pipeline_workers, config.pipeline_queue_size
+        pipeline = self.pipeline = Pipeline(self.cancel)
+        pipeline.add_stage("collect", METRICS.timed("stage.collect")(self.collect_project), workers["collect"],
+                           queue_size, upstream=["source"])
+        pipeline.add_stage("archive", METRICS.timed("stage.archive")(self.archive_project), workers["archive"],
+                           queue_size, upstream=["collect"], on_finished=self.stage_finished)
+        if config.enable_search_index:
+            pipeline.add_stage("index", METRICS.timed("stage.index")(self.index_project), workers["index"],
+                               queue_size, upstream=["collect", "archive"], on_finished=self.stage_finished)
+        if config.enable_corpus_export:
+            pipeline.add_stage("export", METRICS.timed("stage.export")(self.export_project), workers["export"],
+                               queue_size, upstream=["collect", "archive"], on_finished=self.stage_finished)
+        pipeline.add_stage("summarize", METRICS.timed("stage.summarize")(self.summarize_project), workers["summarize"],
+                           queue_size, upstream=["collect", "archive"], on_finished=self.stage_finished)
+        
+        # All stages run at the same time; totals follow once the upstream stage is done
+        disabled = {"index": not config.enable_search_index, "export": not config.enable_corpus_export}
+        for stage in STAGES:
+            if not disabled.get(stage):
+                events.start_stage(stage)
+        if config.enable_search_index:
+            self.search_index = SearchIndex(os.path.join(config.output_dir, SEARCH_INDEX_FILE),
+                                            "DELETE" if self.work_queue is not None else "WAL")
+        if config.enable_corpus_export:
+            self.corpus = CorpusWriter(config.output_dir)
+        if config.segment_archives:
+            self.segments = SegmentArchive(os.path.join(config.output_dir, SEGMENT_FOLDER))
+            self.segments.start_compactor()
+        if self.work_queue is not None:
+            self.work_queue.start_heartbeat()
+        try:
+            if self.projects is not None:
+                source = self.feed_projects
+            elif self.work_queue is not None:
+                source = self.claim_projects
+            else:
+                source = self.discover
+            pipeline.run(METRICS.timed("stage.discover")(source))
+        finally:
+            if self.search_index is not None:
+                self.search_index.close()
+            if self.corpus is not None:
+                self.corpus.close()
+            if self.segments is not None:
+                self.segments.close()
+        return self.stats
+
+    def project_done(self, proj):
+        """A project left the archive stage (index and summary may still follow)."""
+        self.catalog.journal_done(self.scan_id, "archive", proj)
+        if self.work_queue is not None:
+            self.work_queue.complete(proj)
+
+    def stage_finished(self, name):
+        if name == "archive":
+            self.events.end_stage("archive")
+            self.events.emit("stage_total", stage="index", total=self.stats["index_queued"])
+            self.events.emit("stage_total", stage="export", total=self.stats["export_queued"])
+            self.events.emit("stage_total", stage="summarize", total=self.stats["summaries_queued"])
+        elif name == "index":
+            self.events.end_stage("index")
+            self.log(f"Suchindex aktualisiert: {self.stats['indexed_files']} Dateien neu indexiert")
+        elif name == "export":
+            # Periodic compaction: once enough of the corpus is superseded or deleted text
+            if self.corpus.needs_compaction():
+                generation = self.corpus.compact()
+                self.log(f"Korpus kompaktiert (Generation {generation})")
+            self.events.end_stage("export")
+            self.log(f"Korpus aktualisiert: {self.stats['exported_files']} Dokumente neu angehängt")
+        elif name == "summarize":
+            self.events.end_stage("summarize")
+
+    def reserve_summary(self, proj, proj_folder, doc_files=None):
+        """Claim one of the max_summaries slots for a project that still needs a summary.
+
+        With doc_files, an existing summary whose documentation changed since is renewed
+        (incrementally, see summarize_documentation).
+        """
+        if not self.config.enable_summarization:
+            return False
+        if not self.force and (proj in self.summarized_projects or self.catalog.has_summary(proj_folder)):
+            if doc_files is None or not self.summary_outdated(proj_folder, doc_files):
+                return False
+        with self._stats_lock:
+            if self.stats["summaries_queued"] >= self.config.max_summaries:
+                return False
+            self.stats["summaries_queued"] += 1
+        return True
+
+    def summary_outdated(self, proj_folder, doc_files):
+        fingerprint = self.catalog.summary_fingerprint(proj_folder)
+        return fingerprint is not None and fingerprint != docs_fingerprint(summary_input_files(doc_files))
+
+    def llm_limiter(self, use_openai):
+        """Adaptive concurrency limit of the LLM backend (shared by all runs of the process)."""
+        url = OPENAI_API_URL if use_openai else self.config.local_llm_url
+        limiter = limiter_for(url, self.config.pipeline_workers["summarize"])
+        self.llm_backends.add(limiter.backend)
+        return limiter
+
+    def record_llm_usage(self, use_openai, summary_stats):
+        # Only summaries over the whole documentation say what a new project costs
+        if summary_stats.get("summary_mode") not in ("vollständig", "abschnittsweise"):
+            return
+        backend = backend_key(OPENAI_API_URL if use_openai else self.config.local_llm_url)
+        with self._stats_lock:
+            usage = self.llm_usage.setdefault(backend, {"summaries": 0, "latency": 0.0, "prompt_tokens": 0,
+                                                        "input_chars": 0})
+            usage["summaries"] += 1
+            usage["latency"] += summary_stats.get("latency", 0.0)
+            usage["prompt_tokens"] += summary_stats.get("prompt_tokens", 0)
+            usage["input_chars"] += summary_stats.get("input_chars", 0)
+
+    def queue_index(self, proj, proj_folder, doc_files):
+        if self.config.enable_search_index and proj not in self.indexed:
+            self.count("index_queued")
+            self.pipeline.put("index", (proj, proj_folder, doc_files))
+        if self.config.enable_corpus_export and proj not in self.exported:
+            self.count("export_queued")
+            self.pipeline.put("export", (proj, proj_folder, doc_files))
+
+    # --- Stufe 1: Projektsuche (Quelle) ---
+
+    def discover(self):
+        catalog, scan_id = self.catalog, self.scan_id
+        if catalog.journal_stage_done(scan_id, "discovery"):
+            projects = catalog.journal_items(scan_id, "discovery")
+            self.log("Projektliste aus dem unterbrochenen Lauf übernommen")
+            for proj in projects:
+                self.pipeline.put("collect", proj)
+        else:
+            projects = []
+            for proj in iter_projects(self.config, self.cancel, self.events, self.ignore):
+                projects.append(proj)
+                self.pipeline.put("collect", proj)
+            catalog.record_discovery(scan_id, projects)
+        self.stats["discovered"] = len(projects)
+        self.events.end_stage("discovery")
+        self.events.emit("stage_total", stage="archive", total=len(projects))
+        self.log(f"Gefundene Projekte: {len(projects)}")
+
+    # --- Stufe 1 im Überwachungsmodus: vorgegebene Projekte ---
+
+    def feed_projects(self):
+        projects = [proj for proj in self.projects if os.path.isdir(proj)]
+        for proj in projects:
+            self.pipeline.put("collect", proj)
+        self.stats["discovered"] = len(projects)
+        self.events.end_stage("discovery")
+        self.events.emit("stage_total", stage="archive", total=len(projects))
+
+    # --- Stufe 1 im verteilten Lauf: Projekte aus der gemeinsamen Arbeitsliste beanspruchen ---
+
+    def claim_projects(self):
+        work_queue = self.work_queue
+        discovery = None
+        claimed = 0
+        while True:
+            # One worker searches the start paths and fills the work queue for everybody
+            if discovery is None and not work_queue.discovery_done() and work_queue.claim_discovery():
+                discovery = threading.Thread(target=self.discover_into_queue, name="discovery", daemon=True)
+                discovery.start()
+            
+            proj = work_queue.claim()
+            if proj is not None:
+                claimed += 1
+                self.pipeline.put("collect", proj)
+                continue
+            # Stay until the others are done, to take over their projects if their leases expire
+            if work_queue.discovery_done() and not work_queue.claimed_by_others():
+                break
+            if discovery is not None and not discovery.is_alive():
+                discovery = None  # failed, the lease was released; claim it again
+            check_cancelled(self.cancel)
+            time.sleep(self.config.claim_poll_seconds)
         
-        total_projects += 1
+        self.stats["discovered"] = claimed
+        self.events.end_stage("discovery")
+        self.events.emit("stage_total", stage="archive", total=claimed)
+        self.log(f"Beanspruchte Projekte: {claimed}")
+
+    def discover_into_queue(self):
+        work_queue = self.work_queue
+        batch = []
+        try:
+            for proj in iter_projects(self.config, self.cancel, self.events, self.ignore):
+                if self.pipeline.aborted():
+                    raise AnalysisCancelled()
+                batch.append(proj)
+                if len(batch) >= 20:
+                    work_queue.add_items(batch)
+                    batch = []
+            work_queue.add_items(batch)
+            work_queue.finish_discovery()
+        except BaseException as e:
+            if not isinstance(e, AnalysisCancelled):
+                self.log(f"Fehler bei der Projektsuche: {e}")
+            try:
+                work_queue.release_discovery()
+            except Exception:
+                pass  # work queue already closed by the main thread
+
+    # --- Stufe 2: Dokumente sammeln und bewerten ---
+
+    def collect_project(self, proj):
+        catalog, scan_id, events = self.catalog, self.scan_id, self.events
         proj_folder = unique_project_name(proj)
-        zip_path = os.path.join(ZIELORDNER, f"{proj_folder}_dokumentation.zip")
+        zip_path = os.path.join(self.config.output_dir, f"{proj_folder}_dokumentation.zip")
         
-        # Check if ZIP already exists and skip if it does
-        if os.path.exists(zip_path):
-            print(f"{proj_folder}: ZIP existiert bereits unter {zip_path}")
+        if proj in self.archived:
+            has_archive = catalog.has_archive(proj_folder)
+            if not has_archive or self.archive_intact(proj_folder, zip_path):
+                if has_archive:
+                    self.count("total_projects")
+                    score = catalog.get_score(proj_folder)
+                    if score is not None and score >= MIN_QUALITY_SCORE:
+                        self.count("best_projects")
+                    needs_index = self.config.enable_search_index and proj not in self.indexed
+                    needs_export = self.config.enable_corpus_export and proj not in self.exported
+                    needs_summary = self.reserve_summary(proj, proj_folder)
+                    if needs_index or needs_export or needs_summary:
+                        doc_files = collect_doc_files(proj, self.cancel, self.ignore)
+                        self.queue_index(proj, proj_folder, doc_files)
+                        if needs_summary:
+                            self.pipeline.put("summarize", (proj, doc_files, proj_folder))
+                events.emit("project_resumed", stage="archive", project=proj_folder)
+                return
+        
+        # Git fast path: same commit and untouched index since the last archive => skip everything
+        git_state = read_git_state(proj) if self.config.git_fast_path else None
+        stale_archive = self.force
+        if git_state is not None and not self.force:
+            previous_state = catalog.get_git_state(proj_folder)
+            if previous_state == git_state and self.archive_intact(proj_folder, zip_path):
+                self.count("unchanged_git")
+                self.count("total_projects")
+                catalog.mark_seen(proj_folder, scan_id)
+                score = catalog.get_score(proj_folder)
+                if score is not None and score >= MIN_QUALITY_SCORE:
+                    self.count("best_projects")
+                self.log(f"{proj_folder}: Git-Stand unverändert ({(git_state['commit'] or '-')[:8]}) – übersprungen")
+                events.emit("project_unchanged", stage="archive", project=proj_folder, commit=git_state["commit"])
+                self.project_done(proj)
+                # Only a still missing summary needs the documents again
+                if self.reserve_summary(proj, proj_folder):
+                    doc_files = collect_doc_files(proj, self.cancel, self.ignore)
+                    self.pipeline.put("summarize", (proj, doc_files, proj_folder))
+                return
+            # The repository moved on since its archive was written: rebuild the archive
+            stale_archive = previous_state is not None
+        
+        doc_files = collect_doc_files(proj, self.cancel, self.ignore)
+        if not doc_files:
+            events.emit("project_no_docs", stage="archive", project=proj)
+            self.project_done(proj)
+            return  # Nichts zu extrahieren
+        
+        # Evaluate documentation quality; the rows go to the catalog for rankings over all projects
+        columns = doc_columns(doc_files)
+        quality_score = evaluate_doc_quality(doc_files, proj, self.scoring_weights, columns)
+        self.pipeline.put("archive", (proj, proj_folder, doc_files, quality_score, git_state, stale_archive, columns))
+
+    # --- Stufe 3: Archivieren ---
+
+    def archive_project(self, item):
+        proj, proj_folder, doc_files, quality_score, git_state, stale_archive, columns = item
+        catalog, scan_id, events = self.catalog, self.scan_id, self.events
+        self.count("total_projects")
+        zip_path = os.path.join(self.config.output_dir, f"{proj_folder}_dokumentation.zip")
+        
+        # Check if ZIP already exists and skip if it does (unless the git state changed or it is damaged)
+        if self.segments is None and os.path.exists(zip_path) and not stale_archive and not zip_is_intact(zip_path):
+            self.log(f"{proj_folder}: ZIP unter {zip_path} ist beschädigt und wird neu erstellt")
+            stale_archive = True
+        if self.segments is not None:
+            self.archive_to_segments(proj, proj_folder, doc_files, quality_score, git_state, stale_archive, columns)
+        elif os.path.exists(zip_path) and not stale_archive:
+            self.log(f"{proj_folder}: ZIP existiert bereits unter {zip_path}")
+            events.emit("archive_exists", stage="archive", project=proj_folder)
             
-            # Still evaluate for best_docs classification if it's a high-quality project
-            doc_files = collect_doc_files(proj)
-            quality_score = evaluate_doc_quality(doc_files, proj)
+            # Still record the best_docs classification if it's a high-quality project
+            is_git = is_git_repository(proj)
+            category = ("git" if is_git else "local") if quality_score >= MIN_QUALITY_SCORE else None
+            catalog.record_project(proj_folder, proj, is_git, scan_id, quality_score,
+                                   zip_path, os.path.getsize(zip_path), category, git_state, columns)
             
             if quality_score >= MIN_QUALITY_SCORE:
-                best_projects += 1
+                self.count("best_projects")
                 
                 # Determine if it's a Git repository or local project
-                is_git = is_git_repository(proj)
-                target_dir = git_clones_dir if is_git else local_projects_dir
+                target_dir = self.git_clones_dir if is_git else self.local_projects_dir
                 target_zip = os.path.join(target_dir, f"{proj_folder}_dokumentation.zip")
                 
                 # Only copy if target doesn't exist
                 if not os.path.exists(target_zip):
                     try:
-                        shutil.copy2(zip_path, target_zip)
+                        copy_archive(zip_path, target_zip)
                         if is_git:
-                            git_projects += 1
-                            print(f"{proj_folder}: Git-Repository mit hoher Dokumentationsqualität (Score: {quality_score}) - Kopiert nach {GIT_CLONES_FOLDER}")
+                            self.count("git_projects")
+                            self.log(f"{proj_folder}: Git-Repository mit hoher Dokumentationsqualität (Score: {quality_score}) - Kopiert nach {GIT_CLONES_FOLDER}")
                         else:
-                            local_dev_projects += 1
-                            print(f"{proj_folder}: Lokales Projekt mit hoher Dokumentationsqualität (Score: {quality_score}) - Kopiert nach {LOCAL_PROJECTS_FOLDER}")
+                            self.count("local_dev_projects")
+                            self.log(f"{proj_folder}: Lokales Projekt mit hoher Dokumentationsqualität (Score: {quality_score}) - Kopiert nach {LOCAL_PROJECTS_FOLDER}")
                     except Exception as e:
-                        print(f"Error copying to categorized folder: {e}")
+                        self.log(f"Error copying to categorized folder: {e}")
                 else:
-                    skipped_existing += 1
-                    print(f"{proj_folder}: Bereits in {GIT_CLONES_FOLDER if is_git else LOCAL_PROJECTS_FOLDER} vorhanden")
-            
-            continue  # Skip to next project since ZIP already exists
-        
-        # Evaluate documentation quality
-        quality_score = evaluate_doc_quality(doc_files, proj)
-        
-        # Create ZIP file directly without intermediate folder extraction
-        with zipfile.ZipFile(zip_path, 'w') as zipf:
-            # Track already added files to prevent duplicates
-            added_files = set()
-            
-            for doc_path in doc_files:
-                # Calculate the relative path within the project
-                rel_path = os.path.relpath(doc_path, proj)
-                
-                # If it's a directory, add all its contents
-                if os.path.isdir(doc_path):
-                    for root, _, files in os.walk(doc_path):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            # Preserve the directory structure within the ZIP
-                            arcname = os.path.join(os.path.relpath(root, proj), file)
-                            
-                            # Skip if this path was already added to the ZIP
-                            if arcname in added_files:
-                                continue
-                            
-                            try:
-                                # Create ZipInfo object from file
-                                zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
-                                
-                                # Check and adjust timestamp if before 1980
-                                if zinfo.date_time[0] < 1980:
-                                    zinfo.date_time = (1980, 1, 1, 0, 0, 0)
-                                
-                                # Read file content
-                                with open(file_path, 'rb') as f_in:
-                                    file_data = f_in.read()
-                                
-                                # Add to zip with compression
-                                zipf.writestr(zinfo, file_data, compress_type=zipfile.ZIP_DEFLATED)
-                                # Mark as added
-                                added_files.add(arcname)
-                            except Exception as e:
-                                print(f"Error adding {file_path} to ZIP: {e}")
-                                continue
-                # If it's a file, add it directly
-                else:
-                    # Skip if this path was already added to the ZIP
-                    if rel_path in added_files:
-                        continue
-                        
-                    try:
-                        # Create ZipInfo object from file
-                        zinfo = zipfile.ZipInfo.from_file(doc_path, rel_path)
-                        
-                        # Check and adjust timestamp if before 1980
-                        if zinfo.date_time[0] < 1980:
-                            zinfo.date_time = (1980, 1, 1, 0, 0, 0)
-                        
-                        # Read file content
-                        with open(doc_path, 'rb') as f_in:
-                            file_data = f_in.read()
-                        
-                        # Add to zip with compression
-                        zipf.writestr(zinfo, file_data, compress_type=zipfile.ZIP_DEFLATED)
-                        # Mark as added
-                        added_files.add(rel_path)
-                    except Exception as e:
-                        print(f"Error adding {doc_path} to ZIP: {e}")
-                        continue
-        
-        # If this is a high-quality documented project, copy the ZIP to appropriate best_docs subfolder
-        if quality_score >= MIN_QUALITY_SCORE:
-            best_projects += 1
+                    self.count("skipped_existing")
+                    self.log(f"{proj_folder}: Bereits in {GIT_CLONES_FOLDER if is_git else LOCAL_PROJECTS_FOLDER} vorhanden")
+        else:
+            # Create ZIP file directly without intermediate folder extraction
+            zip_started = time.perf_counter()
+            write_project_zip(zip_path, doc_files, proj, self.cancel, self.events)
+            events.emit("archive_written", stage="archive", project=proj_folder,
+                        bytes=os.path.getsize(zip_path), seconds=time.perf_counter() - zip_started)
             
-            # Determine if it's a Git repository or local project
+            # Record the finished archive stage in the catalog
             is_git = is_git_repository(proj)
-            target_dir = git_clones_dir if is_git else local_projects_dir
-            target_zip = os.path.join(target_dir, f"{proj_folder}_dokumentation.zip")
+            category = ("git" if is_git else "local") if quality_score >= MIN_QUALITY_SCORE else None
+            catalog.record_project(proj_folder, proj, is_git, scan_id, quality_score,
+                                   zip_path, os.path.getsize(zip_path), category, git_state, columns)
             
-            try:
-                # Only copy if target doesn't exist or is different
-                if not os.path.exists(target_zip) or not is_identical_file(zip_path, target_zip):
-                    shutil.copy2(zip_path, target_zip)
-                    if is_git:
-                        git_projects += 1
-                        print(f"{proj_folder}: Git-Repository mit hoher Dokumentationsqualität (Score: {quality_score}) - Kopiert nach {GIT_CLONES_FOLDER}")
+            # If this is a high-quality documented project, copy the ZIP to appropriate best_docs subfolder
+            if quality_score >= MIN_QUALITY_SCORE:
+                self.count("best_projects")
+                
+                # Determine if it's a Git repository or local project
+                target_dir = self.git_clones_dir if is_git else self.local_projects_dir
+                target_zip = os.path.join(target_dir, f"{proj_folder}_dokumentation.zip")
+                
+                try:
+                    # Only copy if target doesn't exist or is different
+                    if not os.path.exists(target_zip) or not is_identical_file(zip_path, target_zip):
+                        copy_archive(zip_path, target_zip)
+                        if is_git:
+                            self.count("git_projects")
+                            self.log(f"{proj_folder}: Git-Repository mit hoher Dokumentationsqualität (Score: {quality_score}) - Kopiert nach {GIT_CLONES_FOLDER}")
+                        else:
+                            self.count("local_dev_projects")
+                            self.log(f"{proj_folder}: Lokales Projekt mit hoher Dokumentationsqualität (Score: {quality_score}) - Kopiert nach {LOCAL_PROJECTS_FOLDER}")
                     else:
-                        local_dev_projects += 1
-                        print(f"{proj_folder}: Lokales Projekt mit hoher Dokumentationsqualität (Score: {quality_score}) - Kopiert nach {LOCAL_PROJECTS_FOLDER}")
-                else:
-                    skipped_existing += 1
-                    print(f"{proj_folder}: Bereits in {GIT_CLONES_FOLDER if is_git else LOCAL_PROJECTS_FOLDER} vorhanden")
-            except Exception as e:
-                print(f"Error copying to categorized folder: {e}")
+                        self.count("skipped_existing")
+                        self.log(f"{proj_folder}: Bereits in {GIT_CLONES_FOLDER if is_git else LOCAL_PROJECTS_FOLDER} vorhanden")
+                except Exception as e:
+                    self.log(f"Error copying to categorized folder: {e}")
+            else:
+                self.log(f"{proj_folder}: ZIP erstellt unter {zip_path} (Score: {quality_score})")
+        
+        self.project_done(proj)
+        self.queue_index(proj, proj_folder, doc_files)
+        if self.reserve_summary(proj, proj_folder, doc_files):
+            self.pipeline.put("summarize", (proj, doc_files, proj_folder))
+
+    def archive_to_segments(self, proj, proj_folder, doc_files, quality_score, git_state, stale_archive, columns):
+        """Segment mode: append the project to the segment archive; best_docs only lists it (no copies)."""
+        events = self.events
+        info = self.segments.project_info(proj_folder)
+        written = info is None or stale_archive
+        if written:
+            started = time.perf_counter()
+            info = self.segments.store_project(proj_folder, proj, archive_members(doc_files, proj), self.cancel)
+            events.emit("archive_written", stage="archive", project=proj_folder,
+                        bytes=info["length"], seconds=time.perf_counter() - started)
         else:
-            print(f"{proj_folder}: ZIP erstellt unter {zip_path} (Score: {quality_score})")
+            self.log(f"{proj_folder}: Bereits im Segmentarchiv (Segment {info['segment']})")
+            events.emit("archive_exists", stage="archive", project=proj_folder)
         
-    # Collect projects that need summarization
-    projects_to_summarize = []
-    for proj in projects:
-        if ENABLE_SUMMARIZATION and proj not in summarized_projects:
-            doc_files = collect_doc_files(proj)
-            if doc_files:
-                proj_folder = unique_project_name(proj)
-                summary_filename = f"{proj_folder}_zusammenfassung.md"
-                summary_path = os.path.join(summaries_dir, summary_filename)
-                
-                # Skip if summary already exists
-                if not os.path.exists(summary_path):
-                    projects_to_summarize.append((proj, doc_files, proj_folder))
-    
-    # Shuffle the list to get a random selection each time
-    import random
-    random.shuffle(projects_to_summarize)
-    
-    # Limit to MAX_SUMMARIES_PER_RUN
-    projects_to_summarize = projects_to_summarize[:MAX_SUMMARIES_PER_RUN]
-    
-    # Process summaries
-    summaries_created = 0
-    for proj, doc_files, proj_folder in projects_to_summarize:
-        if summaries_created >= MAX_SUMMARIES_PER_RUN:
-            break
-            
-        print(f"{proj_folder}: Erstelle KI-Zusammenfassung...")
+        is_git = is_git_repository(proj)
+        category = ("git" if is_git else "local") if quality_score >= MIN_QUALITY_SCORE else None
+        self.catalog.record_project(proj_folder, proj, is_git, self.scan_id, quality_score,
+                                    self.segments.directory, info["length"], category, git_state, columns)
+        if category is None:
+            if written:
+                self.log(f"{proj_folder}: Im Segmentarchiv gespeichert (Segment {info['segment']}, Score: {quality_score})")
+            return
+        self.count("best_projects")
+        if not written:
+            self.count("skipped_existing")
+        elif is_git:
+            self.count("git_projects")
+            self.log(f"{proj_folder}: Git-Repository mit hoher Dokumentationsqualität (Score: {quality_score}) - Im Segmentarchiv gespeichert")
+        else:
+            self.count("local_dev_projects")
+            self.log(f"{proj_folder}: Lokales Projekt mit hoher Dokumentationsqualität (Score: {quality_score}) - Im Segmentarchiv gespeichert")
+
+    # --- Stufe 4: Suchindex (only new or changed files are extracted) ---
+
+    def index_project(self, item):
+        proj, proj_folder, doc_files = item
+        try:
+            changed_files = self.search_index.index_project(proj_folder, proj, doc_files)
+            self.count("indexed_files", changed_files)
+        except Exception as e:
+            changed_files = 0
+            self.log(f"{proj_folder}: Fehler beim Aktualisieren des Suchindex: {e}")
+        self.events.emit("project_indexed", stage="index", project=proj_folder, files=changed_files)
+        self.catalog.journal_done(self.scan_id, "index", proj)
+
+    # --- Stufe 5: Korpus-Export (only new or changed files are extracted and appended) ---
+
+    def export_project(self, item):
+        proj, proj_folder, doc_files = item
+        written = removed = 0
+        try:
+            project_id = self.catalog.project_id(proj_folder) or 0
+            written, removed = self.corpus.export_project(proj_folder, project_id, proj, doc_files, self.cancel)
+            self.count("exported_files", written)
+        except AnalysisCancelled:
+            raise
+        except Exception as e:
+            self.log(f"{proj_folder}: Fehler beim Korpus-Export: {e}")
+        self.events.emit("project_exported", stage="export", project=proj_folder, files=written, removed=removed)
+        self.catalog.journal_done(self.scan_id, "export", proj)
+
+    # --- Stufe 6: KI-Zusammenfassung ---
+
+    def summarize_project(self, item):
+        proj, doc_files, proj_folder = item
+        events = self.events
+        cancel = self.cancel
+        use_openai = self.config.use_openai
+        self.log(f"{proj_folder}: Erstelle KI-Zusammenfassung...")
         summary_filename = f"{proj_folder}_zusammenfassung.md"
-        summary_path = os.path.join(summaries_dir, summary_filename)
+        summary_path = os.path.join(self.summaries_dir, summary_filename)
         
+        # Sections and digests of the last summary: only changed sections go to the LLM again
+        summary_inputs = summary_input_files(doc_files)
+        fingerprint = docs_fingerprint(summary_inputs)
+        previous = self.catalog.summary_state(proj_folder)
+        summary_stats = {}
         try:
             # Generate summary using either OpenAI or local LLM
             try:
-                if USE_OPENAI:
-                    summary_text = summarize_with_openai(doc_files)
-                else:
-                    summary_text = summarize_project_local(doc_files)
+                summary_text, sections = summarize_documentation(
+                    summary_inputs, previous, base=proj, cancel=cancel, stats=summary_stats,
+                    url=self.config.local_llm_url, use_openai=use_openai, limiter=self.llm_limiter(use_openai))
                 
                 # Prüfe auf Fehler in der Zusammenfassung
                 if summary_text.strip().startswith("Fehler bei der Zusammenfassung"):
-                    print(f"{proj_folder}: Fehler bei der Zusammenfassung – Datei wird nicht gespeichert. {summary_text}")
+                    self.log(f"{proj_folder}: Fehler bei der Zusammenfassung – Datei wird nicht gespeichert. {summary_text}")
                     # Versuche es mit der anderen Methode, falls die erste fehlschlägt
-                    if not USE_OPENAI and "localhost" in summary_text and ("connection" in summary_text.lower() or "verbindung" in summary_text.lower()):
-                        print(f"{proj_folder}: Versuche es mit OpenAI API als Fallback...")
-                        fallback_summary = summarize_with_openai(doc_files)
+                    if not use_openai and "localhost" in summary_text and ("connection" in summary_text.lower() or "verbindung" in summary_text.lower()):
+                        self.log(f"{proj_folder}: Versuche es mit OpenAI API als Fallback...")
+                        summary_stats = {}
+                        fallback_summary, sections = summarize_documentation(
+                            summary_inputs, previous, base=proj, cancel=cancel, stats=summary_stats,
+                            use_openai=True, limiter=self.llm_limiter(True))
                         if not fallback_summary.strip().startswith("Fehler"):
                             summary_text = fallback_summary
+                            use_openai = True
                         else:
-                            print(f"{proj_folder}: Auch OpenAI API fehlgeschlagen: {fallback_summary}")
-                            continue  # Nicht als zusammengefasst markieren, keine Datei schreiben
+                            self.log(f"{proj_folder}: Auch OpenAI API fehlgeschlagen: {fallback_summary}")
+                            events.emit("summary_failed", stage="summarize", project=proj_folder, error=fallback_summary)
+                            return  # Nicht als zusammengefasst markieren, keine Datei schreiben
                     else:
-                        continue  # Nicht als zusammengefasst markieren, keine Datei schreiben
+                        events.emit("summary_failed", stage="summarize", project=proj_folder, error=summary_text)
+                        return  # Nicht als zusammengefasst markieren, keine Datei schreiben
             except Exception as e:
-                print(f"{proj_folder}: Ausnahmefehler bei der Zusammenfassung: {str(e)}")
-                continue  # Nicht als zusammengefasst markieren, keine Datei schreiben
-
-            # Save summary to file
-            with open(summary_path, "w", encoding="utf-8") as f:
-                f.write(f"# KI-Zusammenfassung: {os.path.basename(proj)}\n\n")
-                f.write(f"Erstellt am: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                f.write(summary_text)
+                self.log(f"{proj_folder}: Ausnahmefehler bei der Zusammenfassung: {str(e)}")
+                events.emit("summary_failed", stage="summarize", project=proj_folder, error=str(e))
+                return  # Nicht als zusammengefasst markieren, keine Datei schreiben
+
+            mode = summary_stats.get("summary_mode")
+            unchanged = mode == "unverändert" and os.path.exists(summary_path)
+            if unchanged:
+                self.log(f"{proj_folder}: Dokumentation unverändert – bestehende Zusammenfassung bleibt erhalten")
+            else:
+                # Save summary to file
+                with atomic_write(summary_path) as f:
+                    f.write(f"# KI-Zusammenfassung: {os.path.basename(proj)}\n\n")
+                    f.write(f"Erstellt am: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+                    f.write(summary_text)
+                
+                detail = ""
+                if mode in ("abschnittsweise", "zusammengeführt"):
+                    detail = (f" ({mode}, {summary_stats['sections_summarized']} von {summary_stats['sections']} "
+                              f"Abschnitten neu zusammengefasst)")
+                self.log(f"{proj_folder}: Zusammenfassung gespeichert unter {summary_path}{detail}")
+                self.count("summaries_created")
+            events.emit("summary_done", stage="summarize", project=proj_folder,
+                        tokens=summary_stats.get("prompt_tokens", 0) + summary_stats.get("completion_tokens", 0),
+                        prompt_tokens=summary_stats.get("prompt_tokens"),
+                        completion_tokens=summary_stats.get("completion_tokens"),
+                        tokens_estimated=summary_stats.get("tokens_estimated"),
+                        latency=summary_stats.get("latency"),
+                        mode=mode, sections=summary_stats.get("sections"),
+                        sections_summarized=summary_stats.get("sections_summarized"))
             
-            print(f"{proj_folder}: Zusammenfassung gespeichert unter {summary_path}")
-            summaries_created += 1
+            self.record_llm_usage(use_openai, summary_stats)
             
             # Mark this project as summarized
-            save_summarized_project(proj)
-            summarized_projects.add(proj)
+            if sections is not None:
+                self.catalog.record_summary_state(proj_folder, summary_text, sections, fingerprint)
+            self.catalog.record_summary(proj_folder, summary_path, "openai" if use_openai else "local", path=proj)
+            self.summarized_projects.add(proj)
+            if unchanged:
+                return
             
             # Also save a copy in the project directory if it's a high-quality project
-            quality_score = evaluate_doc_quality(doc_files, proj)
+            quality_score = self.catalog.get_score(proj_folder)
+            if quality_score is None:
+                quality_score = evaluate_doc_quality(doc_files, proj, self.scoring_weights)
             if quality_score >= MIN_QUALITY_SCORE:
-                proj_summary_path = os.path.join(proj, "AI_Zusammenfassung.md")
+                proj_summary_path = os.path.join(proj, PROJECT_SUMMARY_FILE)
                 try:
-                    with open(proj_summary_path, "w", encoding="utf-8") as f:
+                    with atomic_write(proj_summary_path) as f:
                         f.write(f"# KI-Zusammenfassung: {os.path.basename(proj)}\n\n")
                         f.write(f"Erstellt am: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
                         f.write(summary_text)
-                    print(f"{proj_folder}: Zusammenfassung auch im Projektordner gespeichert unter {proj_summary_path}")
+                    self.log(f"{proj_folder}: Zusammenfassung auch im Projektordner gespeichert unter {proj_summary_path}")
                 except Exception as e:
-                    print(f"Fehler beim Speichern der Zusammenfassung im Projektordner {proj}: {e}")
+                    self.log(f"Fehler beim Speichern der Zusammenfassung im Projektordner {proj}: {e}")
         except Exception as e:
-            print(f"Fehler bei der Zusammenfassung für {proj_folder}: {e}")
+            self.log(f"Fehler bei der Zusammenfassung für {proj_folder}: {e}")
+        finally:
+            # Current limit and throughput of the backend(s) for the UI and the events file
+            for snapshot in limiter_snapshots():
+                if snapshot["backend"] in self.llm_backends:
+                    events.emit("llm_concurrency", **snapshot)
+
+def run_stages(config, catalog, scan_id, summarized_projects, cancel, events, work_queue=None):
+    run = AnalysisRun(config, catalog, scan_id, summarized_projects, cancel, events, work_queue)
+    stats = run.run()
+    # Throughput of this run calibrates the estimates of later dry runs (--plan)
+    catalog.record_calibration(scan_id, calibration_figures(METRICS.to_dict(), run.llm_usage, limiter_snapshots()))
+    summaries_created = stats["summaries_created"]
+    catalog.finish_scan(scan_id, stats["total_projects"], stats["best_projects"], summaries_created)
+    
+    if work_queue is not None:
+        # Statistics and index files are produced once, by the last worker of the run
+        work_queue.finish_worker(stats)
+        events.log(f"\nWorker {work_queue.worker}: {stats['discovered']} Projekte bearbeitet, "
+                   f"{summaries_created} KI-Zusammenfassungen erstellt")
+        if work_queue.claim_merge():
+            merge_shard_run(config, catalog, work_queue, events)
+        else:
+            events.log("Andere Worker arbeiten noch – die Zusammenführung übernimmt der zuletzt fertige Worker.")
+        return
     
     # If we didn't create enough summaries, print a message
-    if summaries_created < MIN_SUMMARIES_PER_RUN and len(projects_to_summarize) < MIN_SUMMARIES_PER_RUN:
-        print(f"Hinweis: Es wurden nur {summaries_created} Zusammenfassungen erstellt, weniger als das Minimum von {MIN_SUMMARIES_PER_RUN}.")
-        print(f"Möglicherweise wurden bereits die meisten Projekte zusammengefasst.")
+    if summaries_created < config.min_summaries and stats["summaries_queued"] < config.min_summaries:
+        events.log(f"Hinweis: Es wurden nur {summaries_created} Zusammenfassungen erstellt, weniger als das Minimum von {config.min_summaries}.")
+        events.log(f"Möglicherweise wurden bereits die meisten Projekte zusammengefasst.")
         
         # Check how many projects have been summarized
-        total_summaries = len([f for f in os.listdir(summaries_dir) if f.endswith('_zusammenfassung.md')]) if os.path.exists(summaries_dir) else 0
-        print(f"Insgesamt wurden bisher {total_summaries} Projekte zusammengefasst.")
+        total_summaries = catalog.count_summaries()
+        events.log(f"Insgesamt wurden bisher {total_summaries} Projekte zusammengefasst.")
         
         # If we've summarized all projects, reset the batch file to start over
-        if total_summaries >= len(projects):
-            print("Alle Projekte wurden bereits zusammengefasst. Setze Batch-Datei zurück für den nächsten Lauf.")
-            batch_file = os.path.join(ZIELORDNER, SUMMARY_BATCH_FILE)
-            if os.path.exists(batch_file):
-                os.remove(batch_file)
+        if total_summaries >= stats["discovered"]:
+            events.log("Alle Projekte wurden bereits zusammengefasst. Setze Batch zurück für den nächsten Lauf.")
+            catalog.reset_summary_batch()
     
-    # Create index files for each category
-    main_index_path = os.path.join(best_docs_dir, "_index.txt")
-    git_index_path = os.path.join(git_clones_dir, "_index.txt")
-    local_index_path = os.path.join(local_projects_dir, "_index.txt")
+    report_run(config, catalog, stats, events)
+
+# Einzelne Projekte neu verarbeiten (Überwachungsmodus): sammeln, bewerten, archivieren,
+# indexieren und zusammenfassen, auch wenn ihr Git-Stand unverändert ist
+def sync_projects(config, catalog, projects, cancel=None, events=None):
+    projects = sorted(projects)
+    # The scan records the projects as its start paths, so a full run never resumes it
+    scan_id = catalog.start_scan(projects)
+    if events is None:
+        events = ProgressBus()
+        events.subscribe(ConsoleLog())
+    run = AnalysisRun(config, catalog, scan_id, catalog.summarized_projects(), cancel, events,
+                      projects=projects, force=True)
+    try:
+        stats = run.run()
+    except AnalysisCancelled:
+        events.end_open_stages(cancelled=True)
+        catalog.finish_scan(scan_id, 0, 0, 0)
+        raise
+    catalog.finish_scan(scan_id, stats["total_projects"], stats["best_projects"], stats["summaries_created"])
+    write_index_files(catalog, config.best_docs_dir, config.git_clones_dir, config.local_projects_dir,
+                      len(catalog.best_projects("git")), len(catalog.best_projects("local")))
+    return stats
+
+# Verteilten Lauf zusammenführen: Statistik aller Worker und Index-Dateien
+def merge_shard_run(config, catalog, work_queue, events):
+    worker_stats = work_queue.worker_stats()
+    totals = {}
+    for stats in worker_stats:
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+    failed = work_queue.counts().get("failed", 0)
+    events.log(f"\nVerteilter Lauf #{work_queue.run_id} abgeschlossen: {len(worker_stats)} Worker, "
+               f"{failed} fehlgeschlagene Projekte")
+    report_run(config, catalog, totals, events)
+
+# Abschlussbericht ausgeben und Index-Dateien schreiben
+def report_run(config, catalog, stats, events):
+    best_docs_dir, git_clones_dir, local_projects_dir = config.best_docs_dir, config.git_clones_dir, config.local_projects_dir
+    total_projects = stats.get("total_projects", 0)
+    best_projects = stats.get("best_projects", 0)
+    git_projects = stats.get("git_projects", 0)
+    local_dev_projects = stats.get("local_dev_projects", 0)
+    skipped_existing = stats.get("skipped_existing", 0)
+    unchanged_git = stats.get("unchanged_git", 0)
+    new_summaries = stats.get("summaries_created", 0)
     
     # Count the number of AI summaries created
-    summary_count = len([f for f in os.listdir(summaries_dir) if f.endswith('_zusammenfassung.md')]) if os.path.exists(summaries_dir) else 0
+    summary_count = catalog.count_summaries()
     
-    # Count the number of summaries created in this run
-    new_summaries = summaries_created if 'summaries_created' in locals() else 0
+    events.log(f"\n===== Zusammenfassung =====")
+    events.log(f"Gesamt Projekte mit Dokumentation: {total_projects}")
+    events.log(f"Projekte mit hochwertiger Dokumentation: {best_projects} ({int(best_projects/total_projects*100) if total_projects > 0 else 0}%)")
+    events.log(f"  - Git-Repositories: {git_projects}")
+    events.log(f"  - Lokale Projekte: {local_dev_projects}")
+    events.log(f"  - Übersprungene (bereits existierende): {skipped_existing}")
+    events.log(f"  - Übersprungene (Git-Stand unverändert): {unchanged_git}")
+    if config.enable_summarization:
+        events.log(f"KI-Zusammenfassungen insgesamt: {summary_count}")
+        events.log(f"KI-Zusammenfassungen in diesem Lauf: {new_summaries}")
+        events.log(f"Batch-Einstellungen: Min={config.min_summaries}, Max={config.max_summaries}")
+    events.log(f"Hochwertige Dokumentation verfügbar unter:")
+    events.log(f"  - Alle: {best_docs_dir}")
+    events.log(f"  - Git-Repositories: {git_clones_dir}")
+    events.log(f"  - Lokale Projekte: {local_projects_dir}")
+    if config.enable_summarization:
+        events.log(f"  - KI-Zusammenfassungen: {config.summaries_dir}")
+    if config.enable_search_index:
+        events.log(f"  - Suchindex: {os.path.join(config.output_dir, SEARCH_INDEX_FILE)}")
+    if config.segment_archives:
+        events.log(f"  - Segmentarchiv: {os.path.join(config.output_dir, SEGMENT_FOLDER)} (python segments.py extract PROJEKT)")
+    if config.enable_corpus_export:
+        events.log(f"  - Korpus: {os.path.join(config.output_dir, CORPUS_POINTER_FILE)} (python corpus.py info)")
+    llm_backends = [snapshot for snapshot in limiter_snapshots() if snapshot["requests"]]
+    if llm_backends:
+        events.log(f"LLM-Parallelität (adaptiv):")
+        for snapshot in llm_backends:
+            events.log(f"  - {format_snapshot(snapshot)}")
+    events.log(f"==============================")
     
-    print(f"\n===== Zusammenfassung =====")
-    print(f"Gesamt Projekte mit Dokumentation: {total_projects}")
-    print(f"Projekte mit hochwertiger Dokumentation: {best_projects} ({int(best_projects/total_projects*100) if total_projects > 0 else 0}%)")
-    print(f"  - Git-Repositories: {git_projects}")
-    print(f"  - Lokale Projekte: {local_dev_projects}")
-    print(f"  - Übersprungene (bereits existierende): {skipped_existing}")
-    if ENABLE_SUMMARIZATION:
-        print(f"KI-Zusammenfassungen insgesamt: {summary_count}")
-        print(f"KI-Zusammenfassungen in diesem Lauf: {new_summaries}")
-        print(f"Batch-Einstellungen: Min={MIN_SUMMARIES_PER_RUN}, Max={MAX_SUMMARIES_PER_RUN}")
-    print(f"Hochwertige Dokumentation verfügbar unter:")
-    print(f"  - Alle: {best_docs_dir}")
-    print(f"  - Git-Repositories: {git_clones_dir}")
-    print(f"  - Lokale Projekte: {local_projects_dir}")
-    if ENABLE_SUMMARIZATION:
-        print(f"  - KI-Zusammenfassungen: {summaries_dir}")
-    print(f"==============================")
+    # Create index files for each category as views on the catalog
+    main_index_path, git_index_path, local_index_path = write_index_files(
+        catalog, best_docs_dir, git_clones_dir, local_projects_dir, git_projects, local_dev_projects)
     
-    # Create main index file
-    with open(main_index_path, 'w', encoding='utf-8') as index_file:
-        index_file.write(f"Hochwertige Projektdokumentation\n")
-        index_file.write(f"Erstellt am: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        index_file.write(f"Git-Repositories: {git_projects}\n")
-        index_file.write(f"Lokale Projekte: {local_dev_projects}\n\n")
-        
-        # List Git repositories
-        index_file.write(f"=== Git-Repositories ===\n")
-        git_zips = [f for f in os.listdir(git_clones_dir) if f.endswith('_dokumentation.zip')]
-        for zip_name in sorted(git_zips):
-            proj_name = zip_name.replace('_dokumentation.zip', '')
-            index_file.write(f"- {proj_name}\n")
-        
-        # List local projects
-        index_file.write(f"\n=== Lokale Projekte ===\n")
-        local_zips = [f for f in os.listdir(local_projects_dir) if f.endswith('_dokumentation.zip')]
-        for zip_name in sorted(local_zips):
-            proj_name = zip_name.replace('_dokumentation.zip', '')
-            index_file.write(f"- {proj_name}\n")
-    
-    # Create Git repositories index
-    with open(git_index_path, 'w', encoding='utf-8') as index_file:
-        index_file.write(f"Git-Repository Dokumentation\n")
-        index_file.write(f"Erstellt am: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        
-        git_zips = [f for f in os.listdir(git_clones_dir) if f.endswith('_dokumentation.zip')]
-        for zip_name in sorted(git_zips):
-            proj_name = zip_name.replace('_dokumentation.zip', '')
-            index_file.write(f"- {proj_name}\n")
-    
-    # Create local projects index
-    with open(local_index_path, 'w', encoding='utf-8') as index_file:
-        index_file.write(f"Lokale Projekt-Dokumentation\n")
-        index_file.write(f"Erstellt am: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        
-        local_zips = [f for f in os.listdir(local_projects_dir) if f.endswith('_dokumentation.zip')]
-        for zip_name in sorted(local_zips):
-            proj_name = zip_name.replace('_dokumentation.zip', '')
-            index_file.write(f"- {proj_name}\n")
-    
-    print(f"Index-Dateien erstellt:")
-    print(f"  - Hauptindex: {main_index_path}")
-    print(f"  - Git-Repositories: {git_index_path}")
-    print(f"  - Lokale Projekte: {local_index_path}")
+    events.log(f"Index-Dateien erstellt:")
+    events.log(f"  - Hauptindex: {main_index_path}")
+    events.log(f"  - Git-Repositories: {git_index_path}")
+    events.log(f"  - Lokale Projekte: {local_index_path}")
+
+
+# Kommandozeile: python -m extract_documentation_deep --roots ... --workers ... --budget ...
+def cli(argv=None):
+    try:
+        config = config_from_args(default_config(), argv)
+    except (ValueError, OSError) as e:
+        print(f"Konfigurationsfehler: {e}")
+        return 2
+    try:
+        if config.dry_run:
+            print_plan(plan_run(config), config)
+        elif config.watch:
+            from watch import DocWatcher
+            DocWatcher(config).run()
+        else:
+            main(config=config)
+    except (AnalysisCancelled, KeyboardInterrupt):
+        return 130
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(cli())
@@ -0,0 +1,107 @@
+import os
+
+# Git-Stand eines Repositories direkt aus .git lesen (HEAD, Refs, Index), ohne git aufzurufen.
+# Dient als billiges Änderungssignal: gleicher Commit und unveränderter Index => nichts zu tun.
+
+MAX_SYMREF_DEPTH = 5
+
+
+def find_git_dir(path):
+    """Return the git directory of a working tree, or None.
+
+    Handles ".git" directories as well as ".git" files ("gitdir: ...") used by
+    worktrees and submodules.
+    """
+    dot_git = os.path.join(path, ".git")
+    if os.path.isdir(dot_git):
+        return dot_git
+    if os.path.isfile(dot_git):
+        try:
+            with open(dot_git, "r", encoding="utf-8") as f:
+                line = f.readline().strip()
+        except OSError:
+            return None
+        if line.startswith("gitdir:"):
+            git_dir = os.path.join(path, line[len("gitdir:"):].strip())
+            if os.path.isdir(git_dir):
+                return os.path.normpath(git_dir)
+    return None
+
+
+def _read_first_line(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.readline().strip()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _common_dir(git_dir):
+    """Shared git directory (differs from git_dir for linked worktrees)."""
+    common = _read_first_line(os.path.join(git_dir, "commondir"))
+    if common:
+        return os.path.normpath(os.path.join(git_dir, common))
+    return git_dir
+
+
+def _packed_ref(common_dir, ref):
+    try:
+        with open(os.path.join(common_dir, "packed-refs"), "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith(("#", "^")):
+                    continue
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0]
+    except (OSError, UnicodeDecodeError):
+        pass
+    return None
+
+
+def resolve_ref(git_dir, ref):
+    """Resolve a ref name (e.g. "refs/heads/main") to a commit id, or None if unborn."""
+    common_dir = _common_dir(git_dir)
+    for _ in range(MAX_SYMREF_DEPTH):
+        value = None
+        for base in (git_dir, common_dir):
+            value = _read_first_line(os.path.join(base, ref))
+            if value:
+                break
+        if not value:
+            return _packed_ref(common_dir, ref)
+        if not value.startswith("ref:"):
+            return value
+        ref = value[len("ref:"):].strip()
+    return None
+
+
+def read_git_state(path):
+    """Read the repository state of a working tree.
+
+    Returns a dict with head (symbolic ref or None when detached), commit,
+    index_mtime_ns and index_size, or None if path is not a git repository.
+    """
+    git_dir = find_git_dir(path)
+    if git_dir is None:
+        return None
+    head = _read_first_line(os.path.join(git_dir, "HEAD"))
+    if not head:
+        return None
+    if head.startswith("ref:"):
+        ref = head[len("ref:"):].strip()
+        commit = resolve_ref(git_dir, ref)
+    else:
+        ref, commit = None, head
+
+    try:
+        st = os.stat(os.path.join(git_dir, "index"))
+        index_mtime_ns, index_size = st.st_mtime_ns, st.st_size
+    except OSError:
+        index_mtime_ns, index_size = None, None
+
+    return {
+        "head": ref,
+        "commit": commit,
+        "index_mtime_ns": index_mtime_ns,
+        "index_size": index_size,
+    }
@@ -0,0 +1,181 @@
+import os
+import re
+
+# .gitignore-/.ignore-Regeln als vorkompilierte Matcher, pro Verzeichnis gecacht.
+# Unterstützt: Kommentare, "!"-Negation, "/"-Verankerung, Ordner-Muster ("name/"),
+# "*", "?", "[...]" und "**".
+
+IGNORE_FILE_NAMES = (".gitignore", ".ignore")
+
+_FLAGS = re.IGNORECASE if os.name == "nt" else 0
+
+
+def _translate(pattern):
+    """Translate one gitignore glob (without "!" and trailing "/") into a regex."""
+    anchored = "/" in pattern.rstrip("/")
+    pattern = pattern.lstrip("/")
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == n:
+            out.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        else:
+            c = pattern[i]
+            i += 1
+            if c == "*":
+                out.append("[^/]*")
+            elif c == "?":
+                out.append("[^/]")
+            elif c == "\\" and i < n:
+                out.append(re.escape(pattern[i]))
+                i += 1
+            elif c == "[":
+                end = pattern.find("]", i + 1 if i < n and pattern[i] in "!^" else i)
+                if end == -1:
+                    out.append(re.escape(c))
+                else:
+                    body = pattern[i:end]
+                    if body[:1] in ("!", "^"):
+                        body = "^" + body[1:]
+                    out.append("[" + body.replace("\\", "\\\\") + "]")
+                    i = end + 1
+            else:
+                out.append(re.escape(c))
+    return ("" if anchored else "(?:.*/)?") + "".join(out)
+
+
+class RuleSet:
+    """Compiled rules of one ignore file (or of a user-supplied pattern list)."""
+
+    def __init__(self, lines):
+        rules = []
+        for line in lines:
+            line = line.rstrip("\n\r")
+            if not line.strip() or line.startswith("#"):
+                continue
+            if not line.endswith("\\ "):
+                line = line.rstrip()
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            elif line.startswith("\\!") or line.startswith("\\#"):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            rules.append((re.compile(_translate(line), _FLAGS), negate, dir_only))
+        self.rules = rules
+        self.has_negation = any(negate for _, negate, _ in rules)
+
+        # Without negations the rules collapse into two alternations (files / dirs)
+        if rules and not self.has_negation:
+            any_rules = [r.pattern for r, _, dir_only in rules if not dir_only]
+            all_rules = [r.pattern for r, _, _ in rules]
+            self.file_regex = re.compile("|".join(f"(?:{p})" for p in any_rules), _FLAGS) if any_rules else None
+            self.dir_regex = re.compile("|".join(f"(?:{p})" for p in all_rules), _FLAGS)
+
+    @classmethod
+    def from_file(cls, path):
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                return cls(f.readlines())
+        except OSError:
+            return None
+
+    def match(self, rel_path, is_dir):
+        """True (ignored), False (re-included by "!") or None (no rule matched)."""
+        if not self.rules:
+            return None
+        if not self.has_negation:
+            regex = self.dir_regex if is_dir else self.file_regex
+            return True if regex is not None and regex.fullmatch(rel_path) else None
+        for regex, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.fullmatch(rel_path):
+                return not negate
+        return None
+
+
+class DirMatcher:
+    """Ignore rules in effect for the entries of one directory."""
+
+    def __init__(self, chain):
+        # chain: list of (RuleSet, prefix) from outermost to innermost directory;
+        # prefix is this directory relative to the rule file's directory ("" or "a/b/")
+        self.chain = chain
+
+    def is_ignored(self, name, is_dir):
+        for rule_set, prefix in reversed(self.chain):
+            result = rule_set.match(prefix + name, is_dir)
+            if result is not None:
+                return result
+        return False
+
+
+class IgnoreEngine:
+    """Builds and caches DirMatchers for a run.
+
+    exclude_patterns are gitignore-style patterns that apply below every walk root.
+    """
+
+    def __init__(self, exclude_patterns=(), ignore_file_names=IGNORE_FILE_NAMES):
+        self.ignore_file_names = tuple(ignore_file_names)
+        self.global_rules = RuleSet(exclude_patterns)
+        self._cache = {}
+        self._rules_cache = {}
+
+    def _own_rules(self, dirpath, filenames):
+        """Parsed ignore files of one directory (each file is read once per run)."""
+        rule_sets = self._rules_cache.get(dirpath)
+        if rule_sets is None:
+            rule_sets = []
+            for name in self.ignore_file_names:
+                if filenames is None or name in filenames:
+                    rule_set = RuleSet.from_file(os.path.join(dirpath, name))
+                    if rule_set is not None and rule_set.rules:
+                        rule_sets.append(rule_set)
+            self._rules_cache[dirpath] = rule_sets
+        return rule_sets
+
+    def root_matcher(self, dirpath, filenames=None):
+        """Matcher for a walk root (start path or project root)."""
+        key = (dirpath, dirpath)
+        matcher = self._cache.get(key)
+        if matcher is None:
+            chain = [(self.global_rules, "")] if self.global_rules.rules else []
+            chain += [(rule_set, "") for rule_set in self._own_rules(dirpath, filenames)]
+            matcher = self._cache[key] = DirMatcher(chain)
+        return matcher
+
+    def child_matcher(self, root, parent, name, filenames=None):
+        """Matcher for subdirectory ``name`` of ``parent`` (walk started at ``root``).
+
+        ``filenames`` (the directory's file list from os.walk) avoids probing for
+        ignore files that do not exist.
+        """
+        dirpath = os.path.join(parent, name)
+        key = (root, dirpath)
+        matcher = self._cache.get(key)
+        if matcher is None:
+            parent_matcher = self._cache.get((root, parent)) or self.root_matcher(parent)
+            chain = [(rule_set, prefix + name + "/") for rule_set, prefix in parent_matcher.chain]
+            chain += [(rule_set, "") for rule_set in self._own_rules(dirpath, filenames)]
+            matcher = self._cache[key] = DirMatcher(chain)
+        return matcher
+
+    def matcher_for(self, root, dirpath, filenames=None):
+        """Matcher for dirpath during a top-down walk that started at root."""
+        if dirpath == root:
+            return self.root_matcher(root, filenames)
+        parent, name = os.path.split(dirpath)
+        return self.child_matcher(root, parent, name, filenames)
@@ -0,0 +1,83 @@
+import os
+import sys
+import json
+import argparse
+import datetime
+import subprocess
+
+# Misst die Kaltstart-Importzeit von GUI und CLI (Auswertung von "python -X importtime")
+
+DEFAULT_MODULES = ["ui", "extract_documentation_deep"]
+
+# Module, die erst bei Bedarf geladen werden sollen
+LAZY_MODULES = ["docx", "PyPDF2", "requests", "dotenv", "lxml"]
+
+
+def measure_import(module, runs=3):
+    """Import a module in fresh interpreters and return the fastest run.
+
+    Returns a dict with total_us (cumulative import time of the module), modules
+    (name -> (self_us, cumulative_us)) and eager (LAZY_MODULES that got imported).
+    """
+    best = None
+    here = os.path.dirname(os.path.abspath(__file__))
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=here, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"Import von {module} fehlgeschlagen:\n{proc.stderr}")
+
+        # Output is in completion order: a top-level line (no indentation) closes the
+        # subtree of the lines before it. Only the subtree of the measured module counts,
+        # interpreter startup (site, .pth files) is excluded.
+        modules = {}
+        group = {}
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            group[name.strip()] = (int(self_us), int(cumulative_us))
+            if not name[1:].startswith(" "):
+                if name.strip() == module:
+                    modules = group
+                group = {}
+
+        total_us = modules.get(module, (0, 0))[1]
+        if best is None or total_us < best["total_us"]:
+            best = {"module": module, "total_us": total_us, "modules": modules}
+
+    best["eager"] = sorted(m for m in LAZY_MODULES if m in best["modules"])
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importzeit-Bericht für GUI und CLI")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="Zu messende Module")
+    parser.add_argument("--runs", type=int, default=3, help="Messungen pro Modul (schnellste zählt)")
+    parser.add_argument("--top", type=int, default=10, help="Anzahl der teuersten Importe im Bericht")
+    parser.add_argument("--record", help="Ergebnis als JSON-Zeile an diese Datei anhängen")
+    args = parser.parse_args(argv)
+
+    record = {"ts": datetime.datetime.now().isoformat(timespec="seconds"), "python": sys.version.split()[0]}
+    for module in args.modules:
+        result = measure_import(module, args.runs)
+        record[module] = {"total_ms": round(result["total_us"] / 1000, 1), "eager": result["eager"]}
+
+        print(f"{module}: {result['total_us'] / 1000:.1f} ms")
+        top = sorted(result["modules"].items(), key=lambda item: item[1][1], reverse=True)
+        for name, (self_us, cumulative_us) in [item for item in top if item[0] != module][:args.top]:
+            print(f"  {cumulative_us / 1000:8.1f} ms  (self {self_us / 1000:6.1f} ms)  {name}")
+        if result["eager"]:
+            print(f"  Warnung: beim Start geladen, obwohl nur bei Bedarf nötig: {', '.join(result['eager'])}")
+        print()
+
+    if args.record:
+        with open(args.record, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
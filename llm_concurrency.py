@@ -0,0 +1,214 @@
+import math
+import time
+import threading
+import collections
+from urllib.parse import urlsplit
+
+from cancellation import check_cancelled
+from metrics import METRICS
+
+# Adaptive Parallelität je LLM-Backend (AIMD): das Limit gleichzeitiger Anfragen steigt um 1,
+# solange der Durchsatz dadurch wächst, und wird bei Überlast (HTTP 429/503, Timeouts, hohe
+# Fehlerquote) halbiert. Ein lokales LM Studio bleibt so bei 1-2 Anfragen, die OpenAI API
+# darf bis zum Maximum (Worker der Stufe "summarize") aufdrehen, bis sie 429 meldet.
+# Der Lese-Timeout folgt der beobachteten Latenz statt fester 60 Sekunden.
+
+INITIAL_LIMIT = 1
+ADDITIVE_STEP = 1
+DECREASE_FACTOR = 0.5
+MIN_WINDOW = 3  # Requests per evaluation window (at least twice the current limit)
+MIN_THROUGHPUT_GAIN = 0.05  # An increase that gains less throughput is undone
+HOLD_WINDOWS = 3  # Windows to stay at the limit after an undone increase before probing again
+ERROR_RATE_LIMIT = 0.25  # Share of failed requests in a window treated as overload
+OVERLOAD_STATUS = (429, 503)
+
+DEFAULT_TIMEOUT = 60  # Seconds, until enough latencies were observed
+MIN_TIMEOUT = 30
+MAX_TIMEOUT = 600
+TIMEOUT_FACTOR = 4  # Timeout = factor x p95 latency of successful requests
+LATENCY_SAMPLES = 200
+MIN_TIMEOUT_SAMPLES = 5
+
+
+def backend_key(url):
+    """Requests to the same scheme://host:port share one limit."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class AdaptiveLimiter:
+    """AIMD limit of concurrent requests to one LLM backend (thread-safe)."""
+
+    def __init__(self, backend, max_limit):
+        self.backend = backend
+        self.max_limit = max(1, max_limit)
+        self.limit = float(min(INITIAL_LIMIT, self.max_limit))
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self.requests = 0
+        self.errors = 0
+        self.overloads = 0
+        self.succeeded = 0
+        self.latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+        self.busy_seconds = 0.0
+        self._busy_since = None
+        self.throughput = 0.0  # Successful requests per second in the last window
+        self._last_decrease = 0.0
+        self._hold = 0
+        self._increased = False
+        self._last_throughput = None
+        self._start_window(time.monotonic())
+
+    def _start_window(self, now):
+        self._window_started = now
+        self._window_done = 0
+        self._window_succeeded = 0
+        self._window_errors = 0
+        self._window_peak = self.in_flight
+
+    def set_max_limit(self, max_limit):
+        with self._cond:
+            self.max_limit = max(1, max_limit)
+            self.limit = min(self.limit, self.max_limit)
+            self._cond.notify_all()
+
+    def acquire(self, cancel=None):
+        """Wait for a free slot. Returns a ticket for release()."""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                check_cancelled(cancel)
+                self._cond.wait(0.1)
+            now = time.monotonic()
+            if self.in_flight == 0:
+                self._busy_since = now
+            self.in_flight += 1
+            self._window_peak = max(self._window_peak, self.in_flight)
+            return now
+
+    def release(self, ticket, outcome):
+        """Finish a request: outcome is the HTTP status, "timeout", "error" or None (cancelled)."""
+        with self._cond:
+            now = time.monotonic()
+            self.in_flight -= 1
+            if self.in_flight == 0 and self._busy_since is not None:
+                self.busy_seconds += now - self._busy_since
+                self._busy_since = None
+            self._cond.notify_all()
+            if outcome is None:
+                return
+            self.requests += 1
+            self._window_done += 1
+            if outcome == 200:
+                self.succeeded += 1
+                self._window_succeeded += 1
+                self.latencies.append(now - ticket)
+            else:
+                self.errors += 1
+                self._window_errors += 1
+            if outcome in OVERLOAD_STATUS or outcome == "timeout":
+                self.overloads += 1
+                METRICS.add("llm_overloads")
+                # Only requests started after the last decrease can trigger another one
+                if ticket >= self._last_decrease:
+                    self._decrease(now)
+                return
+            if self._window_done >= max(MIN_WINDOW, 2 * math.ceil(self.limit)):
+                self._evaluate_window(now)
+
+    def _decrease(self, now):
+        self.limit = max(1.0, self.limit * DECREASE_FACTOR)
+        self._last_decrease = now
+        self._increased = False
+        self._last_throughput = None
+        self._hold = 0
+        self._start_window(now)
+
+    def _evaluate_window(self, now):
+        elapsed = max(now - self._window_started, 1e-6)
+        throughput = self._window_succeeded / elapsed
+        self.throughput = throughput
+        if self._window_errors / self._window_done > ERROR_RATE_LIMIT:
+            self._decrease(now)
+            return
+        if (self._increased and self._last_throughput
+                and throughput < self._last_throughput * (1 + MIN_THROUGHPUT_GAIN)):
+            # More parallel requests only queue up on the backend: step back and stay there a while
+            self.limit = max(1.0, self.limit - ADDITIVE_STEP)
+            self._increased = False
+            self._hold = HOLD_WINDOWS
+        elif self._hold:
+            self._hold -= 1
+            self._increased = False
+        elif self._window_peak >= int(self.limit) and self.limit < self.max_limit:
+            # Only probe upwards if the current limit was actually used
+            self.limit = min(float(self.max_limit), self.limit + ADDITIVE_STEP)
+            self._increased = True
+        else:
+            self._increased = False
+        self._last_throughput = throughput
+        self._start_window(now)
+
+    @property
+    def timeout(self):
+        """Read timeout for the next request, derived from the observed latencies."""
+        with self._cond:
+            if len(self.latencies) < MIN_TIMEOUT_SAMPLES:
+                return DEFAULT_TIMEOUT
+            ordered = sorted(self.latencies)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return min(MAX_TIMEOUT, max(MIN_TIMEOUT, TIMEOUT_FACTOR * p95))
+
+    def snapshot(self):
+        timeout = self.timeout
+        with self._cond:
+            busy = self.busy_seconds
+            if self._busy_since is not None:
+                busy += time.monotonic() - self._busy_since
+            ordered = sorted(self.latencies)
+            return {
+                "backend": self.backend,
+                "limit": int(self.limit),
+                "max_limit": self.max_limit,
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "errors": self.errors,
+                "overloads": self.overloads,
+                "throughput_per_minute": self.throughput * 60,
+                "avg_throughput_per_minute": self.succeeded / busy * 60 if busy > 0 else 0.0,
+                "latency_p50": ordered[len(ordered) // 2] if ordered else None,
+                "timeout": timeout,
+            }
+
+
+# Limiter of the process, one per backend (they keep what they learned across runs)
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter_for(url, max_limit):
+    """The shared limiter for the backend of url; max_limit is updated to the run's setting."""
+    key = backend_key(url)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = AdaptiveLimiter(key, max_limit)
+            return limiter
+    limiter.set_max_limit(max_limit)
+    return limiter
+
+
+def limiter_snapshots():
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return [limiter.snapshot() for limiter in limiters]
+
+
+def format_snapshot(snapshot):
+    """One line for the console, the report and the UI."""
+    latency = snapshot["latency_p50"]
+    return (f"{snapshot['backend']}: Limit {snapshot['limit']}/{snapshot['max_limit']}, "
+            f"Durchsatz {snapshot['throughput_per_minute']:.1f}/min "
+            f"(Mittel {snapshot['avg_throughput_per_minute']:.1f}/min), "
+            f"Latenz p50 {f'{latency:.1f}s' if latency is not None else '–'}, "
+            f"Fehler {snapshot['errors']}/{snapshot['requests']} (Überlast {snapshot['overloads']}), "
+            f"Timeout {snapshot['timeout']:.0f}s")
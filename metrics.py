@@ -0,0 +1,244 @@
+import io
+import sys
+import json
+import time
+import random
+import threading
+import functools
+from contextlib import contextmanager
+
+# Messwerte pro Lauf: Wand- und CPU-Zeit je Operation mit p50/p95/p99, dazu Zähler für
+# gelesene/geschriebene Bytes und stat-Aufrufe. Export als JSON und Prometheus-Textfile.
+
+MAX_SAMPLES = 10000  # Reservoir size per operation for the percentiles
+PERCENTILES = (50, 95, 99)
+PROMETHEUS_PREFIX = "dokuanalyse"
+
+
+class OperationStats:
+    """Timing of one kind of operation (e.g. collect_doc_files)."""
+
+    def __init__(self):
+        self.count = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.max = 0.0
+        self.samples = []
+
+    def add(self, wall, cpu):
+        self.count += 1
+        self.wall += wall
+        self.cpu += cpu
+        self.max = max(self.max, wall)
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(wall)
+        else:
+            # Reservoir sampling keeps a uniform sample of all observations
+            i = random.randrange(self.count)
+            if i < MAX_SAMPLES:
+                self.samples[i] = wall
+
+    def percentile(self, p):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        rank = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+        return ordered[rank]
+
+    def to_dict(self):
+        result = {"count": self.count, "wall_seconds": self.wall, "cpu_seconds": self.cpu, "max_seconds": self.max}
+        for p in PERCENTILES:
+            result[f"p{p}_seconds"] = self.percentile(p)
+        return result
+
+
+class Metrics:
+    """Thread-safe registry of operation timings and counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active_runs = 0
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.operations = {}
+            self.counters = {}
+            self.started = time.time()
+
+    def begin_run(self):
+        """Start a run; the registry is reset unless another run in this process is active."""
+        with self._lock:
+            active = self._active_runs
+            self._active_runs += 1
+        if not active:
+            self.reset()
+
+    def end_run(self):
+        with self._lock:
+            self._active_runs = max(0, self._active_runs - 1)
+
+    def observe(self, operation, wall, cpu=0.0):
+        with self._lock:
+            stats = self.operations.get(operation)
+            if stats is None:
+                stats = self.operations[operation] = OperationStats()
+            stats.add(wall, cpu)
+
+    def add(self, counter, value=1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    @contextmanager
+    def timer(self, operation):
+        """Measure wall and CPU time (of the calling thread) of a block."""
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            yield
+        finally:
+            self.observe(operation, time.perf_counter() - wall_started, time.thread_time() - cpu_started)
+
+    def timed(self, operation):
+        """Decorator form of timer()."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(operation):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "started": self.started,
+                "duration_seconds": time.time() - self.started,
+                "operations": {name: stats.to_dict() for name, stats in sorted(self.operations.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def write_json(self, path):
+        from atomic_io import atomic_write
+        with atomic_write(path) as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def prometheus_text(self):
+        data = self.to_dict()
+        prefix = PROMETHEUS_PREFIX
+        out = io.StringIO()
+        out.write(f"# HELP {prefix}_operation_seconds Wall time per operation.\n")
+        out.write(f"# TYPE {prefix}_operation_seconds summary\n")
+        for name, op in data["operations"].items():
+            for p in PERCENTILES:
+                out.write(f'{prefix}_operation_seconds{{operation="{name}",quantile="{p / 100}"}} {op[f"p{p}_seconds"]:.6f}\n')
+            out.write(f'{prefix}_operation_seconds_sum{{operation="{name}"}} {op["wall_seconds"]:.6f}\n')
+            out.write(f'{prefix}_operation_seconds_count{{operation="{name}"}} {op["count"]}\n')
+        out.write(f"# HELP {prefix}_operation_cpu_seconds_total CPU time per operation.\n")
+        out.write(f"# TYPE {prefix}_operation_cpu_seconds_total counter\n")
+        for name, op in data["operations"].items():
+            out.write(f'{prefix}_operation_cpu_seconds_total{{operation="{name}"}} {op["cpu_seconds"]:.6f}\n')
+        for name, value in data["counters"].items():
+            out.write(f"# TYPE {prefix}_{name}_total counter\n")
+            out.write(f"{prefix}_{name}_total {value}\n")
+        out.write(f"# TYPE {prefix}_run_duration_seconds gauge\n")
+        out.write(f"{prefix}_run_duration_seconds {data['duration_seconds']:.3f}\n")
+        return out.getvalue()
+
+    def write_prometheus(self, path):
+        """Write a node_exporter textfile (atomically, as the collector requires)."""
+        from atomic_io import atomic_write
+        with atomic_write(path) as f:
+            f.write(self.prometheus_text())
+
+    def report_lines(self, limit=12):
+        """Short table of the most expensive operations for the console."""
+        data = self.to_dict()
+        ops = sorted(data["operations"].items(), key=lambda item: item[1]["wall_seconds"], reverse=True)
+        lines = [f"{'Operation':<28}{'Anzahl':>8}{'Wand s':>10}{'CPU s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"]
+        for name, op in ops[:limit]:
+            lines.append(
+                f"{name:<28}{op['count']:>8}{op['wall_seconds']:>10.2f}{op['cpu_seconds']:>9.2f}"
+                f"{op['p50_seconds'] * 1000:>9.1f}{op['p95_seconds'] * 1000:>9.1f}{op['p99_seconds'] * 1000:>9.1f}"
+            )
+        counters = data["counters"]
+        if counters:
+            lines.append("  ".join(f"{name}={value}" for name, value in counters.items()))
+        return lines
+
+
+# Messwerte des laufenden Prozesses
+METRICS = Metrics()
+
+
+class ProfileCapture:
+    """Optional cProfile or tracemalloc capture around a run (all threads).
+
+    mode is "cprofile" or "tracemalloc"; results are written next to output_base
+    (<output_base>.pstats/.txt).
+    """
+
+    def __init__(self, mode, output_base):
+        if mode not in ("cprofile", "tracemalloc"):
+            raise ValueError(f"Unbekannter Profiling-Modus: {mode}")
+        self.mode = mode
+        self.output_base = output_base
+        self._profilers = []
+        self._lock = threading.Lock()
+
+    def _thread_profile(self, *args):
+        # Installed via threading.setprofile: swap the hook for a per-thread profiler
+        import cProfile
+        sys.setprofile(None)
+        profiler = cProfile.Profile()
+        with self._lock:
+            self._profilers.append(profiler)
+        profiler.enable()
+
+    def start(self):
+        if self.mode == "cprofile":
+            import cProfile
+            main_profiler = cProfile.Profile()
+            self._profilers.append(main_profiler)
+            threading.setprofile(self._thread_profile)
+            main_profiler.enable()
+        else:
+            import tracemalloc
+            tracemalloc.start(25)
+
+    def stop(self):
+        """Stop capturing and write the report. Returns the written paths."""
+        if self.mode == "cprofile":
+            import pstats
+            self._profilers[0].disable()
+            threading.setprofile(None)
+            stats = None
+            for profiler in self._profilers:
+                profiler.disable()
+                if stats is None:
+                    stats = pstats.Stats(profiler)
+                else:
+                    stats.add(profiler)
+            stats_path = self.output_base + ".pstats"
+            text_path = self.output_base + ".txt"
+            stats.dump_stats(stats_path)
+            with open(text_path, "w", encoding="utf-8") as f:
+                stats.stream = f
+                stats.sort_stats("cumulative").print_stats(60)
+            return [stats_path, text_path]
+
+        import tracemalloc
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        text_path = self.output_base + ".txt"
+        with open(text_path, "w", encoding="utf-8") as f:
+            f.write(f"Speicher aktuell: {current / 1024 / 1024:.1f} MiB, Spitze: {peak / 1024 / 1024:.1f} MiB\n\n")
+            for stat in snapshot.statistics("lineno")[:40]:
+                f.write(f"{stat}\n")
+            f.write("\nGrößte Allokationen mit Aufrufstapel:\n")
+            for stat in snapshot.statistics("traceback")[:5]:
+                f.write(f"\n{stat.count} Blöcke, {stat.size / 1024:.1f} KiB\n")
+                for line in stat.traceback.format():
+                    f.write(f"{line}\n")
+        return [text_path]
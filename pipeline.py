@@ -0,0 +1,150 @@
+import queue
+import threading
+
+from cancellation import AnalysisCancelled
+
+# Stufen-Pipeline: jede Stufe hat eigene Worker-Threads und eine begrenzte Eingangsqueue.
+# Volle Queues bremsen die vorgelagerte Stufe (Backpressure); alle Stufen laufen gleichzeitig,
+# die Gesamtdauer nähert sich so der langsamsten Stufe statt der Summe aller Stufen.
+
+POLL_SECONDS = 0.1
+
+_DONE = object()  # end-of-input marker, one per worker
+
+
+class _Stage:
+    def __init__(self, name, func, workers, queue_size, upstream, on_finished):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self.upstream = list(upstream)
+        self.downstream = []
+        self.on_finished = on_finished
+        self.open_upstream = len(self.upstream)
+        self.running_workers = self.workers
+
+
+class Pipeline:
+    """Runs a source function and a DAG of worker stages connected by bounded queues.
+
+    Stage functions receive one item and forward results with ``pipeline.put(stage, item)``.
+    A stage ends once all of its upstream stages have ended and its queue is drained.
+    The first exception in any worker (including AnalysisCancelled) stops the whole
+    pipeline and is re-raised by ``run()``.
+    """
+
+    def __init__(self, cancel=None):
+        self.cancel = cancel
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._failed = threading.Event()
+        self._error = None
+
+    def add_stage(self, name, func, workers=1, queue_size=16, upstream=(), on_finished=None):
+        """Register a stage; upstream names the stages that feed it (the source is "source")."""
+        stage = _Stage(name, func, workers, queue_size, upstream, on_finished)
+        for up in stage.upstream:
+            if up != "source":
+                self._stages[up].downstream.append(stage)
+        self._stages[name] = stage
+        return stage
+
+    def queue_sizes(self):
+        """Current number of waiting items per stage (for progress displays)."""
+        return {name: stage.queue.qsize() for name, stage in self._stages.items()}
+
+    def aborted(self):
+        return self._failed.is_set() or (self.cancel is not None and self.cancel.cancelled)
+
+    def _fail(self, error):
+        with self._lock:
+            if self._error is None:
+                self._error = error
+        self._failed.set()
+
+    def put(self, stage_name, item):
+        """Hand an item to a stage; blocks while its queue is full (backpressure)."""
+        stage_queue = self._stages[stage_name].queue
+        while True:
+            if self.aborted():
+                raise AnalysisCancelled()
+            try:
+                stage_queue.put(item, timeout=POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def _close_input(self, stage):
+        # All producers of this stage are done: one end marker per worker
+        for _ in range(stage.workers):
+            while True:
+                if self._failed.is_set():
+                    return
+                try:
+                    stage.queue.put(_DONE, timeout=POLL_SECONDS)
+                    break
+                except queue.Full:
+                    continue
+
+    def _upstream_finished(self, stage):
+        with self._lock:
+            stage.open_upstream -= 1
+            closed = stage.open_upstream == 0
+        if closed:
+            self._close_input(stage)
+
+    def _stage_finished(self, stage):
+        if stage.on_finished is not None:
+            stage.on_finished(stage.name)
+        for down in stage.downstream:
+            self._upstream_finished(down)
+
+    def _worker(self, stage):
+        try:
+            while True:
+                try:
+                    item = stage.queue.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    if self.aborted():
+                        return
+                    continue
+                if item is _DONE:
+                    break
+                if self.aborted():
+                    return
+                stage.func(item)
+        except BaseException as e:
+            self._fail(e)
+            return
+        with self._lock:
+            stage.running_workers -= 1
+            last = stage.running_workers == 0
+        if last:
+            self._stage_finished(stage)
+
+    def run(self, source):
+        """Start all workers, run ``source()`` in the calling thread and wait for completion."""
+        threads = []
+        for stage in self._stages.values():
+            for i in range(stage.workers):
+                t = threading.Thread(target=self._worker, args=(stage,), name=f"{stage.name}-{i + 1}", daemon=True)
+                t.start()
+                threads.append(t)
+
+        try:
+            source()
+        except BaseException as e:
+            self._fail(e)
+        else:
+            for stage in self._stages.values():
+                if "source" in stage.upstream:
+                    self._upstream_finished(stage)
+
+        for t in threads:
+            t.join()
+
+        if self._error is not None:
+            raise self._error
+        if self.cancel is not None and self.cancel.cancelled:
+            raise AnalysisCancelled()
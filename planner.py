@@ -0,0 +1,318 @@
+import os
+import sys
+import time
+
+from catalog import Catalog
+from git_state import read_git_state
+from llm_concurrency import backend_key
+from search_index import SEARCH_INDEX_FILE, indexed_file_states
+from corpus import CorpusReader, read_generation
+from segments import SEGMENT_FOLDER, archived_projects
+from summarize import OPENAI_API_URL, docs_fingerprint, expand_doc_files
+
+# Trockenlauf (--plan): nur der billige Metadaten-Durchlauf (scandir/stat, dazu die kleinen
+# Git-Verweisdateien), kein Lesen von Dokumenten. Zeigt, welche Projekte archiviert, aufgefrischt
+# oder zusammengefasst würden, und schätzt Bytes, PDF-Seiten, Prompt-Tokens und Dauer je Stufe.
+# Die Schätzwerte stammen aus dem Durchsatz früherer Läufe (Tabelle calibration im Katalog).
+
+CALIBRATION_RUNS = 10  # Latest runs averaged per figure
+PLAN_LIST_LIMIT = 30  # Projects listed per action (all of them are in the returned plan)
+
+# Used until a run has measured the figure; per-backend figures are stored as "<measure>@<backend>"
+DEFAULT_CALIBRATION = {
+    "archive_bytes_per_second": 20e6,  # Read and deflate, per archive worker
+    "extract_bytes_per_second": 50e6,  # Text extraction of .md/.txt/.docx
+    "text_chars_per_byte": 0.9,
+    "pdf_bytes_per_page": 60000,
+    "pdf_chars_per_page": 2500,
+    "pdf_seconds_per_page": 0.05,
+    "prompt_tokens_per_char": 0.3,
+    "summary_seconds": 60.0,  # LLM time of one summary (all its requests)
+    "llm_concurrency": 1.0,  # Concurrent requests the adaptive limit settled on
+}
+
+
+def calibration_figures(metrics, llm_usage, llm_snapshots):
+    """Throughput figures of a finished run as {measure: (amount, units)} for the catalog.
+
+    metrics is METRICS.to_dict(), llm_usage the per-backend totals of AnalysisRun.
+    """
+    counters, operations = metrics["counters"], metrics["operations"]
+
+    def wall(name):
+        return operations.get(name, {}).get("wall_seconds", 0.0)
+
+    pdf_bytes, pdf_pages = counters.get("pdf_bytes", 0), counters.get("pdf_pages", 0)
+    text_bytes = counters.get("extract_bytes", 0)
+    text_seconds = sum(op["wall_seconds"] for name, op in operations.items()
+                       if name.startswith("extract_text.") and name != "extract_text.pdf")
+    figures = {
+        "archive_bytes_per_second": (counters.get("archive_bytes", 0),
+                                     wall("write_project_zip") + wall("write_project_segment")),
+        "extract_bytes_per_second": (text_bytes, text_seconds),
+        "text_chars_per_byte": (counters.get("extract_chars", 0), text_bytes),
+        "pdf_bytes_per_page": (pdf_bytes, pdf_pages),
+        "pdf_chars_per_page": (counters.get("pdf_chars", 0), pdf_pages),
+        "pdf_seconds_per_page": (wall("extract_text.pdf"), pdf_pages),
+    }
+    for backend, usage in llm_usage.items():
+        figures[f"prompt_tokens_per_char@{backend}"] = (usage["prompt_tokens"], usage["input_chars"])
+        figures[f"summary_seconds@{backend}"] = (usage["latency"], usage["summaries"])
+    for snapshot in llm_snapshots:
+        if snapshot["backend"] in llm_usage:
+            figures[f"llm_concurrency@{snapshot['backend']}"] = (snapshot["limit"], 1)
+    return {measure: value for measure, value in figures.items() if value[0] > 0 and value[1] > 0}
+
+
+class Calibration:
+    """Figures from earlier runs with DEFAULT_CALIBRATION as fallback."""
+
+    def __init__(self, figures):
+        self.figures = figures
+        self.defaulted = set()
+
+    def get(self, measure, backend=None):
+        for key in ((f"{measure}@{backend}",) if backend else ()) + (measure,):
+            if key in self.figures:
+                return self.figures[key]
+        self.defaulted.add(measure)
+        return DEFAULT_CALIBRATION[measure]
+
+
+class Extraction:
+    """Files a stage would extract text from, with estimated pages, characters and seconds."""
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.pdf_bytes = 0
+
+    def add(self, path, size):
+        self.files += 1
+        if path.lower().endswith(".pdf"):
+            self.pdf_bytes += size
+        else:
+            self.bytes += size
+
+    def merge(self, other):
+        self.files += other.files
+        self.bytes += other.bytes
+        self.pdf_bytes += other.pdf_bytes
+
+    def pdf_pages(self, calibration):
+        return self.pdf_bytes / calibration.get("pdf_bytes_per_page")
+
+    def chars(self, calibration):
+        return (self.bytes * calibration.get("text_chars_per_byte")
+                + self.pdf_pages(calibration) * calibration.get("pdf_chars_per_page"))
+
+    def seconds(self, calibration):
+        return (self.bytes / calibration.get("extract_bytes_per_second")
+                + self.pdf_pages(calibration) * calibration.get("pdf_seconds_per_page"))
+
+
+def _file_states(doc_files):
+    """(path, size, mtime_ns) of every file the archive of a project would contain."""
+    states = []
+    seen = set()
+
+    def add(path):
+        if path in seen:
+            return
+        seen.add(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        states.append((path, st.st_size, st.st_mtime_ns, st.st_mtime))
+
+    for doc_path in doc_files:
+        if not os.path.isdir(doc_path):  # docs folder entries are markers
+            add(doc_path)
+    return states
+
+
+def plan_run(config, cancel=None):
+    """Plan a run of config without changing anything. Returns a dict (see print_plan)."""
+    import extract_documentation_deep as extractor
+    started = time.perf_counter()
+    catalog_path = os.path.join(config.output_dir, extractor.CATALOG_FILE)
+    catalog = Catalog(catalog_path, read_only=True) if os.path.exists(catalog_path) else None
+    index_path = os.path.join(config.output_dir, SEARCH_INDEX_FILE)
+    indexed = {}
+    if config.enable_search_index and os.path.exists(index_path):
+        indexed = indexed_file_states(index_path)
+    corpus = None
+    if config.enable_corpus_export and read_generation(config.output_dir) is not None:
+        corpus = CorpusReader(config.output_dir)
+    segment_names = None
+    if config.segment_archives:
+        segment_names = archived_projects(os.path.join(config.output_dir, SEGMENT_FOLDER))
+    backend = backend_key(OPENAI_API_URL if config.use_openai else config.local_llm_url)
+    ignore = extractor.create_ignore_engine(config)
+
+    try:
+        calibration = Calibration(catalog.calibration(CALIBRATION_RUNS) if catalog is not None else {})
+        summarized = catalog.summarized_projects() if catalog is not None else set()
+        projects = []
+        extraction = {"index": Extraction(), "export": Extraction(), "summarize": Extraction()}
+        archive_bytes = 0
+        summaries_pending = 0
+        for proj in extractor.iter_projects(config, cancel, None, ignore):
+            proj_folder = extractor.unique_project_name(proj)
+            doc_files = extractor.collect_doc_files(proj, cancel, ignore)
+            if not doc_files:
+                continue
+            entry = {"project": proj_folder, "path": proj, "summary": None}
+            if segment_names is not None:
+                has_archive = proj_folder in segment_names
+            else:
+                has_archive = os.path.exists(os.path.join(config.output_dir, f"{proj_folder}_dokumentation.zip"))
+            git_state = read_git_state(proj) if config.git_fast_path else None
+            previous_state = catalog.get_git_state(proj_folder) if catalog is not None else None
+            if git_state is not None and previous_state == git_state and has_archive:
+                entry["action"] = "unverändert"
+            elif not has_archive:
+                entry["action"] = "archivieren"
+            elif git_state is not None and previous_state is not None:
+                entry["action"] = "auffrischen"
+            else:
+                entry["action"] = "vorhanden"
+
+            files = _file_states(doc_files)
+            entry["bytes"] = sum(size for _, size, _, _ in files)
+            if entry["action"] in ("archivieren", "auffrischen"):
+                archive_bytes += entry["bytes"]
+            extractable = set(expand_doc_files(doc_files))
+            if entry["action"] != "unverändert":
+                for path, size, mtime_ns, mtime in files:
+                    if path not in extractable:
+                        continue
+                    if config.enable_search_index and indexed.get(path) != (mtime, size):
+                        extraction["index"].add(path, size)
+                    if config.enable_corpus_export:
+                        rel_path = os.path.relpath(path, proj).replace(os.sep, "/")
+                        if corpus is None or corpus.source_state(proj_folder, rel_path) != (size, mtime_ns):
+                            extraction["export"].add(path, size)
+
+            if config.enable_summarization:
+                inputs = extractor.summary_input_files(doc_files)
+                has_summary = proj in summarized or (catalog is not None and catalog.has_summary(proj_folder))
+                if not has_summary:
+                    entry["summary"] = "neu"
+                elif entry["action"] != "unverändert" and catalog.summary_fingerprint(proj_folder) not in (
+                        None, docs_fingerprint(inputs)):
+                    entry["summary"] = "erneuern"
+                if entry["summary"]:
+                    summaries_pending += 1
+                    if summaries_pending <= config.max_summaries:
+                        summary_files = set(expand_doc_files(inputs))
+                        for path, size, _, _ in files:
+                            if path in summary_files:
+                                extraction["summarize"].add(path, size)
+                    else:
+                        entry["summary"] = None  # over this run's budget
+            projects.append(entry)
+    finally:
+        if catalog is not None:
+            catalog.close()
+        if corpus is not None:
+            corpus.close()
+
+    workers = config.pipeline_workers
+    summaries = min(summaries_pending, config.max_summaries)
+    concurrency = min(workers["summarize"], calibration.get("llm_concurrency", backend))
+    stage_seconds = {
+        "discovery": time.perf_counter() - started,  # this pass is the discovery and collection of the run
+        "archive": archive_bytes / calibration.get("archive_bytes_per_second") / workers["archive"],
+    }
+    if config.enable_search_index:
+        stage_seconds["index"] = extraction["index"].seconds(calibration)
+    if config.enable_corpus_export:
+        stage_seconds["export"] = extraction["export"].seconds(calibration)
+    prompt_tokens = {}
+    if config.enable_summarization:
+        summary_seconds = calibration.get("summary_seconds", backend)
+        stage_seconds["summarize"] = (extraction["summarize"].seconds(calibration) / workers["summarize"]
+                                      + summaries * summary_seconds / concurrency)
+        prompt_tokens[backend] = int(extraction["summarize"].chars(calibration)
+                                     * calibration.get("prompt_tokens_per_char", backend))
+    pdf_pages = sum(e.pdf_pages(calibration) for e in extraction.values())
+    return {
+        "projects": projects,
+        "archive_bytes": archive_bytes,
+        "extraction": {stage: {"files": e.files, "bytes": e.bytes + e.pdf_bytes,
+                               "pdf_pages": int(e.pdf_pages(calibration))} for stage, e in extraction.items()},
+        "pdf_pages": int(pdf_pages),
+        "summaries": summaries,
+        "summaries_pending": summaries_pending,
+        "prompt_tokens": prompt_tokens,
+        "llm_concurrency": concurrency,
+        "stage_seconds": stage_seconds,
+        # Stages run at the same time: the run takes about as long as its slowest stage
+        "total_seconds": max(stage_seconds.values()),
+        "defaulted": sorted(calibration.defaulted),
+    }
+
+
+def _size(n):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if n < 1024 or unit == "GiB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def print_plan(plan, config):
+    from progress import STAGE_LABELS, format_duration
+    actions = {}
+    for entry in plan["projects"]:
+        actions.setdefault(entry["action"], []).append(entry)
+    print(f"\n===== Trockenlauf =====")
+    print(f"Projekte mit Dokumentation: {len(plan['projects'])}")
+    labels = [("archivieren", "Neu zu archivieren"), ("auffrischen", "Archiv aufzufrischen (Git-Stand geändert)"),
+              ("vorhanden", "Archiv vorhanden"), ("unverändert", "Unverändert (Git-Stand)")]
+    for action, label in labels:
+        entries = actions.get(action, [])
+        print(f"{label}: {len(entries)}")
+        if action in ("archivieren", "auffrischen"):
+            for entry in entries[:PLAN_LIST_LIMIT]:
+                print(f"  - {entry['project']} ({_size(entry['bytes'])})")
+            if len(entries) > PLAN_LIST_LIMIT:
+                print(f"  … und {len(entries) - PLAN_LIST_LIMIT} weitere")
+    planned = [entry for entry in plan["projects"] if entry["summary"]]
+    if config.enable_summarization:
+        print(f"KI-Zusammenfassungen in diesem Lauf: {plan['summaries']} "
+              f"(ausstehend insgesamt: {plan['summaries_pending']}, Budget {config.max_summaries})")
+        for entry in planned[:PLAN_LIST_LIMIT]:
+            print(f"  - {entry['project']} ({entry['summary']})")
+
+    print(f"\nZu lesen und komprimieren: {_size(plan['archive_bytes'])}")
+    for stage, extraction in plan["extraction"].items():
+        if extraction["files"]:
+            print(f"Textextraktion {STAGE_LABELS[stage]}: {extraction['files']} Dateien, "
+                  f"{_size(extraction['bytes'])}, ca. {extraction['pdf_pages']} PDF-Seiten")
+    for backend, tokens in plan["prompt_tokens"].items():
+        print(f"Prompt-Tokens ({backend}): ca. {tokens:,}".replace(",", "."))
+
+    print(f"\nGeschätzte Dauer je Stufe:")
+    for stage, seconds in plan["stage_seconds"].items():
+        print(f"  - {STAGE_LABELS[stage]}: {format_duration(seconds)}")
+    slowest = max(plan["stage_seconds"], key=plan["stage_seconds"].get)
+    print(f"Gesamtdauer: ca. {format_duration(plan['total_seconds'])} (Engpass: {STAGE_LABELS[slowest]})")
+    if config.enable_summarization and plan["summaries_pending"] > plan["summaries"] and plan["summaries"]:
+        runs = -(-plan["summaries_pending"] // config.max_summaries)
+        print(f"Alle ausstehenden Zusammenfassungen brauchen bei diesem Budget {runs} Läufe "
+              f"(LLM-Parallelität {plan['llm_concurrency']:.0f})")
+    if plan["defaulted"]:
+        print(f"Ohne Messwerte früherer Läufe (Standardwerte): {', '.join(plan['defaulted'])}")
+    print(f"==============================")
+
+
+def main(argv=None):
+    """Same as python -m extract_documentation_deep --plan ..."""
+    import extract_documentation_deep as extractor
+    return extractor.cli(["--plan"] + list(sys.argv[1:] if argv is None else argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+import sys
+import json
+import time
+import threading
+
+# Strukturierte Fortschritts-Events statt print()-Ausgaben
+#
+# Event-Typen (alle Events haben "type" und "ts", Stufen-Events zusätzlich "stage"):
+#   stage_start        stage, total (None wenn unbekannt)
+#   stage_end          stage, seconds
+#   stage_total        stage, total (known once the upstream stage has finished)
+#   project_discovered stage="discovery", path
+#   archive_written    stage="archive", project, bytes, seconds
+#   archive_exists     stage="archive", project
+#   project_unchanged  stage="archive", project, commit (git fast path, nothing re-collected)
+#   project_resumed    stage="archive", project (already archived by the interrupted run)
+#   project_no_docs    stage="archive", project
+#   project_indexed    stage="index", project, files
+#   project_exported   stage="export", project, files, removed (documents appended / deleted in the corpus)
+#   summary_done       stage="summarize", project, tokens, latency
+#   summary_failed     stage="summarize", project, error
+#   llm_concurrency    backend, limit, max_limit, in_flight, throughput_per_minute, ... (no stage;
+#                      state of the adaptive LLM limit after each summary, see llm_concurrency.py)
+#   log                message (no stage; one line of the run's log, printed by ConsoleLog)
+
+STAGES = ["discovery", "archive", "index", "export", "summarize"]
+
+STAGE_LABELS = {
+    "discovery": "Projektsuche",
+    "archive": "Archivierung",
+    "index": "Suchindex",
+    "export": "Korpus-Export",
+    "summarize": "KI-Zusammenfassungen",
+}
+
+
+class ProgressBus:
+    """Synchronous publish/subscribe hub for progress events."""
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._open_stages = {}
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def emit(self, event_type, **fields):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+        event = {"type": event_type, "ts": time.time()}
+        event.update(fields)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                print_line(f"Fehler im Event-Empfänger: {e}")
+
+    def log(self, message):
+        """Publish message as "log" events, one per line."""
+        for line in str(message).split("\n"):
+            self.emit("log", message=line)
+
+    def start_stage(self, stage, total=None):
+        self._open_stages[stage] = time.perf_counter()
+        self.emit("stage_start", stage=stage, total=total)
+
+    def end_stage(self, stage, cancelled=False):
+        started = self._open_stages.pop(stage, None)
+        if started is not None:
+            self.emit("stage_end", stage=stage, seconds=time.perf_counter() - started, cancelled=cancelled)
+
+    def end_open_stages(self, cancelled=True):
+        """Close all stages that are still running (e.g. after a cancellation)."""
+        for stage in list(self._open_stages):
+            self.end_stage(stage, cancelled=cancelled)
+
+
+_print_lock = threading.Lock()
+
+def print_line(line):
+    """Print line to stdout in one locked write, so lines of concurrent threads never mix."""
+    with _print_lock:
+        sys.stdout.write(f"{line}\n")
+
+
+class ConsoleLog:
+    """Subscriber that prints the "log" events of a run to stdout."""
+
+    def __call__(self, event):
+        if event["type"] == "log":
+            print_line(event["message"])
+
+
+class JsonLinesWriter:
+    """Subscriber that appends every event as one JSON line (for headless runs)."""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def __call__(self, event):
+        line = json.dumps(event, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class StageProgress:
+    """Progress, rate and ETA of a single stage."""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.total = None
+        self.done = 0
+        self.bytes = 0
+        self.started = None
+        self.finished = None
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    @property
+    def rate(self):
+        """Items per second."""
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """Remaining seconds, or None if unknown."""
+        if self.finished is not None:
+            return 0.0
+        if not self.total or not self.done:
+            return None
+        return max(self.total - self.done, 0) / self.rate
+
+    @property
+    def fraction(self):
+        if self.finished is not None:
+            return 1.0
+        if not self.total:
+            return None
+        return min(self.done / self.total, 1.0)
+
+
+class ProgressModel:
+    """Aggregates events into per-stage progress (subscribe it to a ProgressBus)."""
+
+    def __init__(self):
+        self.stages = {stage: StageProgress(stage) for stage in STAGES}
+        self.llm = {}  # backend -> latest llm_concurrency event
+
+    def __call__(self, event):
+        if event["type"] == "llm_concurrency":
+            self.llm[event["backend"]] = event
+            return
+        stage = self.stages.get(event.get("stage"))
+        if stage is None:
+            return
+        if event["type"] == "stage_start":
+            stage.started = event["ts"]
+            stage.finished = None
+            stage.total = event.get("total")
+            stage.done = 0
+            stage.bytes = 0
+        elif event["type"] == "stage_end":
+            stage.finished = event["ts"]
+        elif event["type"] == "stage_total":
+            stage.total = event["total"]
+        else:
+            stage.done += 1
+            stage.bytes += event.get("bytes", 0)
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "–"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
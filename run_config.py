@@ -0,0 +1,231 @@
+import os
+import argparse
+import dataclasses
+from dataclasses import dataclass, field
+
+from summarize import LOCAL_LLM_URL
+from scoring import effective_weights, parse_weight
+
+# Laufkonfiguration: alle Einstellungen eines Analyse-Laufs in einem Objekt, das explizit
+# durch die Engine gereicht wird. Mehrere Läufe können so gleichzeitig in einem Prozess
+# laufen (Dienst, Test-Harness). Quellen: Standardwerte < Konfigurationsdatei < Kommandozeile.
+
+BEST_DOCS_FOLDER = "best_docs"
+GIT_CLONES_FOLDER = "git_clones"  # Subfolder for Git repositories
+LOCAL_PROJECTS_FOLDER = "local_projects"  # Subfolder for local projects
+SUMMARIES_FOLDER = "summaries"  # Subfolder for AI-generated summaries
+
+# Stages whose worker count --workers N sets (index and export write one file each, summarize is LLM-bound)
+SCALABLE_STAGES = ("collect", "archive")
+
+
+@dataclass
+class RunConfig:
+    """Settings of one analysis run. Create via extract_documentation_deep.default_config()."""
+
+    start_paths: list
+    output_dir: str
+    max_depth: int = 2
+    enable_summarization: bool = True
+    use_openai: bool = False
+    min_summaries: int = 5
+    max_summaries: int = 10  # LLM budget: summaries per run (per worker in shard mode)
+    local_llm_url: str = LOCAL_LLM_URL
+    enable_search_index: bool = True
+    enable_corpus_export: bool = False
+    segment_archives: bool = False
+    events_file: str = None
+    resume_runs: bool = True
+    respect_ignore_files: bool = True
+    exclude_patterns: list = field(default_factory=list)
+    git_fast_path: bool = True
+    pipeline_workers: dict = field(default_factory=lambda: {"collect": 4, "archive": 2, "index": 1, "export": 1,
+                                                                 "summarize": 4})
+    pipeline_queue_size: int = 32
+    shard_mode: bool = False
+    claim_poll_seconds: float = 1.0
+    enable_metrics: bool = True
+    metrics_file: str = "metriken.json"
+    prometheus_textfile: str = None
+    profile_mode: str = None
+    scoring_weights: dict = field(default_factory=dict)  # Overrides of scoring.DEFAULT_WEIGHTS
+    watch: bool = False
+    dry_run: bool = False
+    watch_debounce_seconds: float = 2.0
+    watch_max_delay_seconds: float = 30.0
+    watch_poll_seconds: float = 10.0
+    watch_rescan_seconds: float = 3600.0
+
+    @property
+    def best_docs_dir(self):
+        return os.path.join(self.output_dir, BEST_DOCS_FOLDER)
+
+    @property
+    def git_clones_dir(self):
+        return os.path.join(self.best_docs_dir, GIT_CLONES_FOLDER)
+
+    @property
+    def local_projects_dir(self):
+        return os.path.join(self.best_docs_dir, LOCAL_PROJECTS_FOLDER)
+
+    @property
+    def summaries_dir(self):
+        return os.path.join(self.output_dir, SUMMARIES_FOLDER)
+
+    def replace(self, **changes):
+        """Copy with some settings changed (unknown names raise ValueError)."""
+        return dataclasses.replace(self, **_checked(changes))
+
+    def validate(self):
+        if not self.start_paths:
+            raise ValueError("Keine Startpfade angegeben")
+        if not self.output_dir:
+            raise ValueError("Kein Ausgabeordner angegeben")
+        if self.min_summaries < 0 or self.max_summaries < 0:
+            raise ValueError("Anzahl der Zusammenfassungen darf nicht negativ sein")
+        unknown = set(self.pipeline_workers) - {"collect", "archive", "index", "export", "summarize"}
+        if unknown:
+            raise ValueError(f"Unbekannte Pipeline-Stufen: {', '.join(sorted(unknown))}")
+        if self.profile_mode not in (None, "cprofile", "tracemalloc"):
+            raise ValueError(f"Unbekannter Profiling-Modus: {self.profile_mode}")
+        effective_weights(self.scoring_weights)  # raises ValueError for unknown names
+        if self.watch and self.shard_mode:
+            raise ValueError("Überwachungsmodus und verteilte Läufe (--worker) schließen sich aus")
+        if self.enable_corpus_export and self.shard_mode:
+            raise ValueError("Korpus-Export und verteilte Läufe (--worker) schließen sich aus (nur ein Schreiber)")
+        if self.segment_archives and self.shard_mode:
+            raise ValueError("Segmentarchive und verteilte Läufe (--worker) schließen sich aus (nur ein Schreiber)")
+        if self.pipeline_workers.get("export", 1) != 1:
+            raise ValueError("Der Korpus-Export arbeitet mit genau einem Worker")
+        if self.watch_debounce_seconds < 0 or self.watch_poll_seconds <= 0:
+            raise ValueError("Ungültige Zeitangaben für den Überwachungsmodus")
+        return self
+
+
+def _checked(values):
+    names = {f.name for f in dataclasses.fields(RunConfig)}
+    unknown = set(values) - names
+    if unknown:
+        raise ValueError(f"Unbekannte Einstellungen: {', '.join(sorted(unknown))}")
+    return values
+
+
+def load_config_file(path):
+    """Read settings from a TOML or YAML file (keys as in RunConfig). Returns a dict."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".toml":
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            import tomli as tomllib
+        with open(path, "rb") as f:
+            values = tomllib.load(f)
+    elif extension in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("Für YAML-Konfigurationsdateien wird PyYAML benötigt (pip install pyyaml)")
+        with open(path, "r", encoding="utf-8") as f:
+            values = yaml.safe_load(f) or {}
+    else:
+        raise ValueError(f"Unbekanntes Konfigurationsformat: {path} (erwartet .toml, .yaml oder .yml)")
+    if not isinstance(values, dict):
+        raise ValueError(f"{path}: erwartet eine Zuordnung von Einstellungen")
+    return _checked(values)
+
+
+def merge_settings(config, values):
+    """Apply a settings dict to config; pipeline_workers and scoring_weights are merged per entry."""
+    values = dict(values)
+    for name in ("pipeline_workers", "scoring_weights"):
+        if name in values:
+            values[name] = dict(getattr(config, name), **values[name])
+    return config.replace(**values)
+
+
+def parse_workers(value):
+    """--workers 4 or --workers collect=4,archive=2 -> dict of stage worker counts."""
+    if value.isdigit():
+        return {stage: int(value) for stage in SCALABLE_STAGES}
+    workers = {}
+    for part in value.split(","):
+        stage, _, count = part.partition("=")
+        if not count.strip().isdigit():
+            raise argparse.ArgumentTypeError(f"Ungültige Worker-Angabe: {part}")
+        workers[stage.strip()] = int(count)
+    return workers
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m extract_documentation_deep",
+        description="Projekt-Dokumentation finden, bewerten, archivieren und zusammenfassen")
+    parser.add_argument("--config", help="Konfigurationsdatei (.toml, .yaml)")
+    parser.add_argument("--roots", nargs="+", metavar="PFAD", help="Startpfade")
+    parser.add_argument("--output", help="Ausgabeordner")
+    parser.add_argument("--depth", type=int, help="Maximale Suchtiefe")
+    parser.add_argument("--workers", type=parse_workers,
+                        help="Worker je Stufe: N (Sammeln und Archivieren) oder collect=4,archive=2,...")
+    parser.add_argument("--budget", type=int, help="Maximale Anzahl KI-Zusammenfassungen pro Lauf")
+    parser.add_argument("--min-summaries", type=int)
+    summaries = parser.add_mutually_exclusive_group()
+    summaries.add_argument("--summaries", dest="enable_summarization", action="store_true", default=None)
+    summaries.add_argument("--no-summaries", dest="enable_summarization", action="store_false")
+    parser.add_argument("--openai", dest="use_openai", action="store_true", default=None,
+                        help="OpenAI API statt lokalem LLM verwenden")
+    parser.add_argument("--llm-url", help="URL des lokalen, OpenAI-kompatiblen LLM-Servers")
+    parser.add_argument("--no-index", dest="enable_search_index", action="store_false", default=None,
+                        help="Volltext-Suchindex nicht aktualisieren")
+    parser.add_argument("--corpus", dest="enable_corpus_export", action="store_true", default=None,
+                        help="Extrahierten Text in den Binärkorpus (korpus-*.bin) exportieren")
+    parser.add_argument("--segmente", dest="segment_archives", action="store_true", default=None,
+                        help="Alle Projekte in wenige Segmentarchive (archiv/) statt einzelner ZIP-Dateien schreiben")
+    parser.add_argument("--no-resume", dest="resume_runs", action="store_false", default=None)
+    parser.add_argument("--exclude", action="append", metavar="MUSTER", help="Zusätzliches Ausschlussmuster")
+    parser.add_argument("--events", help="Fortschritts-Events als JSON-Zeilen in diese Datei schreiben")
+    parser.add_argument("--worker", dest="shard_mode", action="store_true", default=None,
+                        help="Als Worker eines verteilten Laufs arbeiten")
+    parser.add_argument("--profile", choices=("cprofile", "tracemalloc"), help="Profiling-Modus")
+    parser.add_argument("--prometheus", help="Pfad für die Prometheus-Textdatei")
+    parser.add_argument("--watch", action="store_true", default=None,
+                        help="Nach dem Lauf Änderungen überwachen und betroffene Projekte neu verarbeiten")
+    parser.add_argument("--weight", action="append", type=parse_weight, metavar="NAME=WERT",
+                        help="Gewicht des Qualitätsscores überschreiben, z. B. docs_folder=3")
+    parser.add_argument("--plan", dest="dry_run", action="store_true", default=None,
+                        help="Trockenlauf: nur planen und Aufwand schätzen, nichts schreiben")
+    return parser
+
+
+def config_from_args(defaults, argv=None):
+    """Build a RunConfig from defaults, an optional --config file and command line flags."""
+    args = build_parser().parse_args(argv)
+    config = defaults
+    if args.config:
+        config = merge_settings(config, load_config_file(args.config))
+
+    flags = {
+        "start_paths": args.roots,
+        "output_dir": args.output,
+        "max_depth": args.depth,
+        "pipeline_workers": args.workers,
+        "max_summaries": args.budget,
+        "min_summaries": args.min_summaries,
+        "enable_summarization": args.enable_summarization,
+        "use_openai": args.use_openai,
+        "local_llm_url": args.llm_url,
+        "enable_search_index": args.enable_search_index,
+        "enable_corpus_export": args.enable_corpus_export,
+        "segment_archives": args.segment_archives,
+        "resume_runs": args.resume_runs,
+        "events_file": args.events,
+        "shard_mode": args.shard_mode,
+        "profile_mode": args.profile,
+        "prometheus_textfile": args.prometheus,
+        "watch": args.watch,
+        "dry_run": args.dry_run,
+    }
+    if args.weight:
+        flags["scoring_weights"] = dict(args.weight)
+    if args.exclude:
+        flags["exclude_patterns"] = list(config.exclude_patterns) + args.exclude
+    return merge_settings(config, {k: v for k, v in flags.items() if v is not None}).validate()
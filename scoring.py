@@ -0,0 +1,338 @@
+import os
+import sys
+import time
+import argparse
+from array import array
+
+# Spaltenbasierte Bewertung der Dokumentationsqualität: jede gesammelte Doku-Datei ist eine
+# Zeile mit Größe, Typ-Code und Flags (README, Docs-Ordner, ...). Der Score eines Projekts
+# ergibt sich aus wenigen Gruppierungen über diese Spalten - beim Sammeln für ein Projekt,
+# für Ranglisten und Berichte über alle Projekte des Katalogs auf einmal (mit NumPy
+# vektorisiert, sonst in einer Schleife über die Spalten aus der Standardbibliothek).
+
+# Weights and thresholds of the score; RunConfig.scoring_weights overrides single entries
+DEFAULT_WEIGHTS = {
+    "readme_large": 2,  # per README of at least min_readme_size bytes
+    "readme_small": 1,  # per smaller README
+    "min_readme_size": 500,
+    "docs_folder": 2,  # project has a docs folder
+    "md_many": 2,  # more than md_many_count markdown files
+    "md_many_count": 5,
+    "md_some": 1,  # more than md_some_count markdown files
+    "md_some_count": 2,
+    "size_large": 2,  # more than size_large_bytes of documentation
+    "size_large_bytes": 50000,
+    "size_medium": 1,
+    "size_medium_bytes": 10000,
+}
+
+# Type codes (kinds column)
+KIND_OTHER, KIND_MD, KIND_TXT, KIND_PDF, KIND_DOCX = range(5)
+KIND_BY_EXTENSION = {".md": KIND_MD, ".txt": KIND_TXT, ".pdf": KIND_PDF, ".docx": KIND_DOCX}
+
+# Flags (flags column)
+FLAG_DIRECT = 1  # collected file (README, manifest, .md, ...) as opposed to a file inside a docs folder
+FLAG_IN_DOCS = 2  # file inside a docs folder
+FLAG_DOCS_DIR = 4  # marker row of a docs folder (size 0)
+FLAG_README = 8
+FLAG_MANIFEST = 16
+FLAG_OTHER_DOC = 32  # LICENSE, CHANGELOG, CONTRIBUTING
+
+NUMPY_MIN_ROWS = 5000  # Below this, the plain loop is faster than converting to NumPy arrays
+
+FEATURES = ("score", "files", "readmes", "md_files", "doc_bytes", "docs_folder")
+
+
+def effective_weights(overrides=None):
+    """DEFAULT_WEIGHTS with the given entries replaced (unknown names raise ValueError)."""
+    overrides = overrides or {}
+    unknown = set(overrides) - set(DEFAULT_WEIGHTS)
+    if unknown:
+        raise ValueError(f"Unbekannte Bewertungsgewichte: {', '.join(sorted(unknown))}")
+    return dict(DEFAULT_WEIGHTS, **overrides)
+
+
+def kind_of(name):
+    return KIND_BY_EXTENSION.get(os.path.splitext(name)[1].lower(), KIND_OTHER)
+
+
+def _numpy():
+    """NumPy if installed (optional, loaded on first use), else None."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _number(value):
+    return int(value) if float(value).is_integer() else float(value)
+
+
+class DocColumns:
+    """The doc file rows of one project."""
+
+    __slots__ = ("sizes", "kinds", "flags")
+
+    def __init__(self, sizes=None, kinds=None, flags=None):
+        self.sizes = sizes if sizes is not None else array("q")
+        self.kinds = kinds if kinds is not None else array("B")
+        self.flags = flags if flags is not None else array("B")
+
+    def add(self, size, kind, flags):
+        self.sizes.append(size)
+        self.kinds.append(kind)
+        self.flags.append(flags)
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def to_bytes(self):
+        return self.sizes.tobytes(), self.kinds.tobytes(), self.flags.tobytes()
+
+
+def _features_python(projects, sizes, kinds, flags, n, weights):
+    """Group-by over the columns in one loop (no NumPy)."""
+    min_readme = weights["min_readme_size"]
+    readme_points = [0] * n
+    readmes = [0] * n
+    md_files = [0] * n
+    doc_bytes = [0] * n
+    docs_folder = [0] * n
+    files = [0] * n
+    for p, size, kind, flag in zip(projects, sizes, kinds, flags):
+        if flag & FLAG_DOCS_DIR:
+            docs_folder[p] = 1
+            continue
+        files[p] += 1
+        if flag & FLAG_IN_DOCS:
+            doc_bytes[p] += size
+            if kind == KIND_MD:
+                md_files[p] += 1
+        elif kind == KIND_MD:
+            md_files[p] += 1
+            doc_bytes[p] += size
+        if flag & FLAG_README and flag & FLAG_DIRECT:
+            readmes[p] += 1
+            readme_points[p] += weights["readme_large"] if size >= min_readme else weights["readme_small"]
+    scores = [
+        _tier_score(points, has_docs, md, total, weights)
+        for points, has_docs, md, total in zip(readme_points, docs_folder, md_files, doc_bytes)
+    ]
+    return {"score": scores, "files": files, "readmes": readmes, "md_files": md_files,
+            "doc_bytes": doc_bytes, "docs_folder": docs_folder}
+
+
+def _tier_score(readme_points, has_docs, md, total, weights):
+    score = readme_points
+    if has_docs:
+        score += weights["docs_folder"]
+    if md > weights["md_many_count"]:
+        score += weights["md_many"]
+    elif md > weights["md_some_count"]:
+        score += weights["md_some"]
+    if total > weights["size_large_bytes"]:
+        score += weights["size_large"]
+    elif total > weights["size_medium_bytes"]:
+        score += weights["size_medium"]
+    return score
+
+
+def _features_numpy(np, projects, sizes, kinds, flags, n, weights):
+    """The same group-by as a handful of bincount calls."""
+    projects = np.frombuffer(projects, dtype=np.int64)
+    sizes = np.frombuffer(sizes, dtype=np.int64)
+    kinds = np.frombuffer(kinds, dtype=np.uint8)
+    flags = np.frombuffer(flags, dtype=np.uint8)
+
+    def count(mask, values=None):
+        return np.bincount(projects, weights=mask if values is None else np.where(mask, values, 0), minlength=n)
+
+    marker = (flags & FLAG_DOCS_DIR) != 0
+    in_docs = (flags & FLAG_IN_DOCS) != 0
+    is_md = (kinds == KIND_MD) & ~marker
+    readme = ((flags & FLAG_README) != 0) & ((flags & FLAG_DIRECT) != 0) & ~marker
+    readme_values = np.where(sizes >= weights["min_readme_size"], weights["readme_large"], weights["readme_small"])
+    md_files = count(is_md)
+    doc_bytes = count(in_docs | is_md, sizes)
+    docs_folder = count(marker) > 0
+    score = count(readme, readme_values) + np.where(docs_folder, weights["docs_folder"], 0)
+    score += np.where(md_files > weights["md_many_count"], weights["md_many"],
+                      np.where(md_files > weights["md_some_count"], weights["md_some"], 0))
+    score += np.where(doc_bytes > weights["size_large_bytes"], weights["size_large"],
+                      np.where(doc_bytes > weights["size_medium_bytes"], weights["size_medium"], 0))
+    return {"score": score, "files": count(~marker).astype(np.int64), "readmes": count(readme).astype(np.int64),
+            "md_files": md_files.astype(np.int64), "doc_bytes": doc_bytes.astype(np.int64),
+            "docs_folder": docs_folder.astype(np.int64)}
+
+
+def score_project(columns, weights=None):
+    """Quality score of one project from its DocColumns."""
+    weights = weights or DEFAULT_WEIGHTS
+    features = _features_python([0] * len(columns), columns.sizes, columns.kinds, columns.flags, 1, weights)
+    return _number(features["score"][0])
+
+
+class DocTable:
+    """Doc file rows of many projects: project index, size, type code and flags per row."""
+
+    def __init__(self):
+        self.names = []
+        self.projects = array("q")
+        self.sizes = array("q")
+        self.kinds = array("B")
+        self.flags = array("B")
+
+    def add(self, name, columns):
+        index = len(self.names)
+        self.names.append(name)
+        self.projects.extend([index] * len(columns))
+        self.sizes.extend(columns.sizes)
+        self.kinds.extend(columns.kinds)
+        self.flags.extend(columns.flags)
+        return index
+
+    @classmethod
+    def from_catalog(cls, catalog):
+        """All projects with recorded doc rows (see Catalog.record_project)."""
+        table = cls()
+        sizes, kinds, flags = [], [], []
+        counts = []
+        for name, size_bytes, kind_bytes, flag_bytes in catalog.doc_columns():
+            table.names.append(name)
+            sizes.append(size_bytes)
+            kinds.append(kind_bytes)
+            flags.append(flag_bytes)
+            counts.append(len(kind_bytes))
+        table.sizes.frombytes(b"".join(sizes))
+        table.kinds.frombytes(b"".join(kinds))
+        table.flags.frombytes(b"".join(flags))
+        np = _numpy() if len(table.kinds) >= NUMPY_MIN_ROWS else None
+        if np is not None:
+            table.projects.frombytes(np.repeat(np.arange(len(counts), dtype=np.int64), counts).tobytes())
+        else:
+            for index, count in enumerate(counts):
+                table.projects.extend([index] * count)
+        return table
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def features(self, weights=None):
+        """Per-project columns (score, files, readmes, md_files, doc_bytes, docs_folder).
+
+        NumPy arrays if NumPy is installed and the table is large enough, else lists.
+        """
+        weights = weights or DEFAULT_WEIGHTS
+        np = _numpy() if len(self) >= NUMPY_MIN_ROWS else None
+        if np is not None:
+            return _features_numpy(np, self.projects, self.sizes, self.kinds, self.flags, len(self.names), weights)
+        return _features_python(self.projects, self.sizes, self.kinds, self.flags, len(self.names), weights)
+
+    def scores(self, weights=None):
+        """project name -> score"""
+        return {name: _number(score) for name, score in zip(self.names, self.features(weights)["score"])}
+
+    def rank(self, by="score", top=20, weights=None, min_score=None):
+        """The top projects by a feature (ties by name) as dicts with all features."""
+        if by not in FEATURES:
+            raise ValueError(f"Unbekanntes Merkmal: {by} (erlaubt: {', '.join(FEATURES)})")
+        features = self.features(weights)
+        values = features[by]
+        np = _numpy() if not isinstance(values, list) else None
+        if np is not None:
+            selected = np.arange(len(self.names))
+            if min_score is not None:
+                selected = selected[features["score"][selected] >= min_score]
+            # Partial sort: only entries reaching the top-th value (ties included) are sorted
+            if top is not None and 0 < top < len(selected):
+                kth = np.partition(-values[selected], top - 1)[top - 1]
+                selected = selected[-values[selected] <= kth]
+            order = sorted(selected.tolist(), key=lambda i: (-values[i], self.names[i]))
+        else:
+            selected = range(len(self.names))
+            if min_score is not None:
+                selected = [i for i in selected if features["score"][i] >= min_score]
+            order = sorted(selected, key=lambda i: (-values[i], self.names[i]))
+        if top is not None:
+            order = order[:top]
+        return [dict({"project": self.names[i]}, **{name: _number(features[name][i]) for name in FEATURES})
+                for i in order]
+
+    def report(self, weights=None, min_quality_score=3):
+        """Score distribution and totals over all projects."""
+        features = self.features(weights)
+        histogram = {}
+        for score in features["score"]:
+            score = _number(score)
+            histogram[score] = histogram.get(score, 0) + 1
+        return {
+            "projects": len(self.names),
+            "rows": len(self),
+            "well_documented": sum(count for score, count in histogram.items() if score >= min_quality_score),
+            "doc_bytes": int(sum(features["doc_bytes"])),
+            "histogram": dict(sorted(histogram.items())),
+        }
+
+
+def parse_weight(value):
+    """--weight docs_folder=3 -> ("docs_folder", 3)"""
+    name, _, number = value.partition("=")
+    try:
+        return name.strip(), _number(float(number))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ungültiges Gewicht: {value}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ranglisten und Berichte über die Dokumentationsqualität aller Projekte")
+    parser.add_argument("--catalog", help="Pfad zum Katalog (Standard: ZIELORDNER/katalog.sqlite3)")
+    parser.add_argument("--weight", action="append", type=parse_weight, default=[], metavar="NAME=WERT",
+                        help=f"Gewicht überschreiben ({', '.join(DEFAULT_WEIGHTS)})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rank = commands.add_parser("rank", help="Beste Projekte nach einem Merkmal")
+    rank.add_argument("--by", default="score", choices=FEATURES)
+    rank.add_argument("--top", type=int, default=20)
+    rank.add_argument("--min-score", type=float)
+    commands.add_parser("report", help="Verteilung der Scores")
+    args = parser.parse_args(argv)
+
+    import extract_documentation_deep as extractor
+    from catalog import Catalog
+    catalog_path = args.catalog or os.path.join(extractor.ZIELORDNER, extractor.CATALOG_FILE)
+    if not os.path.exists(catalog_path):
+        print(f"Kein Katalog gefunden unter {catalog_path}")
+        return 1
+    try:
+        weights = effective_weights(dict(args.weight))
+    except ValueError as e:
+        print(e)
+        return 2
+
+    started = time.perf_counter()
+    catalog = Catalog(catalog_path)
+    try:
+        table = DocTable.from_catalog(catalog)
+    finally:
+        catalog.close()
+    loaded = time.perf_counter()
+    if args.command == "rank":
+        rows = table.rank(args.by, args.top, weights, args.min_score)
+        for i, row in enumerate(rows, 1):
+            print(f"{i:3d}. {row['project']:<40} Score {row['score']:>4}  {row['md_files']:>4} .md  "
+                  f"{row['doc_bytes'] / 1024:>9.1f} KiB  {row['files']:>5} Dateien")
+    else:
+        report = table.report(weights, extractor.MIN_QUALITY_SCORE)
+        print(f"Projekte: {report['projects']}, Dateien: {report['rows']}, "
+              f"Dokumentation: {report['doc_bytes'] / 1024 / 1024:.1f} MiB")
+        print(f"Hochwertig (Score >= {extractor.MIN_QUALITY_SCORE}): {report['well_documented']}")
+        for score, count in report["histogram"].items():
+            print(f"  Score {score:>4}: {count}")
+    engine = "NumPy" if len(table) >= NUMPY_MIN_ROWS and _numpy() is not None else "Standardbibliothek"
+    print(f"({len(table)} Zeilen geladen in {loaded - started:.3f}s, ausgewertet in "
+          f"{time.perf_counter() - loaded:.3f}s, {engine})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
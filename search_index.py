@@ -0,0 +1,188 @@
+import os
+import sys
+import sqlite3
+import argparse
+import threading
+
+from catalog import read_only_uri
+from summarize import extract_text_from_file, expand_doc_files
+
+# Volltextindex (SQLite FTS5, BM25-Ranking) über die extrahierte Projektdokumentation
+
+SEARCH_INDEX_FILE = "suchindex.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    project_path TEXT,
+    file_path TEXT NOT NULL UNIQUE,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_project ON documents(project);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+    project UNINDEXED,
+    file_path UNINDEXED,
+    content,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def _fts_query(query):
+    """Quote every term so user input cannot break the FTS5 query syntax."""
+    terms = [t.replace('"', '""') for t in query.split()]
+    return " ".join(f'"{t}"' for t in terms if t)
+
+
+def indexed_file_states(db_path):
+    """file_path -> (mtime, size) of all indexed files, read-only (dry run)."""
+    conn = sqlite3.connect(read_only_uri(db_path), uri=True)
+    try:
+        return {row[0]: (row[1], row[2]) for row in conn.execute("SELECT file_path, mtime, size FROM documents")}
+    finally:
+        conn.close()
+
+
+class SearchIndex:
+    """Incrementally maintained full-text index over all archived projects."""
+
+    def __init__(self, db_path, journal_mode="WAL"):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def index_project(self, project, project_path, doc_paths):
+        """Re-index only the files of a project that changed since the last run.
+
+        Returns the number of (re-)indexed files.
+        """
+        files = expand_doc_files(doc_paths)
+        with self._lock:
+            known = {
+                row[1]: (row[0], row[2], row[3])
+                for row in self.conn.execute(
+                    "SELECT id, file_path, mtime, size FROM documents WHERE project = ?", (project,)
+                )
+            }
+
+        # Extract text outside of the transaction, only for new or changed files
+        changed = []
+        current = set()
+        for file_path in files:
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            current.add(file_path)
+            old = known.get(file_path)
+            if old and old[1] == st.st_mtime and old[2] == st.st_size:
+                continue
+            changed.append((file_path, st.st_mtime, st.st_size, extract_text_from_file(file_path)))
+
+        removed = [doc_id for path, (doc_id, _, _) in known.items() if path not in current]
+        if not changed and not removed:
+            return 0
+
+        with self._lock:
+            with self.conn:
+                for doc_id in removed:
+                    self.conn.execute("DELETE FROM docs_fts WHERE rowid = ?", (doc_id,))
+                    self.conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+                for file_path, mtime, size, text in changed:
+                    old = known.get(file_path)
+                    if old:
+                        doc_id = old[0]
+                        self.conn.execute(
+                            "UPDATE documents SET mtime = ?, size = ?, project_path = ? WHERE id = ?",
+                            (mtime, size, project_path, doc_id)
+                        )
+                        self.conn.execute("DELETE FROM docs_fts WHERE rowid = ?", (doc_id,))
+                    else:
+                        cur = self.conn.execute(
+                            "INSERT INTO documents (project, project_path, file_path, mtime, size) VALUES (?, ?, ?, ?, ?)",
+                            (project, project_path, file_path, mtime, size)
+                        )
+                        doc_id = cur.lastrowid
+                    self.conn.execute(
+                        "INSERT INTO docs_fts (rowid, project, file_path, content) VALUES (?, ?, ?, ?)",
+                        (doc_id, project, file_path, text)
+                    )
+        return len(changed)
+
+    def search(self, query, limit=20):
+        """Return the best matching projects, each with its best file and a snippet.
+
+        Results are dicts with project, project_path, file_path, score (BM25, lower is better)
+        and snippet, ordered by relevance.
+        """
+        fts_query = _fts_query(query)
+        if not fts_query:
+            return []
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT f.project, d.project_path, f.file_path, bm25(docs_fts) AS rank, "
+                "snippet(docs_fts, 2, '[', ']', ' … ', 16) "
+                "FROM docs_fts f JOIN documents d ON d.id = f.rowid "
+                "WHERE docs_fts MATCH ? ORDER BY rank LIMIT ?",
+                (fts_query, limit * 10)
+            ).fetchall()
+
+        results = []
+        seen_projects = set()
+        for project, project_path, file_path, rank, snippet in rows:
+            if project in seen_projects:
+                continue
+            seen_projects.add(project)
+            results.append({
+                "project": project,
+                "project_path": project_path,
+                "file_path": file_path,
+                "score": rank,
+                "snippet": snippet.replace("\n", " "),
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Volltextsuche über die archivierte Projektdokumentation")
+    parser.add_argument("query", nargs="+", help="Suchbegriffe")
+    parser.add_argument("--index", help="Pfad zur Indexdatei (Standard: ZIELORDNER/suchindex.sqlite3)")
+    parser.add_argument("--limit", type=int, default=20, help="Maximale Anzahl Projekte")
+    args = parser.parse_args(argv)
+
+    index_path = args.index
+    if not index_path:
+        import extract_documentation_deep as extractor
+        index_path = os.path.join(extractor.ZIELORDNER, SEARCH_INDEX_FILE)
+    if not os.path.exists(index_path):
+        print(f"Kein Suchindex gefunden unter {index_path}")
+        return 1
+
+    index = SearchIndex(index_path)
+    try:
+        results = index.search(" ".join(args.query), limit=args.limit)
+    finally:
+        index.close()
+
+    if not results:
+        print("Keine Treffer.")
+    for i, hit in enumerate(results, 1):
+        print(f"{i:2d}. {hit['project']}  ({hit['file_path']})")
+        print(f"    {hit['snippet']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,616 @@
+import os
+import re
+import sys
+import time
+import zlib
+import struct
+import sqlite3
+import zipfile
+import argparse
+import datetime
+import threading
+
+from atomic_io import atomic_write
+from catalog import read_only_uri
+from metrics import METRICS
+from progress import print_line
+from cancellation import check_cancelled
+
+# Segmentarchive: statt einer ZIP-Datei pro Projekt (plus Kopie in best_docs) werden alle
+# Projekte nacheinander an wenige große Segmentdateien angehängt. Ein SQLite-Index hält für
+# jedes Projekt Segment, Byte-Bereich und die Mitglieder (Pfad, Versatz im Block, Größen, CRC),
+# sodass ein einzelnes Projekt mit einem Seek und einem Read gelesen wird. Ein aufgefrischtes
+# Projekt wird neu angehängt; sein alter Block bleibt als Leerstand im Segment, bis der
+# Hintergrund-Kompaktierer die noch gültigen Blöcke eines versiegelten Segments umkopiert und
+# die Datei löscht. Versiegelte Segmente ändern sich bis dahin nicht (Backup, rsync).
+#
+# Dateien in ZIELORDNER/archiv:
+#   archiv.sqlite3       Index: segments, projects, members
+#   segment-NNNNN.bin    Kopf + Projektblöcke: PROJECT_HEADER + Name, dann je Mitglied
+#                        MEMBER_HEADER + Pfad + Daten (Deflate ohne zlib-Rahmen wie in ZIP)
+
+SEGMENT_FOLDER = "archiv"
+SEGMENT_INDEX_FILE = "archiv.sqlite3"
+SEGMENT_MAGIC = b"DOKSEG01"
+HEADER_SIZE = 8
+
+# tag, name length, member count
+PROJECT_HEADER = struct.Struct("<4sHI")
+PROJECT_TAG = b"PRJ1"
+# tag, path length, crc32, compressed size, size, mtime
+MEMBER_HEADER = struct.Struct("<4sHIQQd")
+MEMBER_TAG = b"DAT1"
+
+SEGMENT_MAX_BYTES = 1024 * 1024 * 1024  # Seal the current segment and start a new one beyond this size
+COMPRESS_LEVEL = 6
+COMPACT_RATIO = 0.5  # Compact a sealed segment once this share of it is superseded
+COMPACT_MIN_BYTES = 16 * 1024 * 1024  # ... and at least this much is dead
+COMPACT_BATCH_BYTES = 8 * 1024 * 1024  # Blocks moved per lock/fsync/commit
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    size INTEGER NOT NULL,
+    live_bytes INTEGER NOT NULL,
+    sealed INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS projects (
+    name TEXT PRIMARY KEY,
+    project_path TEXT,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    files INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    written_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_projects_segment ON projects(segment, offset);
+CREATE TABLE IF NOT EXISTS members (
+    project TEXT NOT NULL,
+    path TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    compressed INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    crc INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    PRIMARY KEY (project, path)
+) WITHOUT ROWID;
+"""
+
+
+def segment_file(directory, segment_id):
+    return os.path.join(directory, f"segment-{segment_id:05d}.bin")
+
+
+def archived_projects(directory):
+    """Names of all projects in the segment archive, read-only (dry run); empty without archive."""
+    index_path = os.path.join(directory, SEGMENT_INDEX_FILE)
+    if not os.path.exists(index_path):
+        return set()
+    conn = sqlite3.connect(read_only_uri(index_path), uri=True)
+    try:
+        return {row[0] for row in conn.execute("SELECT name FROM projects")}
+    finally:
+        conn.close()
+
+
+def _safe_path(path):
+    """Member path as a relative path below the target folder, or None if it would leave it."""
+    parts = [part for part in path.replace("\\", "/").split("/") if part not in ("", ".")]
+    if not parts or ".." in parts or re.match(r"^[A-Za-z]:", parts[0]):
+        return None
+    return os.path.join(*parts)
+
+
+class Member:
+    __slots__ = ("path", "offset", "compressed", "size", "crc", "mtime")
+
+    def __init__(self, path, offset, compressed, size, crc, mtime):
+        self.path = path
+        self.offset = offset  # of the member header, relative to the project block
+        self.compressed = compressed
+        self.size = size
+        self.crc = crc
+        self.mtime = mtime
+
+    def data(self, block):
+        """Uncompressed content from the project block (CRC checked)."""
+        start = self.offset + MEMBER_HEADER.size + len(self.path.encode("utf-8"))
+        tag = MEMBER_HEADER.unpack_from(block, self.offset)[0]
+        data = zlib.decompress(block[start:start + self.compressed], -15)
+        if tag != MEMBER_TAG or zlib.crc32(data) != self.crc:
+            raise ValueError(f"Beschädigtes Mitglied im Segmentarchiv: {self.path}")
+        return data
+
+
+class SegmentReader:
+    """Random access to projects in the segment archive (read-only)."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.RLock()
+        self.conn = self._connect()
+
+    def _connect(self):
+        index_path = os.path.join(self.directory, SEGMENT_INDEX_FILE)
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f"Kein Segmentarchiv unter {self.directory}")
+        return sqlite3.connect(f"file:{index_path}?mode=ro", uri=True, check_same_thread=False)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def has_project(self, name):
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM projects WHERE name = ?", (name,)).fetchone() is not None
+
+    def projects(self):
+        """(name, files, size, segment) of all archived projects, ordered by name."""
+        with self._lock:
+            return self.conn.execute("SELECT name, files, size, segment FROM projects ORDER BY name").fetchall()
+
+    def project_info(self, name):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT project_path, segment, offset, length, files, size, written_at FROM projects WHERE name = ?",
+                (name,)).fetchone()
+        if row is None:
+            return None
+        keys = ("project_path", "segment", "offset", "length", "files", "size", "written_at")
+        return dict(zip(keys, row))
+
+    def _locate(self, name):
+        """Project row and members read in one transaction (consistent with concurrent writers)."""
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                row = self.conn.execute("SELECT segment, offset, length FROM projects WHERE name = ?",
+                                        (name,)).fetchone()
+                members = [Member(*values) for values in self.conn.execute(
+                    "SELECT path, offset, compressed, size, crc, mtime FROM members WHERE project = ? "
+                    "ORDER BY offset", (name,))]
+            finally:
+                self.conn.execute("COMMIT")
+        return row, members
+
+    def read_block(self, name):
+        """(block, members) of a project with a single seek and read, or None if it is not archived."""
+        for _ in range(3):
+            row, members = self._locate(name)
+            if row is None:
+                return None
+            segment, offset, length = row
+            try:
+                with open(segment_file(self.directory, segment), "rb") as f:
+                    f.seek(offset)
+                    block = f.read(length)
+            except FileNotFoundError:
+                continue  # moved by a concurrent compaction: look it up again
+            tag, name_length, _ = PROJECT_HEADER.unpack_from(block)
+            header_name = block[PROJECT_HEADER.size:PROJECT_HEADER.size + name_length].decode("utf-8")
+            if tag != PROJECT_TAG or header_name != name:
+                raise ValueError(f"Segmentindex passt nicht zum Segment {segment} ({name})")
+            return block, members
+        raise OSError(f"Segment von {name} nicht lesbar")
+
+    def read_project(self, name):
+        """[(member, content)] of all files of a project."""
+        located = self.read_block(name)
+        if located is None:
+            return None
+        block, members = located
+        return [(member, member.data(block)) for member in members]
+
+    def read_file(self, name, path):
+        """Content of one file of a project (path relative to the project, with /), or None."""
+        located = self.read_block(name)
+        if located is None:
+            return None
+        block, members = located
+        for member in members:
+            if member.path == path:
+                return member.data(block)
+        return None
+
+    def extract_project(self, name, target_dir):
+        """Write the files of a project below target_dir; returns the number of files."""
+        files = self.read_project(name)
+        if files is None:
+            return None
+        count = 0
+        for member, data in files:
+            rel_path = _safe_path(member.path)
+            if rel_path is None:
+                print(f"{name}: Pfad außerhalb des Zielordners übersprungen: {member.path}")
+                continue
+            target = os.path.join(target_dir, rel_path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(data)
+            os.utime(target, (member.mtime, member.mtime))
+            count += 1
+        return count
+
+    def write_zip(self, name, zip_path):
+        """Write a project as an ordinary ZIP archive (as written without segment mode)."""
+        files = self.read_project(name)
+        if files is None:
+            return None
+        with atomic_write(zip_path, "wb") as f_out:
+            with zipfile.ZipFile(f_out, "w") as zipf:
+                for member, data in files:
+                    date_time = max(datetime.datetime.fromtimestamp(member.mtime),
+                                    datetime.datetime(1980, 1, 1)).timetuple()[:6]
+                    zinfo = zipfile.ZipInfo(member.path, date_time)
+                    zinfo.external_attr = 0o644 << 16
+                    zipf.writestr(zinfo, data, compress_type=zipfile.ZIP_DEFLATED)
+        return len(files)
+
+    def stats(self):
+        with self._lock:
+            segments, size, live, sealed = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(live_bytes), 0), "
+                "COALESCE(SUM(sealed), 0) FROM segments").fetchone()
+            projects, files, data_size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(files), 0), COALESCE(SUM(size), 0) FROM projects").fetchone()
+        return {
+            "segments": segments, "sealed": sealed, "projects": projects, "files": files,
+            "data_bytes": data_size, "segment_bytes": size,
+            "dead_bytes": size - segments * HEADER_SIZE - live,
+        }
+
+
+class SegmentArchive(SegmentReader):
+    """Appends projects to the current segment; compacts sealed segments in the background.
+
+    One writer per archive folder; the archive workers of a run share it (thread-safe).
+    """
+
+    def __init__(self, directory, max_segment_bytes=None):
+        os.makedirs(directory, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes or SEGMENT_MAX_BYTES
+        super().__init__(directory)
+        with self._lock:
+            self.conn.executescript(SCHEMA)
+            self._remove_orphans()
+            self._open_current()
+        self._compact_wanted = threading.Event()
+        self._compactor_stop = threading.Event()
+        self._compactor_thread = None
+
+    def _connect(self):
+        conn = sqlite3.connect(os.path.join(self.directory, SEGMENT_INDEX_FILE), timeout=30,
+                               check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _remove_orphans(self):
+        # Segments whose removal failed after a compaction (still open by a reader on Windows)
+        known = {row[0] for row in self.conn.execute("SELECT id FROM segments")}
+        for entry in os.listdir(self.directory):
+            match = re.fullmatch(r"segment-(\d+)\.bin", entry)
+            if match and int(match.group(1)) not in known:
+                try:
+                    os.remove(os.path.join(self.directory, entry))
+                except OSError:
+                    pass
+
+    def _open_current(self):
+        row = self.conn.execute("SELECT id, size FROM segments WHERE sealed = 0 ORDER BY id DESC LIMIT 1").fetchone()
+        if row is not None and not os.path.exists(segment_file(self.directory, row[0])):
+            # Segment file lost: forget its projects, they are archived again on the next run
+            with self.conn:
+                self._drop_segment(row[0])
+            row = None
+        if row is None:
+            self._create_segment()
+            return
+        self.current, size = row
+        self._data = open(segment_file(self.directory, self.current), "r+b")
+        # Drop what a crashed writer appended after the last indexed block
+        self._data.truncate(size)
+        self._data.seek(size)
+
+    def _create_segment(self):
+        with self.conn:
+            self.current = self.conn.execute(
+                "INSERT INTO segments (size, live_bytes, sealed, created_at) VALUES (?, 0, 0, ?)",
+                (HEADER_SIZE, time.time())).lastrowid
+        self._data = open(segment_file(self.directory, self.current), "w+b")
+        self._data.write(SEGMENT_MAGIC)
+        self._data.flush()
+        os.fsync(self._data.fileno())
+
+    def _drop_segment(self, segment_id):
+        self.conn.execute("DELETE FROM members WHERE project IN (SELECT name FROM projects WHERE segment = ?)",
+                          (segment_id,))
+        self.conn.execute("DELETE FROM projects WHERE segment = ?", (segment_id,))
+        self.conn.execute("DELETE FROM segments WHERE id = ?", (segment_id,))
+
+    def close(self):
+        self.stop_compactor()
+        with self._lock:
+            self._data.close()
+            self.conn.close()
+
+    def _append(self, length):
+        """Offset for a block of length bytes in the current segment (sealing a full segment first)."""
+        offset = self._data.tell()
+        if offset > HEADER_SIZE and offset + length > self.max_segment_bytes:
+            self._data.close()
+            with self.conn:
+                self.conn.execute("UPDATE segments SET sealed = 1 WHERE id = ?", (self.current,))
+            self._create_segment()
+            offset = HEADER_SIZE
+        return offset
+
+    def seal_current(self):
+        """Seal the current segment if it holds dead space, so that it can be compacted."""
+        with self._lock:
+            size, live = self.conn.execute("SELECT size, live_bytes FROM segments WHERE id = ?",
+                                           (self.current,)).fetchone()
+            if size - HEADER_SIZE > live:
+                self._append(self.max_segment_bytes)
+
+    def _sync(self):
+        # Blocks reach the disk before the index points to them
+        self._data.flush()
+        os.fsync(self._data.fileno())
+
+    @METRICS.timed("write_project_segment")
+    def store_project(self, name, project_path, members, cancel=None):
+        """Append a project (members: (file_path, path in archive)) and point the index to it.
+
+        A previous version of the project becomes dead space in its segment. Returns project_info().
+        """
+        name_bytes = name.encode("utf-8")
+        parts = [PROJECT_HEADER.pack(PROJECT_TAG, len(name_bytes), 0), name_bytes]
+        rows = []
+        offset = sum(len(part) for part in parts)
+        size = 0
+        for file_path, arcname in members:
+            check_cancelled(cancel)
+            try:
+                mtime = os.stat(file_path).st_mtime
+                with open(file_path, "rb") as f:
+                    data = f.read()
+            except OSError as e:
+                print_line(f"Error adding {file_path} to segment archive: {e}")
+                continue
+            METRICS.add("bytes_read", len(data))
+            METRICS.add("archive_bytes", len(data))
+            METRICS.add("files_stat")
+            compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, -15)
+            packed = compressor.compress(data) + compressor.flush()
+            path = arcname.replace(os.sep, "/")
+            path_bytes = path.encode("utf-8")
+            crc = zlib.crc32(data)
+            parts += [MEMBER_HEADER.pack(MEMBER_TAG, len(path_bytes), crc, len(packed), len(data), mtime),
+                      path_bytes, packed]
+            rows.append((name, path, offset, len(packed), len(data), crc, mtime))
+            offset += MEMBER_HEADER.size + len(path_bytes) + len(packed)
+            size += len(data)
+        parts[0] = PROJECT_HEADER.pack(PROJECT_TAG, len(name_bytes), len(rows))
+        block = b"".join(parts)
+
+        with self._lock:
+            block_offset = self._append(len(block))
+            self._data.write(block)
+            self._sync()
+            with self.conn:
+                old = self.conn.execute("SELECT segment, length FROM projects WHERE name = ?", (name,)).fetchone()
+                if old is not None:
+                    self.conn.execute("UPDATE segments SET live_bytes = live_bytes - ? WHERE id = ?",
+                                      (old[1], old[0]))
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO projects (name, project_path, segment, offset, length, files, size, "
+                    "written_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (name, project_path, self.current, block_offset, len(block), len(rows), size, time.time()))
+                self.conn.execute("DELETE FROM members WHERE project = ?", (name,))
+                self.conn.executemany(
+                    "INSERT INTO members (project, path, offset, compressed, size, crc, mtime) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                self.conn.execute("UPDATE segments SET size = ?, live_bytes = live_bytes + ? WHERE id = ?",
+                                  (block_offset + len(block), len(block), self.current))
+        METRICS.add("bytes_written", len(block))
+        if old is not None and old[0] != self.current:
+            self._compact_wanted.set()
+        return self.project_info(name)
+
+    # --- Kompaktierung ---
+
+    def compactable_segments(self, force=False):
+        """Sealed segments with enough dead space (force: any dead space)."""
+        with self._lock:
+            rows = self.conn.execute("SELECT id, size, live_bytes FROM segments WHERE sealed = 1").fetchall()
+        result = []
+        for segment_id, size, live in rows:
+            dead = size - HEADER_SIZE - live
+            if live == 0 or (force and dead > 0) or (
+                    dead >= COMPACT_MIN_BYTES and dead > COMPACT_RATIO * (size - HEADER_SIZE)):
+                result.append(segment_id)
+        return result
+
+    def compact_segment(self, segment_id, stop=None):
+        """Move the live blocks of a sealed segment to the current one and delete it.
+
+        Works in batches, so archive workers only wait for one batch at a time. Returns the
+        number of bytes freed, or None if stopped early (the segment stays consistent).
+        """
+        path = segment_file(self.directory, segment_id)
+        with self._lock:
+            size = self.conn.execute("SELECT size FROM segments WHERE id = ?", (segment_id,)).fetchone()[0]
+        with open(path, "rb") as source:
+            while True:
+                if stop is not None and stop.is_set():
+                    return None
+                with self._lock:
+                    rows = self.conn.execute(
+                        "SELECT name, offset, length FROM projects WHERE segment = ? ORDER BY offset",
+                        (segment_id,)).fetchall()
+                if not rows:
+                    break
+                batch, batch_bytes = [], 0
+                for name, offset, length in rows:
+                    if batch and batch_bytes + length > COMPACT_BATCH_BYTES:
+                        break
+                    # Sealed segments never change: read outside the lock
+                    source.seek(offset)
+                    batch.append((name, offset, source.read(length)))
+                    batch_bytes += length
+                with self._lock:
+                    moved = []
+                    for name, offset, block in batch:
+                        current = self.conn.execute("SELECT segment, offset FROM projects WHERE name = ?",
+                                                    (name,)).fetchone()
+                        if current != (segment_id, offset):
+                            continue  # refreshed meanwhile
+                        new_offset = self._append(len(block))
+                        self._data.write(block)
+                        moved.append((name, len(block), self.current, new_offset))
+                    self._sync()
+                    with self.conn:
+                        for name, length, new_segment, new_offset in moved:
+                            self.conn.execute("UPDATE projects SET segment = ?, offset = ? WHERE name = ?",
+                                              (new_segment, new_offset, name))
+                            self.conn.execute(
+                                "UPDATE segments SET size = MAX(size, ?), live_bytes = live_bytes + ? WHERE id = ?",
+                                (new_offset + length, length, new_segment))
+                            self.conn.execute("UPDATE segments SET live_bytes = live_bytes - ? WHERE id = ?",
+                                              (length, segment_id))
+                METRICS.add("segment_bytes_moved", sum(length for _, length, _, _ in moved))
+        with self._lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM segments WHERE id = ?", (segment_id,))
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # still open by a reader (Windows); removed when the archive is opened next
+        return size
+
+    def compact(self, force=False, stop=None):
+        """Compact all segments that need it; returns (segments, bytes freed).
+
+        force also seals the current segment and compacts every segment with any dead space.
+        """
+        if force:
+            self.seal_current()
+        segments = freed = 0
+        for segment_id in self.compactable_segments(force):
+            result = self.compact_segment(segment_id, stop)
+            if result is None:
+                break
+            segments += 1
+            freed += result
+        return segments, freed
+
+    def start_compactor(self):
+        """Compact in a background thread whenever a refresh leaves dead space in a sealed segment."""
+        self._compactor_stop.clear()
+        self._compact_wanted.set()  # leftovers of earlier runs
+
+        def run():
+            while not self._compactor_stop.is_set():
+                self._compact_wanted.wait()
+                self._compact_wanted.clear()
+                if self._compactor_stop.is_set():
+                    break
+                try:
+                    segments, freed = self.compact(stop=self._compactor_stop)
+                except (OSError, sqlite3.Error) as e:
+                    print_line(f"Kompaktierung des Segmentarchivs fehlgeschlagen: {e}")
+                    continue
+                if segments:
+                    print_line(f"Segmentarchiv kompaktiert: {segments} Segment(e), {freed / 1024 / 1024:.1f} MiB")
+
+        self._compactor_thread = threading.Thread(target=run, name="segment-compactor", daemon=True)
+        self._compactor_thread.start()
+
+    def stop_compactor(self):
+        self._compactor_stop.set()
+        self._compact_wanted.set()
+        if self._compactor_thread is not None:
+            self._compactor_thread.join()
+            self._compactor_thread = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Segmentarchive der Projektdokumentation")
+    parser.add_argument("--dir", help="Ordner des Segmentarchivs (Standard: ZIELORDNER/archiv)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("info", help="Umfang und Leerstand anzeigen")
+    listing = commands.add_parser("list", help="Projekte (oder die Dateien eines Projekts) auflisten")
+    listing.add_argument("project", nargs="?")
+    extract = commands.add_parser("extract", help="Dokumentation eines Projekts auspacken")
+    extract.add_argument("project")
+    target = extract.add_mutually_exclusive_group()
+    target.add_argument("--ziel", help="Zielordner (Standard: ./PROJEKT)")
+    target.add_argument("--zip", help="Stattdessen als ZIP-Datei schreiben")
+    show = commands.add_parser("show", help="Eine Datei eines Projekts ausgeben")
+    show.add_argument("project")
+    show.add_argument("path", help="Pfad relativ zum Projektordner")
+    compact = commands.add_parser("compact", help="Leerstand versiegelter Segmente entfernen")
+    compact.add_argument("--all", action="store_true", help="Auch Segmente mit wenig Leerstand kompaktieren")
+    args = parser.parse_args(argv)
+
+    directory = args.dir
+    if not directory:
+        import extract_documentation_deep as extractor
+        directory = os.path.join(extractor.ZIELORDNER, SEGMENT_FOLDER)
+    if not os.path.exists(os.path.join(directory, SEGMENT_INDEX_FILE)):
+        print(f"Kein Segmentarchiv gefunden unter {directory}")
+        return 1
+
+    if args.command == "compact":
+        with SegmentArchive(directory) as archive:
+            segments, freed = archive.compact(force=args.all)
+        print(f"Segmentarchiv kompaktiert: {segments} Segment(e), {freed / 1024 / 1024:.1f} MiB freigegeben")
+        return 0
+
+    with SegmentReader(directory) as reader:
+        if args.command == "info":
+            stats = reader.stats()
+            print(f"{stats['segments']} Segmente ({stats['sealed']} versiegelt): {stats['projects']} Projekte, "
+                  f"{stats['files']} Dateien, {stats['data_bytes'] / 1024 / 1024:.1f} MiB Dokumentation in "
+                  f"{stats['segment_bytes'] / 1024 / 1024:.1f} MiB, Leerstand {stats['dead_bytes'] / 1024 / 1024:.1f} MiB")
+        elif args.command == "list" and args.project is None:
+            for name, files, size, segment in reader.projects():
+                print(f"{name}\t{files}\t{size}\t{segment_file('', segment)}")
+        elif args.command == "list":
+            located = reader.read_block(args.project)
+            if located is None:
+                print(f"Projekt nicht im Segmentarchiv: {args.project}")
+                return 1
+            for member in located[1]:
+                print(f"{member.path}\t{member.size}\t{member.compressed}")
+        elif args.command == "show":
+            data = reader.read_file(args.project, args.path)
+            if data is None:
+                print(f"Datei nicht gefunden: {args.project}/{args.path}")
+                return 1
+            sys.stdout.buffer.write(data)
+        else:
+            started = time.perf_counter()
+            if args.zip:
+                count, target = reader.write_zip(args.project, args.zip), args.zip
+            else:
+                target = args.ziel or args.project
+                count = reader.extract_project(args.project, target)
+            if count is None:
+                print(f"Projekt nicht im Segmentarchiv: {args.project}")
+                return 1
+            print(f"{count} Dateien nach {target} geschrieben ({time.perf_counter() - started:.3f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
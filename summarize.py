@@ -1,162 +1,512 @@
 import os
-from docx import Document
-import PyPDF2
-import requests
+import re
+import json
+import hashlib
+import time
+import socket
+import threading
 
-def extract_text_from_file(filepath):
-    """Extract text content from different file types (.md, .docx, .pdf)"""
-    if filepath.endswith(".md") or filepath.endswith(".txt"):
+from cancellation import AnalysisCancelled, check_cancelled
+from metrics import METRICS
+from progress import print_line
+from llm_concurrency import DEFAULT_TIMEOUT
+
+# Schwere Abhängigkeiten (python-docx/lxml, PyPDF2, requests) werden erst geladen,
+# wenn eine Datei des jeweiligen Typs bzw. eine Zusammenfassung tatsächlich anfällt.
+
+LOCAL_LLM_URL = "http://localhost:1234/v1/chat/completions"  # OpenAI-compatible endpoint (LM Studio, Ollama)
+OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
+LOCAL_MODEL = "mistral"  # oder anderer lokaler Modellname
+OPENAI_MODEL = "gpt-4"  # oder gpt-3.5-turbo für günstigere Option
+
+MAX_TEXT_LENGTH = 15000  # Characters sent to the model in one summary request
+
+SUMMARY_PROMPT = """
+Fasse die Projektdokumentation zusammen (zwischen 500 und 1500 Wörter), strukturiert in:
+- Einleitung
+- Zielsetzung
+- Vorgehensweise
+- Ergebnisse
+- Erkenntnisse
+
+Text:
+{text}
+"""
+
+def _extract_plain_text(filepath):
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            return f.read()
+    except UnicodeDecodeError:
+        # Try with a different encoding if utf-8 fails
         try:
-            with open(filepath, "r", encoding="utf-8") as f:
+            with open(filepath, "r", encoding="latin-1") as f:
                 return f.read()
-        except UnicodeDecodeError:
-            # Try with a different encoding if utf-8 fails
-            try:
-                with open(filepath, "r", encoding="latin-1") as f:
-                    return f.read()
-            except Exception as e:
-                print(f"Error reading {filepath}: {e}")
-                return ""
-    elif filepath.endswith(".docx"):
+        except Exception as e:
+            print_line(f"Error reading {filepath}: {e}")
+            return ""
+
+def _load_plain_text_extractor():
+    return _extract_plain_text
+
+def _load_docx_extractor():
+    from docx import Document
+
+    def extract(filepath):
         try:
             doc = Document(filepath)
             return "\n".join([p.text for p in doc.paragraphs])
         except Exception as e:
-            print(f"Error reading DOCX {filepath}: {e}")
+            print_line(f"Error reading DOCX {filepath}: {e}")
             return ""
-    elif filepath.endswith(".pdf"):
+    return extract
+
+def _load_pdf_extractor():
+    import PyPDF2
+
+    def extract(filepath):
         try:
             reader = PyPDF2.PdfReader(filepath)
+            METRICS.add("pdf_pages", len(reader.pages))
             return "\n".join([page.extract_text() or "" for page in reader.pages])
         except Exception as e:
-            print(f"Error reading PDF {filepath}: {e}")
+            print_line(f"Error reading PDF {filepath}: {e}")
             return ""
-    return ""
-
-def summarize_project_local(doc_paths):
-    """Generate a summary using a local LLM API (e.g., LM Studio, Ollama)"""
-    # Filter for text-based files we can extract content from
-    text_files = [p for p in doc_paths if os.path.isfile(p) and 
-                 (p.endswith(".md") or p.endswith(".txt") or 
-                  p.endswith(".docx") or p.endswith(".pdf"))]
-    
-    if not text_files:
-        return "Keine Textdateien zur Zusammenfassung gefunden."
-    
-    # Extract text from all files
-    texts = []
-    for file_path in text_files:
-        text = extract_text_from_file(file_path)
-        if text:
-            texts.append(f"--- Datei: {os.path.basename(file_path)} ---\n{text}")
-    
-    if not texts:
-        return "Keine Textinhalte zur Zusammenfassung extrahiert."
-    
-    full_text = "\n\n".join(texts)
-    
-    # Limit text length to avoid overwhelming the model
-    max_length = 15000  # Characters
-    if len(full_text) > max_length:
-        full_text = full_text[:max_length] + "...\n[Text gekürzt wegen Längenbeschränkung]"
-    
-    prompt = f"""
-Fasse die Projektdokumentation zusammen (zwischen 500 und 1500 Wörter), strukturiert in:
-- Einleitung
-- Zielsetzung
-- Vorgehensweise
-- Ergebnisse
-- Erkenntnisse
+    return extract
 
-Text:
-{full_text}
-"""
-    
+# Extractor-Registry: Dateiendung -> Loader, der die Extraktionsfunktion liefert
+EXTRACTOR_LOADERS = {
+    ".md": _load_plain_text_extractor,
+    ".txt": _load_plain_text_extractor,
+    ".docx": _load_docx_extractor,
+    ".pdf": _load_pdf_extractor,
+}
+SUPPORTED_EXTENSIONS = tuple(EXTRACTOR_LOADERS)
+
+_extractors = {}
+_extractors_lock = threading.Lock()
+
+def register_extractor(extension, loader):
+    """Register a loader returning ``extract(filepath) -> str`` for a file extension (any case)."""
+    global SUPPORTED_EXTENSIONS
+    extension = extension.lower()
+    with _extractors_lock:
+        EXTRACTOR_LOADERS[extension] = loader
+        _extractors.pop(extension, None)
+        SUPPORTED_EXTENSIONS = tuple(EXTRACTOR_LOADERS)
+
+def get_extractor(extension):
+    """Return the extraction function for an extension, loading its parser on first use."""
+    extension = extension.lower()
+    extractor = _extractors.get(extension)
+    if extractor is None:
+        with _extractors_lock:
+            extractor = _extractors.get(extension)
+            if extractor is None:
+                loader = EXTRACTOR_LOADERS.get(extension)
+                if loader is None:
+                    return None
+                extractor = _extractors[extension] = loader()
+    return extractor
+
+def extract_text_from_file(filepath):
+    """Extract text content from different file types (.md, .txt, .docx, .pdf)"""
+    extension = os.path.splitext(filepath)[1].lower()
+    extractor = get_extractor(extension)
+    if extractor is None:
+        return ""
     try:
-        response = requests.post(
-            "http://localhost:1234/v1/chat/completions",
-            headers={"Content-Type": "application/json"},
-            json={
-                "model": "mistral",  # oder anderer lokaler Modellname
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.3
-            },
-            timeout=60  # 60 seconds timeout
-        )
-        
-        if response.status_code == 200:
-            return response.json()["choices"][0]["message"]["content"]
-        else:
-            return f"Fehler bei der Zusammenfassung: HTTP Status {response.status_code}\n{response.text}"
-    
+        size = os.path.getsize(filepath)
+    except OSError:
+        size = 0
+    with METRICS.timer(f"extract_text{extension}"):
+        text = extractor(filepath)
+    # Bytes and characters per file type calibrate the estimates of the dry run (planner.py)
+    METRICS.add("bytes_read", size)
+    METRICS.add("pdf_bytes" if extension == ".pdf" else "extract_bytes", size)
+    METRICS.add("pdf_chars" if extension == ".pdf" else "extract_chars", len(text))
+    return text
+
+def expand_doc_files(doc_paths):
+    """The files among collected doc paths that text can be extracted from.
+
+    collect_doc_files already lists the (not ignored) files of every docs folder;
+    the folder entries themselves are markers and are skipped here.
+    """
+    # Dateitypen, aus denen extract_text_from_file Text gewinnen kann (inkl. registrierter)
+    extensions = SUPPORTED_EXTENSIONS
+    files = []
+    seen = set()
+    for doc_path in doc_paths:
+        if doc_path.lower().endswith(extensions) and doc_path not in seen and not os.path.isdir(doc_path):
+            seen.add(doc_path)
+            files.append(doc_path)
+    return files
+
+def _post_chat(url, headers, payload, state, timeout=DEFAULT_TIMEOUT):
+    """POST a chat completion and return (status_code, text).
+
+    The response is streamed; text is the error body for non-200 responses.
+    Session and response are published in ``state`` so another thread can abort them.
+    """
+    import requests  # HTTP stack is only loaded once a summary is requested
+
+    session = requests.Session()
+    state["session"] = session
+    try:
+        response = session.post(url, headers=headers,
+                                json=dict(payload, stream=True, stream_options={"include_usage": True}),
+                                timeout=timeout, stream=True)
+        state["response"] = response
+        if response.status_code != 200:
+            return response.status_code, response.text
+
+        if "text/event-stream" not in response.headers.get("Content-Type", ""):
+            # Server ignored "stream": regular JSON body
+            body = response.json()
+            state["usage"] = body.get("usage")
+            return 200, body["choices"][0]["message"]["content"]
+
+        # Server-sent events: one "data: {...}" line per generated delta
+        parts = []
+        for line in response.iter_lines():
+            if not line or not line.startswith(b"data:"):
+                continue
+            data = line[5:].strip()
+            if data == b"[DONE]":
+                break
+            chunk = json.loads(data)
+            if chunk.get("usage"):
+                state["usage"] = chunk["usage"]
+            if chunk.get("choices"):
+                parts.append(chunk["choices"][0].get("delta", {}).get("content") or "")
+        return 200, "".join(parts)
+    finally:
+        session.close()
+
+def _response_socket(response):
+    """Best-effort lookup of the socket behind a streamed requests response."""
+    sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+    if sock is None:
+        # Connection already detached (e.g. "Connection: close"): socket lives in the file object
+        fp = getattr(getattr(response.raw, "_fp", None), "fp", None)
+        sock = getattr(getattr(fp, "raw", None), "_sock", None)
+    return sock
+
+def _abort_request(state):
+    """Shut down the connection of an in-flight request (stops generation on the server).
+
+    The blocked reader in the worker thread then sees EOF and cleans up itself;
+    closing the response here would wait for that reader's buffer lock.
+    """
+    response = state.get("response")
+    sock = _response_socket(response) if response is not None else None
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+def _record_stats(stats, state, prompt, text, started):
+    """Fill the caller's stats dict with token usage and latency of one request."""
+    if stats is None:
+        return
+    usage = state.get("usage") or {}
+    stats["latency"] = time.perf_counter() - started
+    stats["prompt_tokens"] = usage.get("prompt_tokens", len(prompt) // 4)
+    stats["completion_tokens"] = usage.get("completion_tokens", len(text) // 4)
+    stats["tokens_estimated"] = not usage
+
+def _chat_completion(url, headers, payload, cancel=None, stats=None, limiter=None):
+    """Run a chat completion; with a cancel token the request is aborted on cancellation.
+
+    If ``stats`` is a dict it receives latency and token counts (estimated from
+    the text length when the server does not report usage). With a ``limiter``
+    (llm_concurrency.AdaptiveLimiter) the request waits for a free slot of its
+    backend and reports its outcome back.
+    """
+    if limiter is None:
+        return _timed_chat_completion(url, headers, payload, cancel, stats, DEFAULT_TIMEOUT)
+    timeout = limiter.timeout
+    ticket = limiter.acquire(cancel)
+    outcome = None
+    try:
+        status_code, text = _timed_chat_completion(url, headers, payload, cancel, stats, timeout)
+        outcome = status_code
+        return status_code, text
     except Exception as e:
-        return f"Fehler bei der Zusammenfassung: {str(e)}"
-
-def summarize_with_openai(doc_paths, api_key=None):
-    """Generate a summary using OpenAI API (requires API key)"""
-    if not api_key:
-        # Try to get API key from environment variable
-        api_key = os.environ.get("OPENAI_API_KEY")
-        
-    if not api_key:
-        return "Kein OpenAI API-Key gefunden. Bitte in .env Datei oder Umgebungsvariable setzen."
-    
-    # Filter for text-based files we can extract content from
-    text_files = [p for p in doc_paths if os.path.isfile(p) and 
-                 (p.endswith(".md") or p.endswith(".txt") or 
-                  p.endswith(".docx") or p.endswith(".pdf"))]
-    
-    if not text_files:
-        return "Keine Textdateien zur Zusammenfassung gefunden."
-    
-    # Extract text from all files
-    texts = []
-    for file_path in text_files:
-        text = extract_text_from_file(file_path)
-        if text:
-            texts.append(f"--- Datei: {os.path.basename(file_path)} ---\n{text}")
-    
-    if not texts:
-        return "Keine Textinhalte zur Zusammenfassung extrahiert."
-    
-    full_text = "\n\n".join(texts)
-    
-    # Limit text length to avoid overwhelming the model
-    max_length = 15000  # Characters
-    if len(full_text) > max_length:
-        full_text = full_text[:max_length] + "...\n[Text gekürzt wegen Längenbeschränkung]"
-    
-    prompt = f"""
-Fasse die Projektdokumentation zusammen (zwischen 500 und 1500 Wörter), strukturiert in:
-- Einleitung
-- Zielsetzung
-- Vorgehensweise
-- Ergebnisse
-- Erkenntnisse
+        import requests
+        outcome = "timeout" if isinstance(e, requests.Timeout) else "error"
+        raise
+    finally:
+        limiter.release(ticket, outcome)  # cancelled requests (outcome None) do not count
 
-Text:
-{full_text}
+def _timed_chat_completion(url, headers, payload, cancel, stats, timeout):
+    with METRICS.timer("llm_request"):
+        status_code, text = _run_chat_completion(url, headers, payload, cancel, stats, timeout)
+    if status_code != 200:
+        METRICS.add("llm_errors")
+    return status_code, text
+
+def _run_chat_completion(url, headers, payload, cancel, stats, timeout):
+    state = {}
+    started = time.perf_counter()
+    prompt = payload["messages"][-1]["content"]
+    if cancel is None:
+        status_code, text = _post_chat(url, headers, payload, state, timeout)
+        _record_stats(stats, state, prompt, text, started)
+        return status_code, text
+
+    result = {}
+    def worker():
+        try:
+            result["value"] = _post_chat(url, headers, payload, state, timeout)
+        except Exception as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    while thread.is_alive():
+        if cancel.wait(0.1):
+            _abort_request(state)
+            raise AnalysisCancelled()
+    if "error" in result:
+        raise result["error"]
+    _record_stats(stats, state, prompt, result["value"][1], started)
+    return result["value"]
+
+# --- Abschnittsweise Zusammenfassung mit Wiederverwendung unveränderter Abschnitte ---
+#
+# Große Dokumentation wird in Abschnitte zerlegt (Markdown-Überschriften, sonst Absätze). Jeder
+# Abschnitt erhält einen Hash seines Textes und eine kurze Zwischenzusammenfassung (Digest); beides
+# speichert der Katalog. Ändert sich die Dokumentation, werden nur geänderte Abschnitte neu
+# zusammengefasst und per Merge-Prompt in die bestehende Zusammenfassung eingearbeitet.
+
+SECTION_MAX_CHARS = 8000  # Larger sections are split at paragraph boundaries
+MERGE_MAX_CHANGED = 0.5  # Above this share of changed sections the summary is rebuilt from all digests
+HEADING_PATTERN = re.compile(r"^#{1,3}\s+(.+?)\s*#*\s*$")
+
+SECTION_PROMPT = """
+Fasse den folgenden Abschnitt einer Projektdokumentation in höchstens 150 Wörtern zusammen.
+Nenne Zweck, wichtige Fakten, Entscheidungen und Ergebnisse; keine Einleitung, keine Wertung.
+
+Abschnitt: {key}
+
+{text}
 """
-    
+
+MERGE_PROMPT = """
+Unten steht die bestehende Zusammenfassung einer Projektdokumentation. Seitdem wurden einzelne
+Abschnitte der Dokumentation geändert, hinzugefügt oder entfernt. Aktualisiere die Zusammenfassung:
+übernimm alles, was weiterhin gilt, unverändert, arbeite die Änderungen ein und entferne Aussagen,
+die nur auf entfernten Abschnitten beruhten. Behalte Gliederung (Einleitung, Zielsetzung,
+Vorgehensweise, Ergebnisse, Erkenntnisse) und Umfang bei. Antworte nur mit der aktualisierten
+Zusammenfassung.
+
+Bestehende Zusammenfassung:
+{summary}
+
+Geänderte und neue Abschnitte:
+{changed}
+
+Entfernte Abschnitte:
+{removed}
+"""
+
+
+def _split_long(text, limit):
+    """Split text at paragraph boundaries into chunks of at most limit characters."""
+    chunks, current = [], ""
+    for paragraph in text.split("\n\n"):
+        while len(paragraph) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:limit])
+            paragraph = paragraph[limit:]
+        if current and len(current) + len(paragraph) + 2 > limit:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+def split_sections(files, base=None, cancel=None):
+    """Sections of the documentation as (key, text) in reading order.
+
+    The key (file relative to base, heading, occurrence) stays stable while other
+    parts of the documentation change.
+    """
+    sections = []
+    for file_path in files:
+        check_cancelled(cancel)
+        text = extract_text_from_file(file_path)
+        if not text or not text.strip():
+            continue
+        name = os.path.relpath(file_path, base) if base else os.path.basename(file_path)
+        name = name.replace(os.sep, "/")
+        # Markdown is split at headings of level 1-3, other formats form one section per file
+        parts = [["", []]]
+        if file_path.lower().endswith(".md"):
+            for line in text.splitlines():
+                match = HEADING_PATTERN.match(line)
+                if match:
+                    parts.append([match.group(1), []])
+                parts[-1][1].append(line)
+        else:
+            parts[0][1].append(text)
+        occurrences = {}
+        for heading, lines in parts:
+            body = "\n".join(lines).strip()
+            if not body:
+                continue
+            occurrences[heading] = occurrences.get(heading, 0) + 1
+            key = f"{name}#{heading}" + (f"#{occurrences[heading]}" if occurrences[heading] > 1 else "")
+            chunks = _split_long(body, SECTION_MAX_CHARS)
+            for i, chunk in enumerate(chunks):
+                sections.append((key if len(chunks) == 1 else f"{key}~{i + 1}", chunk))
+    return sections
+
+def section_hash(text):
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+def docs_fingerprint(doc_paths):
+    """Cheap change check of the summary inputs (paths, sizes and mtimes, no reading)."""
+    digest = hashlib.sha256()
+    for file_path in sorted(expand_doc_files(doc_paths)):
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            continue
+        digest.update(f"{file_path}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+
+class _Backend:
+    """One LLM backend for the requests of a summary; adds up latency and tokens in stats."""
+
+    def __init__(self, use_openai, url, api_key, cancel, stats, limiter):
+        if use_openai:
+            self.url = OPENAI_API_URL
+            self.headers = {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"}
+            self.model = OPENAI_MODEL
+        else:
+            self.url = url or LOCAL_LLM_URL
+            self.headers = {"Content-Type": "application/json"}
+            self.model = LOCAL_MODEL
+        self.cancel = cancel
+        self.stats = stats
+        self.limiter = limiter
+
+    def complete(self, prompt):
+        """Returns the generated text; raises RuntimeError with the server's answer on HTTP errors."""
+        request_stats = {}
+        status_code, text = _chat_completion(
+            self.url, self.headers,
+            {"model": self.model, "messages": [{"role": "user", "content": prompt}], "temperature": 0.3},
+            self.cancel, request_stats, self.limiter)
+        if self.stats is not None and request_stats:
+            for key in ("latency", "prompt_tokens", "completion_tokens"):
+                self.stats[key] = self.stats.get(key, 0) + request_stats[key]
+            self.stats["tokens_estimated"] = self.stats.get("tokens_estimated", False) or request_stats["tokens_estimated"]
+            self.stats["requests"] = self.stats.get("requests", 0) + 1
+        if status_code != 200:
+            raise RuntimeError(f"HTTP Status {status_code}\n{text}")
+        return text
+
+def _section_block(key, text):
+    return f"--- Abschnitt: {key} ---\n{text}"
+
+def _reduce_digests(backend, blocks):
+    """Final summary from section digests; too many digests are condensed in groups first."""
+    while len("\n\n".join(blocks)) > MAX_TEXT_LENGTH and len(blocks) > 1:
+        groups, current = [], []
+        for block in blocks:
+            if current and len("\n\n".join(current + [block])) > MAX_TEXT_LENGTH:
+                groups.append(current)
+                current = []
+            current.append(block)
+        groups.append(current)
+        if len(groups) == len(blocks):
+            break  # every digest alone exceeds the limit; the request below truncates
+        blocks = [_section_block(f"Teil {i + 1}", backend.complete(SECTION_PROMPT.format(
+            key=f"Teil {i + 1}", text="\n\n".join(group)))) for i, group in enumerate(groups)]
+    return backend.complete(SUMMARY_PROMPT.format(text="\n\n".join(blocks)[:MAX_TEXT_LENGTH]))
+
+def summarize_documentation(doc_paths, previous=None, base=None, cancel=None, stats=None, url=None,
+                            use_openai=False, api_key=None, limiter=None):
+    """Summarize a project's documentation, re-using what the previous summary still covers.
+
+    previous is (summary_text, {section_key: (input_hash, digest)}) from the catalog or None.
+    Documentation up to MAX_TEXT_LENGTH characters is summarized in one request with
+    SUMMARY_PROMPT; larger documentation section by section. Returns
+    (text, sections) with sections as [(key, input_hash, digest)] for the catalog; on
+    errors text starts with "Fehler bei der Zusammenfassung" and sections is None.
+    stats additionally receives summary_mode, input_chars, sections and sections_summarized.
+    """
+    if stats is None:
+        stats = {}
+    if use_openai:
+        api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        if not api_key:
+            return "Kein OpenAI API-Key gefunden. Bitte in .env Datei oder Umgebungsvariable setzen.", None
+    files = [p for p in expand_doc_files(doc_paths) if os.path.isfile(p)]
+    if not files:
+        return "Keine Textdateien zur Zusammenfassung gefunden.", None
+    sections = [(key, section_hash(text), text) for key, text in split_sections(files, base, cancel)]
+    if not sections:
+        return "Keine Textinhalte zur Zusammenfassung extrahiert.", None
+
+    previous_text, previous_sections = previous if previous else (None, {})
+    stats["input_chars"] = sum(len(text) for _, _, text in sections)
+    stats["sections"] = len(sections)
+    stats["sections_summarized"] = 0
+    unchanged = (previous_text is not None and len(previous_sections) == len(sections)
+                 and all(previous_sections.get(key, (None,))[0] == h for key, h, _ in sections))
+    if unchanged:
+        stats["summary_mode"] = "unverändert"
+        return previous_text, [(key, h, previous_sections[key][1]) for key, h, _ in sections]
+
+    backend = _Backend(use_openai, url, api_key, cancel, stats, limiter)
     try:
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_key}"
-            },
-            json={
-                "model": "gpt-4",  # oder gpt-3.5-turbo für günstigere Option
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.3
-            },
-            timeout=60  # 60 seconds timeout
-        )
-        
-        if response.status_code == 200:
-            return response.json()["choices"][0]["message"]["content"]
+        if sum(len(text) for _, _, text in sections) <= MAX_TEXT_LENGTH:
+            # Small documentation: one request over the full text, no digests needed
+            stats["summary_mode"] = "vollständig"
+            full_text = "\n\n".join(_section_block(key, text) for key, _, text in sections)
+            summary = backend.complete(SUMMARY_PROMPT.format(text=full_text))
+            return summary, [(key, h, None) for key, h, _ in sections]
+
+        # Digests of new and changed sections; unchanged sections keep theirs
+        digests, changed = [], []
+        for key, h, text in sections:
+            old_hash, old_digest = previous_sections.get(key, (None, None))
+            if old_hash == h and old_digest:
+                digests.append(old_digest)
+                continue
+            digest = backend.complete(SECTION_PROMPT.format(key=key, text=text))
+            stats["sections_summarized"] += 1
+            digests.append(digest)
+            changed.append((key, old_digest, digest))
+        result = [(key, h, digest) for (key, h, _), digest in zip(sections, digests)]
+        current_keys = {key for key, _, _ in sections}
+        removed = [(key, digest) for key, (_, digest) in previous_sections.items() if key not in current_keys]
+
+        mergeable = (previous_text is not None and any(d for _, d in previous_sections.values())
+                     and len(changed) + len(removed) <= MERGE_MAX_CHANGED * len(sections))
+        if mergeable:
+            stats["summary_mode"] = "zusammengeführt"
+            changed_text = "\n\n".join(
+                _section_block(key, f"Vorher: {old}\nJetzt: {new}" if old else f"Neu: {new}")
+                for key, old, new in changed) or "(keine)"
+            removed_text = "\n\n".join(_section_block(key, digest or "") for key, digest in removed) or "(keine)"
+            summary = backend.complete(MERGE_PROMPT.format(summary=previous_text, changed=changed_text,
+                                                           removed=removed_text))
         else:
-            return f"Fehler bei der Zusammenfassung mit OpenAI: HTTP Status {response.status_code}\n{response.text}"
-    
+            stats["summary_mode"] = "abschnittsweise"
+            summary = _reduce_digests(backend, [_section_block(key, digest) for (key, _, _), digest
+                                                in zip(sections, digests)])
+        return summary, result
     except Exception as e:
-        return f"Fehler bei der Zusammenfassung mit OpenAI: {str(e)}"
+        prefix = "Fehler bei der Zusammenfassung mit OpenAI" if use_openai else "Fehler bei der Zusammenfassung"
+        return f"{prefix}: {e}", None
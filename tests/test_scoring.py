@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+import scoring
+from scoring import (DEFAULT_WEIGHTS, FEATURES, DocColumns, DocTable, effective_weights, score_project,
+                     FLAG_DIRECT, FLAG_IN_DOCS, FLAG_DOCS_DIR, FLAG_README, FLAG_MANIFEST, FLAG_OTHER_DOC)
+
+np = pytest.importorskip("numpy")
+
+ROW_FLAGS = [FLAG_DIRECT, FLAG_DIRECT | FLAG_README, FLAG_DIRECT | FLAG_MANIFEST, FLAG_DIRECT | FLAG_OTHER_DOC,
+             FLAG_IN_DOCS, FLAG_IN_DOCS | FLAG_README, FLAG_DOCS_DIR]
+
+
+def random_columns(rng):
+    columns = DocColumns()
+    for _ in range(rng.randrange(0, 25)):
+        flags = rng.choice(ROW_FLAGS)
+        size = 0 if flags & FLAG_DOCS_DIR else rng.choice([0, 120, 499, 500, 4000, rng.randrange(60000)])
+        columns.add(size, rng.randrange(5), flags)
+    return columns
+
+
+@pytest.fixture
+def table():
+    rng = random.Random(46)
+    table = DocTable()
+    for i in range(400):
+        table.add(f"projekt_{i:03d}", random_columns(rng))
+    return table
+
+
+def both_engines(table, weights):
+    n = len(table.names)
+    python = scoring._features_python(table.projects, table.sizes, table.kinds, table.flags, n, weights)
+    numpy = scoring._features_numpy(np, table.projects, table.sizes, table.kinds, table.flags, n, weights)
+    return python, numpy
+
+
+@pytest.mark.parametrize("overrides", [
+    {},
+    {"docs_folder": 3, "min_readme_size": 1000, "md_some_count": 0},
+    {"readme_large": 2.5, "size_medium": 0.5, "size_large_bytes": 20000},
+])
+def test_numpy_and_python_features_are_equal(table, overrides):
+    python, numpy = both_engines(table, effective_weights(overrides))
+    for name in FEATURES:
+        assert list(numpy[name]) == pytest.approx(python[name]), name
+
+
+def test_rank_and_report_do_not_depend_on_the_engine(table, monkeypatch):
+    weights = effective_weights({"md_many_count": 3})
+    monkeypatch.setattr(scoring, "NUMPY_MIN_ROWS", 0)
+    assert not isinstance(table.features(weights)["score"], list)
+    with_numpy = (table.rank(top=25, weights=weights), table.rank("doc_bytes", top=None, weights=weights, min_score=3),
+                  table.report(weights), table.scores(weights))
+    monkeypatch.setattr(scoring, "_numpy", lambda: None)
+    assert isinstance(table.features(weights)["score"], list)
+    without_numpy = (table.rank(top=25, weights=weights), table.rank("doc_bytes", top=None, weights=weights, min_score=3),
+                     table.report(weights), table.scores(weights))
+    assert with_numpy == without_numpy
+
+
+def test_table_scores_match_single_project_scores():
+    rng = random.Random(7)
+    table = DocTable()
+    expected = {}
+    for i in range(50):
+        columns = random_columns(rng)
+        table.add(str(i), columns)
+        expected[str(i)] = score_project(columns, DEFAULT_WEIGHTS)
+    numpy_scores = scoring._features_numpy(np, table.projects, table.sizes, table.kinds, table.flags,
+                                           len(table.names), DEFAULT_WEIGHTS)["score"]
+    assert dict(zip(table.names, (scoring._number(s) for s in numpy_scores))) == expected
@@ -0,0 +1,106 @@
+import os
+import zipfile
+
+import pytest
+
+from segments import SegmentArchive, SegmentReader, archived_projects, segment_file
+
+PROJECTS = {
+    f"projekt{i}": {
+        "README.md": f"# Projekt {i}\n".encode("utf-8") + os.urandom(3000),
+        "docs/handbuch.txt": f"Handbuch {i}\n".encode("utf-8") * 200,
+    }
+    for i in range(6)
+}
+
+
+def _write_project(root, name, files):
+    """Write files below root/name; returns the members for store_project()."""
+    members = []
+    for rel_path, data in files.items():
+        path = os.path.join(root, name, *rel_path.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        members.append((path, rel_path))
+    return members
+
+
+def _assert_contents(reader, expected):
+    assert {row[0] for row in reader.projects()} == set(expected)
+    for name, files in expected.items():
+        assert {member.path: data for member, data in reader.read_project(name)} == files
+        for rel_path, data in files.items():
+            assert reader.read_file(name, rel_path) == data
+
+
+@pytest.fixture
+def archive_dir(tmp_path):
+    return str(tmp_path / "archiv")
+
+
+def test_append_refresh_compact_read_back(tmp_path, archive_dir):
+    source = str(tmp_path / "quelle")
+    expected = {name: dict(files) for name, files in PROJECTS.items()}
+    # Small segments: every few projects seal one
+    archive = SegmentArchive(archive_dir, max_segment_bytes=12 * 1024)
+    for name, files in PROJECTS.items():
+        info = archive.store_project(name, os.path.join(source, name), _write_project(source, name, files))
+        assert info["files"] == len(files)
+    first_segment = archive.project_info("projekt0")["segment"]
+    assert archive.stats()["sealed"] >= 1
+    _assert_contents(archive, expected)
+
+    # Refresh: the old blocks become dead space in their (sealed) segments
+    for name in ("projekt0", "projekt3"):
+        expected[name]["README.md"] = f"# {name}, neu\n".encode("utf-8") + os.urandom(2000)
+        expected[name]["NEU.md"] = b"Neue Datei\n"
+        archive.store_project(name, os.path.join(source, name), _write_project(source, name, expected[name]))
+    assert archive.project_info("projekt0")["segment"] != first_segment
+    assert archive.stats()["dead_bytes"] > 0
+    _assert_contents(archive, expected)
+
+    segments, freed = archive.compact(force=True)
+    assert segments >= 1 and freed > 0
+    stats = archive.stats()
+    assert stats["dead_bytes"] == 0
+    assert stats["projects"] == len(expected)
+    assert not os.path.exists(segment_file(archive_dir, first_segment))
+    _assert_contents(archive, expected)
+
+    # Appending after a compaction still works
+    expected["projekt6"] = {"README.md": b"# Projekt 6\n"}
+    archive.store_project("projekt6", os.path.join(source, "projekt6"),
+                          _write_project(source, "projekt6", expected["projekt6"]))
+    archive.close()
+
+    # Read back with a fresh reader, as a later run does
+    assert archived_projects(archive_dir) == set(expected)
+    with SegmentReader(archive_dir) as reader:
+        _assert_contents(reader, expected)
+        zip_path = str(tmp_path / "projekt3.zip")
+        assert reader.write_zip("projekt3", zip_path) == len(expected["projekt3"])
+        with zipfile.ZipFile(zip_path) as zipf:
+            assert {name: zipf.read(name) for name in zipf.namelist()} == expected["projekt3"]
+        target = str(tmp_path / "entpackt")
+        assert reader.extract_project("projekt0", target) == len(expected["projekt0"])
+        with open(os.path.join(target, "docs", "handbuch.txt"), "rb") as f:
+            assert f.read() == expected["projekt0"]["docs/handbuch.txt"]
+
+
+def test_reopen_keeps_appending(tmp_path, archive_dir):
+    source = str(tmp_path / "quelle")
+    with SegmentArchive(archive_dir) as archive:
+        archive.store_project("projekt0", source, _write_project(source, "projekt0", PROJECTS["projekt0"]))
+    with SegmentArchive(archive_dir) as archive:
+        archive.store_project("projekt1", source, _write_project(source, "projekt1", PROJECTS["projekt1"]))
+        assert archive.project_info("projekt0")["segment"] == archive.project_info("projekt1")["segment"]
+        _assert_contents(archive, {name: PROJECTS[name] for name in ("projekt0", "projekt1")})
+
+
+def test_unknown_project(archive_dir):
+    with SegmentArchive(archive_dir) as archive:
+        assert archive.read_project("fehlt") is None
+        assert archive.read_file("fehlt", "README.md") is None
+        assert not archive.has_project("fehlt")
+    assert archived_projects(str(archive_dir) + "-fehlt") == set()
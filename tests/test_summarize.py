@@ -0,0 +1,129 @@
+import os
+
+import pytest
+
+import extract_documentation_deep as extractor
+from benchmark import MockLLMServer
+from catalog import Catalog
+from progress import ProgressBus
+from summarize import summarize_documentation, MAX_TEXT_LENGTH
+
+SECTIONS = 12
+
+
+def _handbook(changed=None):
+    """Markdown above MAX_TEXT_LENGTH with SECTIONS headings; changed: index of an edited section."""
+    parts = ["# Handbuch\n\nEinleitung des Projekts."]
+    for i in range(SECTIONS):
+        text = f"Abschnitt {i} beschreibt Teil {i} des Projekts. " * 30
+        if i == changed:
+            text += "Seit Version 2 gilt eine neue Regel."
+        parts.append(f"## Kapitel {i}\n\n{text}")
+    text = "\n\n".join(parts) + "\n"
+    assert len(text) > MAX_TEXT_LENGTH
+    return text
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+@pytest.fixture
+def llm():
+    with MockLLMServer(latency=0.01, chunks=5) as server:
+        yield server
+
+
+@pytest.fixture
+def project(tmp_path):
+    path = str(tmp_path / "projekte" / "werkzeug")
+    _write(os.path.join(path, "README.md"), "# Werkzeug\n\nKurze Beschreibung.\n")
+    _write(os.path.join(path, "docs", "handbuch.md"), _handbook())
+    _write(os.path.join(path, "main.py"), "print('hallo')\n")
+    return path
+
+
+def test_summarize_documentation_incremental(project, llm):
+    handbook = os.path.join(project, "docs", "handbuch.md")
+    stats = {}
+    text, sections = summarize_documentation([handbook], base=project, stats=stats, url=llm.url)
+    assert stats["summary_mode"] == "abschnittsweise"
+    assert stats["sections_summarized"] == stats["sections"] == len(sections)
+    assert all(digest for _, _, digest in sections)
+    previous = (text, {key: (h, digest) for key, h, digest in sections})
+
+    requests = llm.requests
+    stats = {}
+    unchanged_text, _ = summarize_documentation([handbook], previous, base=project, stats=stats, url=llm.url)
+    assert stats["summary_mode"] == "unverändert"
+    assert unchanged_text == text
+    assert llm.requests == requests
+
+    _write(handbook, _handbook(changed=3))
+    stats = {}
+    _, merged = summarize_documentation([handbook], previous, base=project, stats=stats, url=llm.url)
+    assert stats["summary_mode"] == "zusammengeführt"
+    assert stats["sections_summarized"] == 1
+    assert [key for (key, h, _), (_, old_h, _) in zip(merged, sections) if h != old_h] == [
+        "docs/handbuch.md#Kapitel 3"]
+    # One digest for the edited section, one merge request
+    assert llm.requests == requests + 2
+
+
+def test_summarize_project_incremental(tmp_path, project, llm):
+    config = extractor.default_config(start_paths=[str(tmp_path / "projekte")], output_dir=str(tmp_path / "ausgabe"),
+                                      enable_summarization=True, use_openai=False, local_llm_url=llm.url,
+                                      events_file=None, shard_mode=False, profile_mode=None,
+                                      prometheus_textfile=None)
+    os.makedirs(config.summaries_dir)
+    events = ProgressBus()
+    received = []
+    events.subscribe(received.append)
+    catalog = Catalog(str(tmp_path / "katalog.sqlite3"))
+    scan_id = catalog.start_scan(config.start_paths)
+    run = extractor.AnalysisRun(config, catalog, scan_id, set(), None, events)
+
+    def summarize():
+        doc_files = extractor.collect_doc_files(project, ignore=run.ignore)
+        del received[:]
+        run.summarize_project((project, doc_files, "werkzeug"))
+        assert not [e for e in received if e["type"] == "summary_failed"]
+        (done,) = [e for e in received if e["type"] == "summary_done"]
+        return done, doc_files
+
+    done, doc_files = summarize()
+    assert done["mode"] == "abschnittsweise"
+    assert done["sections_summarized"] == done["sections"]
+    summary_path = os.path.join(config.summaries_dir, "werkzeug_zusammenfassung.md")
+    with open(summary_path, encoding="utf-8") as f:
+        assert f.read().startswith("# KI-Zusammenfassung: werkzeug")
+    assert not run.summary_outdated("werkzeug", doc_files)
+
+    done, _ = summarize()
+    assert done["mode"] == "unverändert"
+    assert done["sections_summarized"] == 0
+
+    _write(os.path.join(project, "docs", "handbuch.md"), _handbook(changed=7))
+    assert run.summary_outdated("werkzeug", extractor.collect_doc_files(project, ignore=run.ignore))
+    done, _ = summarize()
+    assert done["mode"] == "zusammengeführt"
+    assert done["sections_summarized"] == 1
+    assert run.stats["summaries_created"] == 2
+    catalog.close()
+
+
+def test_main_writes_summaries(tmp_path, project, llm):
+    config = extractor.default_config(start_paths=[str(tmp_path / "projekte")], output_dir=str(tmp_path / "ausgabe"),
+                                      max_depth=2, enable_summarization=True, use_openai=False,
+                                      local_llm_url=llm.url, events_file=None, shard_mode=False,
+                                      profile_mode=None, prometheus_textfile=None)
+    events = ProgressBus()
+    received = []
+    events.subscribe(received.append)
+    extractor.main(config=config, events=events)
+    assert not [e for e in received if e["type"] == "summary_failed"]
+    proj_folder = extractor.unique_project_name(project)
+    assert [e["project"] for e in received if e["type"] == "summary_done"] == [proj_folder]
+    assert os.listdir(config.summaries_dir) == [f"{proj_folder}_zusammenfassung.md"]
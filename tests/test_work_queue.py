@@ -0,0 +1,123 @@
+import os
+import time
+import multiprocessing
+
+import pytest
+
+from work_queue import WorkQueue, MAX_ATTEMPTS
+
+ITEMS = [f"/projekte/p{i:03d}" for i in range(60)]
+
+
+def _claim_all(db_path, worker, results):
+    """Worker process: claim and complete projects until none is left."""
+    queue = WorkQueue(db_path, worker=worker)
+    queue.join_run()
+    claimed = []
+    while True:
+        item = queue.claim()
+        if item is None:
+            break
+        claimed.append(item)
+        queue.complete(item)
+    queue.finish_worker({"discovered": len(claimed)})
+    results.put((worker, claimed))
+    queue.close()
+
+
+def _claim_and_die(db_path, lease_seconds):
+    """Worker process that claims one project and crashes (no release, no heartbeat)."""
+    queue = WorkQueue(db_path, worker="abgestuerzt", lease_seconds=lease_seconds)
+    queue.join_run()
+    queue.claim()
+    os._exit(0)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "arbeitsliste.sqlite3")
+
+
+def _filled_queue(db_path, items, **kwargs):
+    queue = WorkQueue(db_path, worker="entdecker", **kwargs)
+    queue.join_run()
+    assert queue.claim_discovery()
+    queue.add_items(items)
+    queue.finish_discovery()
+    return queue
+
+
+def _spawn(target, *args):
+    process = multiprocessing.get_context("spawn").Process(target=target, args=args)
+    process.start()
+    return process
+
+
+def test_processes_claim_every_project_exactly_once(db_path):
+    queue = _filled_queue(db_path, ITEMS)
+    results = multiprocessing.get_context("spawn").Queue()
+    processes = [_spawn(_claim_all, db_path, f"w{i}", results) for i in range(4)]
+    claimed = dict(results.get(timeout=60) for _ in processes)
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    all_claimed = [item for items in claimed.values() for item in items]
+    assert sorted(all_claimed) == ITEMS
+    assert queue.counts() == {"done": len(ITEMS)}
+    assert sorted(stats["discovered"] for stats in queue.worker_stats()) == sorted(map(len, claimed.values()))
+    queue.close()
+
+
+def test_expired_lease_of_crashed_worker_is_taken_over(db_path):
+    queue = _filled_queue(db_path, ITEMS[:1], lease_seconds=0.5)
+    process = _spawn(_claim_and_die, db_path, 0.5)
+    process.join(timeout=60)
+
+    # The crashed worker still holds a live lease ...
+    assert queue.counts() == {"claimed": 1}
+    assert queue.claimed_by_others() == 1
+    assert queue.claim() is None
+    # ... which another worker takes over once it has expired
+    time.sleep(0.6)
+    assert queue.claim() == ITEMS[0]
+    queue.complete(ITEMS[0])
+    assert queue.all_done()
+    queue.close()
+
+
+def test_project_fails_after_repeated_lease_expiry(db_path):
+    queue = _filled_queue(db_path, ITEMS[:1], lease_seconds=0.05)
+    for _ in range(MAX_ATTEMPTS):
+        assert queue.claim() == ITEMS[0]
+        time.sleep(0.1)
+    assert queue.claim() is None
+    assert queue.counts() == {"failed": 1}
+    queue.close()
+
+
+def test_release_claims_hands_projects_back(db_path):
+    queue = _filled_queue(db_path, ITEMS[:2])
+    assert queue.claim() == ITEMS[0]
+    queue.release_claims()
+    other = WorkQueue(db_path, worker="anderer")
+    other.join_run()
+    assert other.claim() == ITEMS[0]
+    other.close()
+    queue.close()
+
+
+def test_merge_is_claimed_by_exactly_one_finished_worker(db_path):
+    first = _filled_queue(db_path, ITEMS[:2])
+    second = WorkQueue(db_path, worker="zweiter")
+    second.join_run()
+    for queue in (first, second):
+        item = queue.claim()
+        queue.complete(item)
+
+    first.finish_worker({"total_projects": 1})
+    assert not first.claim_merge()  # the second worker is still running
+    second.finish_worker({"total_projects": 1})
+    assert [second.claim_merge(), first.claim_merge()] == [True, False]
+    first.close()
+    second.close()
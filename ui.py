@@ -1,9 +1,22 @@
 import os
-import sys
+import queue
+import shutil
+import tempfile
+import collections
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 import threading
 import extract_documentation_deep as extractor
+from search_index import SearchIndex, SEARCH_INDEX_FILE
+from cancellation import CancelToken, AnalysisCancelled
+from progress import ProgressBus, ProgressModel, STAGES, STAGE_LABELS, format_duration
+from llm_concurrency import format_snapshot
+
+# Log-Pipeline: Zeilen landen in einer Queue und werden per Timer gebündelt ins Text-Widget übernommen
+LOG_POLL_MS = 100  # Interval between two queue drains
+LOG_BATCH_LINES = 2000  # Maximum lines appended per drain
+LOG_MAX_LINES = 5000  # Lines kept in the widget (ring buffer), the full log is spooled to disk
+PROGRESS_POLL_MS = 250  # Refresh interval of the progress bars
 
 class DocumentationAnalyzerUI:
     def __init__(self, root):
@@ -44,13 +57,24 @@ class DocumentationAnalyzerUI:
         self.use_openai = tk.BooleanVar(value=False)
         self.min_summaries = tk.IntVar(value=5)
         self.max_summaries = tk.IntVar(value=10)
+        self.search_query = tk.StringVar()
+        
+        # Status variables
+        self.is_running = False
+        self.cancel_token = None
+        self.log_queue = queue.Queue()
+        self.log_lines = collections.deque(maxlen=LOG_MAX_LINES)
+        self.log_spool = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+        self.event_queue = queue.Queue()
+        self.progress_model = ProgressModel()
+        self.progress_widgets = {}
         
         # Create UI elements
         self.create_ui()
         
-        # Status variables
-        self.is_running = False
-        self.log_text = ""
+        # Start draining the log and progress queues
+        self.root.after(LOG_POLL_MS, self.drain_log_queue)
+        self.root.after(PROGRESS_POLL_MS, self.refresh_progress)
         
     def create_ui(self):
         print("[DEBUG] Starte Aufbau der UI...")
@@ -213,6 +237,51 @@ class DocumentationAnalyzerUI:
             
             print("[DEBUG] Batch-Verarbeitungsoptionen erstellt.")
             
+            # Search section
+            search_frame = ttk.LabelFrame(main_frame, text="Suche", padding="15")
+            search_frame.pack(fill=tk.X, pady=10)
+            
+            search_desc = ttk.Label(search_frame, text="Volltextsuche in der archivierten Dokumentation:")
+            search_desc.pack(anchor=tk.W, pady=(0, 5))
+            
+            search_input_frame = ttk.Frame(search_frame)
+            search_input_frame.pack(fill=tk.X)
+            
+            search_entry = ttk.Entry(search_input_frame, textvariable=self.search_query, width=50)
+            search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5, pady=5)
+            search_entry.bind("<Return>", lambda event: self.search_docs())
+            
+            search_btn = ttk.Button(search_input_frame, text="Suchen", command=self.search_docs)
+            search_btn.pack(side=tk.RIGHT, padx=5, pady=5)
+            
+            self.search_results_widget = tk.Text(search_frame, wrap=tk.WORD, height=8,
+                                                 bg="white", fg=self.text_color,
+                                                 font=("Consolas", 10),
+                                                 borderwidth=1, relief=tk.SOLID)
+            self.search_results_widget.pack(fill=tk.X, pady=5)
+            
+            print("[DEBUG] Suche erstellt.")
+            
+            # Progress section: one bar per pipeline stage with rate and ETA
+            progress_frame = ttk.LabelFrame(main_frame, text="Fortschritt", padding="15")
+            progress_frame.pack(fill=tk.X, pady=10)
+            progress_frame.columnconfigure(1, weight=1)
+            
+            for row, stage in enumerate(STAGES):
+                stage_label = ttk.Label(progress_frame, text=STAGE_LABELS[stage], width=22)
+                stage_label.grid(row=row, column=0, sticky=tk.W, pady=2)
+                bar = ttk.Progressbar(progress_frame, orient=tk.HORIZONTAL, mode="determinate", maximum=1000)
+                bar.grid(row=row, column=1, sticky=tk.EW, padx=5, pady=2)
+                status_label = ttk.Label(progress_frame, text="–", width=40)
+                status_label.grid(row=row, column=2, sticky=tk.W, pady=2)
+                self.progress_widgets[stage] = (bar, status_label)
+            
+            # Adaptive LLM concurrency: current limit and throughput per backend
+            self.llm_label = ttk.Label(progress_frame, text="", justify=tk.LEFT)
+            self.llm_label.grid(row=len(STAGES), column=0, columnspan=3, sticky=tk.W, pady=(6, 0))
+            
+            print("[DEBUG] Fortschritt erstellt.")
+            
             # Log section
             log_frame = ttk.LabelFrame(main_frame, text="Log", padding="15")
             log_frame.pack(fill=tk.BOTH, expand=True, pady=10)
@@ -235,6 +304,9 @@ class DocumentationAnalyzerUI:
             log_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
             self.log_text_widget.config(yscrollcommand=log_scrollbar.set)
             
+            save_log_btn = ttk.Button(log_frame, text="Vollständiges Log speichern", command=self.save_log)
+            save_log_btn.pack(anchor=tk.E, pady=(5, 0))
+            
             print("[DEBUG] Log erstellt.")
             
             # Action buttons with improved styling
@@ -295,11 +367,127 @@ class DocumentationAnalyzerUI:
             self.output_dir.set(path)
     
     def log(self, message):
-        self.log_text += message + "\n"
+        # Thread-safe: the line is shown with the next drain
+        for line in message.split("\n"):
+            self.log_queue.put(line)
+    
+    def drain_log_queue(self):
+        lines = []
+        try:
+            while len(lines) < LOG_BATCH_LINES:
+                lines.append(self.log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        
+        if lines:
+            text = "\n".join(lines) + "\n"
+            self.log_spool.write(text)
+            self.log_lines.extend(lines)
+            
+            # Append only the new text and drop lines that fell out of the ring buffer
+            self.log_text_widget.insert(tk.END, text)
+            line_count = int(self.log_text_widget.index("end-1c").split(".")[0]) - 1
+            if line_count > LOG_MAX_LINES:
+                self.log_text_widget.delete(1.0, f"{line_count - LOG_MAX_LINES + 1}.0")
+            self.log_text_widget.see(tk.END)
+        
+        # Drain again immediately if there is a backlog, otherwise wait for the next tick
+        self.root.after(1 if not self.log_queue.empty() else LOG_POLL_MS, self.drain_log_queue)
+    
+    def refresh_progress(self):
+        # Events are produced in the worker thread and applied to the model here
+        try:
+            while True:
+                self.progress_model(self.event_queue.get_nowait())
+        except queue.Empty:
+            pass
+        
+        for stage, (bar, status_label) in self.progress_widgets.items():
+            progress = self.progress_model.stages[stage]
+            if progress.started is None:
+                continue
+            fraction = progress.fraction
+            if fraction is None:
+                # Unknown total (discovery): show activity instead of a fill level
+                if str(bar.cget("mode")) != "indeterminate":
+                    bar.config(mode="indeterminate")
+                    bar.start(50)
+                if progress.finished is not None:
+                    bar.stop()
+                    bar.config(mode="determinate", value=1000)
+            else:
+                if str(bar.cget("mode")) != "determinate":
+                    bar.stop()
+                    bar.config(mode="determinate")
+                bar.config(value=int(fraction * 1000))
+            
+            total = f"/{progress.total}" if progress.total is not None else ""
+            status = f"{progress.done}{total}  {progress.rate:.1f}/s"
+            if progress.finished is not None:
+                status += f"  fertig in {format_duration(progress.elapsed)}"
+            else:
+                status += f"  ETA {format_duration(progress.eta)}"
+            status_label.config(text=status)
+        
+        llm = self.progress_model.llm
+        self.llm_label.config(text="\n".join(f"LLM {format_snapshot(snapshot)}" for snapshot in llm.values()))
+        
+        self.root.after(PROGRESS_POLL_MS, self.refresh_progress)
+    
+    def reset_progress(self):
+        self.event_queue = queue.Queue()
+        self.progress_model = ProgressModel()
+        for bar, status_label in self.progress_widgets.values():
+            bar.stop()
+            bar.config(mode="determinate", value=0)
+            status_label.config(text="–")
+        self.llm_label.config(text="")
+    
+    def clear_log(self):
+        self.log_lines.clear()
+        self.log_spool.close()
+        self.log_spool = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
         self.log_text_widget.delete(1.0, tk.END)
-        self.log_text_widget.insert(tk.END, self.log_text)
-        self.log_text_widget.see(tk.END)
-        self.root.update_idletasks()
+    
+    def save_log(self):
+        path = filedialog.asksaveasfilename(title="Log speichern", defaultextension=".txt",
+                                            filetypes=[("Textdateien", "*.txt"), ("Alle Dateien", "*.*")])
+        if not path:
+            return
+        try:
+            self.log_spool.flush()
+            self.log_spool.seek(0)
+            with open(path, "w", encoding="utf-8") as f:
+                shutil.copyfileobj(self.log_spool, f)
+            self.log_spool.seek(0, os.SEEK_END)
+            self.log(f"Log gespeichert unter {path}")
+        except Exception as e:
+            self.log_spool.seek(0, os.SEEK_END)
+            messagebox.showerror("Fehler", f"Log konnte nicht gespeichert werden:\n{str(e)}")
+    
+    def search_docs(self):
+        query = self.search_query.get().strip()
+        if not query:
+            return
+        index_path = os.path.join(self.output_dir.get(), SEARCH_INDEX_FILE)
+        self.search_results_widget.delete(1.0, tk.END)
+        if not os.path.exists(index_path):
+            self.search_results_widget.insert(tk.END, f"Kein Suchindex gefunden unter {index_path}. Bitte zuerst eine Analyse durchführen.")
+            return
+        try:
+            index = SearchIndex(index_path)
+            try:
+                results = index.search(query)
+            finally:
+                index.close()
+        except Exception as e:
+            self.search_results_widget.insert(tk.END, f"Fehler bei der Suche: {str(e)}")
+            return
+        if not results:
+            self.search_results_widget.insert(tk.END, "Keine Treffer.")
+            return
+        for i, hit in enumerate(results, 1):
+            self.search_results_widget.insert(tk.END, f"{i}. {hit['project']}  ({hit['file_path']})\n    {hit['snippet']}\n")
     
     def start_analysis(self):
         if not self.start_paths:
@@ -310,39 +498,49 @@ class DocumentationAnalyzerUI:
         self.is_running = True
         self.start_btn.config(state=tk.DISABLED)
         self.stop_btn.config(state=tk.NORMAL)
-        self.log_text = ""
+        self.clear_log()
+        self.reset_progress()
         self.log("Analyse wird gestartet...")
         
-        # Configure extractor
-        extractor.STARTPFADEN = self.start_paths
-        extractor.ZIELORDNER = self.output_dir.get()
-        extractor.ENABLE_SUMMARIZATION = self.enable_summarization.get()
-        extractor.USE_OPENAI = self.use_openai.get()
-        extractor.MIN_SUMMARIES_PER_RUN = self.min_summaries.get()
-        extractor.MAX_SUMMARIES_PER_RUN = self.max_summaries.get()
-        
-        # Redirect stdout to capture log
-        original_stdout = sys.stdout
-        sys.stdout = self
+        # Settings of this run (the extractor module itself is not modified)
+        self.run_config = extractor.default_config(
+            start_paths=list(self.start_paths),
+            output_dir=self.output_dir.get(),
+            enable_summarization=self.enable_summarization.get(),
+            use_openai=self.use_openai.get(),
+            min_summaries=self.min_summaries.get(),
+            max_summaries=self.max_summaries.get(),
+        )
         
         # Run in a separate thread
+        self.cancel_token = CancelToken()
         self.analysis_thread = threading.Thread(target=self.run_analysis)
         self.analysis_thread.daemon = True
         self.analysis_thread.start()
     
     def run_analysis(self):
         try:
-            extractor.main()
+            events = ProgressBus()
+            events.subscribe(self.on_event)
+            extractor.main(cancel=self.cancel_token, events=events, config=self.run_config)
             self.root.after(0, self.analysis_complete)
+        except AnalysisCancelled:
+            self.root.after(0, self.analysis_cancelled)
         except Exception as e:
             self.root.after(0, lambda: self.analysis_error(str(e)))
     
+    def on_event(self, event):
+        # Called in the worker threads: log lines of this run go to the log pane, the rest to the progress bars
+        if event["type"] == "log":
+            self.log_queue.put(event["message"])
+        else:
+            self.event_queue.put(event)
+    
     def analysis_complete(self):
         self.is_running = False
         self.start_btn.config(state=tk.NORMAL)
         self.stop_btn.config(state=tk.DISABLED)
         self.log("\nAnalyse abgeschlossen!")
-        sys.stdout = sys.__stdout__
         messagebox.showinfo("Fertig", "Dokumentationsanalyse abgeschlossen!")
     
     def analysis_error(self, error_message):
@@ -350,27 +548,21 @@ class DocumentationAnalyzerUI:
         self.start_btn.config(state=tk.NORMAL)
         self.stop_btn.config(state=tk.DISABLED)
         self.log(f"\nFehler: {error_message}")
-        sys.stdout = sys.__stdout__
         messagebox.showerror("Fehler", f"Ein Fehler ist aufgetreten:\n{error_message}")
     
+    def analysis_cancelled(self):
+        self.is_running = False
+        self.start_btn.config(state=tk.NORMAL)
+        self.stop_btn.config(state=tk.DISABLED)
+        self.log("\nAnalyse wurde abgebrochen.")
+    
     def stop_analysis(self):
-        if self.is_running:
-            # We can't really stop the analysis once it's running,
-            # but we can restore the UI state
+        if self.is_running and self.cancel_token is not None:
+            # The worker stops at its next checkpoint, aborts open LLM requests and
+            # removes partial ZIPs; the UI is reset in analysis_cancelled()
             self.log("\nAnalyse wird abgebrochen...")
-            self.is_running = False
-            self.start_btn.config(state=tk.NORMAL)
             self.stop_btn.config(state=tk.DISABLED)
-            sys.stdout = sys.__stdout__
-    
-    def write(self, text):
-        # This method is used to capture stdout
-        self.root.after(0, lambda: self.log(text.rstrip()))
-        return len(text)
-    
-    def flush(self):
-        # Required for stdout redirection
-        pass
+            self.cancel_token.cancel()
 
 def main():
     root = tk.Tk()
@@ -0,0 +1,454 @@
+import io
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import contextlib
+
+import extract_documentation_deep as extractor
+from cancellation import CancelToken, AnalysisCancelled, check_cancelled
+from metrics import METRICS
+
+# Überwachungsmodus: nach einem vollständigen Lauf die Startpfade und Projektordner überwachen und
+# nur geänderte Projekte neu sammeln, bewerten, archivieren, indexieren und zusammenfassen.
+# Unter Linux über inotify (ctypes, keine Zusatzpakete); ohne inotify oder wenn die Watch-Limits
+# (fs.inotify.max_user_watches) erschöpft sind, werden die mtimes periodisch abgefragt.
+
+# inotify(7) event masks
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+# Project directories: finished writes and everything that adds, removes or renames entries
+PROJECT_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+                | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_EXCL_UNLINK)
+# Searched directories above the projects: only new, removed or renamed entries matter
+DISCOVERY_MASK = (IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+                  | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_EXCL_UNLINK)
+
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len (struct inotify_event)
+READ_SIZE = 64 * 1024
+
+DOC_FILE_NAMES = frozenset(extractor.README_FILES + extractor.MANIFEST_FILES + extractor.OTHER_DOC_FILES)
+
+
+class WatchLimitReached(OSError):
+    """No more inotify watches or instances (fs.inotify.max_user_watches/max_user_instances)."""
+
+
+def is_doc_change(proj, dirpath, name):
+    """True if a change to name in dirpath can alter the documentation collected for proj."""
+    if not name or name.startswith('.') or name == extractor.PROJECT_SUMMARY_FILE:
+        return False  # hidden and temporary files, and the summary the run itself writes
+    if name in DOC_FILE_NAMES or name.lower().endswith('.md'):
+        return True
+    rel_parts = os.path.relpath(os.path.join(dirpath, name), proj).split(os.sep)
+    return any(part in extractor.DOCS_FOLDERS for part in rel_parts)
+
+
+def is_skipped_dir(name):
+    return name.startswith('.') or name in extractor.SKIP_DIRS or name.lower() in extractor.COLLECT_SKIP_LOWER
+
+
+class Inotify:
+    """Minimal inotify binding (Linux) via ctypes."""
+
+    def __init__(self):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            self._add_watch = libc.inotify_add_watch
+            self._rm_watch = libc.inotify_rm_watch
+            init = libc.inotify_init1
+        except (OSError, AttributeError):
+            raise OSError(errno.ENOSYS, "inotify ist auf diesem System nicht verfügbar")
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = init(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            self._raise(ctypes.get_errno(), "inotify_init1")
+
+    @staticmethod
+    def _raise(err, what):
+        if err in (errno.ENOSPC, errno.EMFILE, errno.ENOMEM):
+            raise WatchLimitReached(err, f"{what}: {os.strerror(err)}")
+        raise OSError(err, f"{what}: {os.strerror(err)}")
+
+    def add_watch(self, path, mask):
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            self._raise(ctypes.get_errno(), path)
+        return wd
+
+    def rm_watch(self, wd):
+        self._rm_watch(self.fd, wd)  # fails harmlessly if the kernel already dropped the watch
+
+    def read_events(self, timeout):
+        """Wait up to timeout seconds; returns a list of (wd, mask, name)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, READ_SIZE)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class InotifyBackend:
+    """Watches every collected directory of each project and the searched directories above them."""
+
+    name = "inotify"
+
+    def __init__(self, ignore):
+        self.inotify = Inotify()
+        self.ignore = ignore
+        self.watches = {}  # wd -> (directory, project or None for searched directories)
+        self.project_watches = {}  # project -> set of wds
+        self.discovery_watches = {}  # directory -> wd
+        self.exhausted = None  # WatchLimitReached raised while handling events
+
+    def _add(self, path, proj):
+        mask = DISCOVERY_MASK if proj is None else PROJECT_MASK
+        try:
+            wd = self.inotify.add_watch(path, mask)
+        except WatchLimitReached:
+            raise
+        except OSError:
+            return None  # vanished or not readable
+        # The same inode may be reached twice (bind mounts); the first path wins
+        self.watches.setdefault(wd, (path, proj))
+        return wd
+
+    def _remove(self, wd):
+        if self.watches.pop(wd, None) is not None:
+            self.inotify.rm_watch(wd)
+
+    def _watch_tree(self, proj, top):
+        """Watch top and its collected subdirectories; True if they contain documentation."""
+        has_docs = os.path.basename(top) in extractor.DOCS_FOLDERS
+        wds = self.project_watches.setdefault(proj, set())
+        for dirpath, dirnames, filenames in extractor.walk_project(proj, ignore=self.ignore, top=top,
+                                                                   operation="watch.listdir"):
+            wd = self._add(dirpath, proj)
+            if wd is not None:
+                wds.add(wd)
+            # Files written before the watch existed would otherwise go unnoticed
+            has_docs = has_docs or any(is_doc_change(proj, dirpath, f) for f in filenames)
+        return has_docs
+
+    def watch_project(self, proj):
+        self._watch_tree(proj, proj)
+
+    def unwatch_project(self, proj):
+        for wd in self.project_watches.pop(proj, ()):
+            self._remove(wd)
+
+    def watch_discovery(self, dirs):
+        dirs = set(dirs)
+        for path in set(self.discovery_watches) - dirs:
+            self._remove(self.discovery_watches.pop(path))
+        for path in dirs - set(self.discovery_watches):
+            wd = self._add(path, None)
+            if wd is not None:
+                self.discovery_watches[path] = wd
+
+    def poll(self, timeout):
+        """Wait for events; returns (changed projects, whether to search for projects again)."""
+        changed = set()
+        rediscover = False
+        for wd, mask, name in self.inotify.read_events(timeout):
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost: every project may have changed
+                changed.update(self.project_watches)
+                rediscover = True
+                continue
+            entry = self.watches.get(wd)
+            if entry is None:
+                continue
+            dirpath, proj = entry
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                if proj is not None:
+                    self.project_watches.get(proj, set()).discard(wd)
+                continue
+            if proj is None:
+                rediscover = True  # a project may have appeared or disappeared
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                # Subdirectories are reported by their parent; the project root itself went away
+                rediscover = rediscover or dirpath == proj
+                continue
+            if mask & IN_ISDIR:
+                if is_skipped_dir(name):
+                    continue
+                path = os.path.join(dirpath, name)
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        if self._watch_tree(proj, path):
+                            changed.add(proj)
+                    except WatchLimitReached as e:
+                        self.exhausted = e
+                        changed.add(proj)
+                else:
+                    if mask & IN_MOVED_FROM:
+                        # A moved directory keeps its watches: drop them with the old path
+                        for moved_wd, (moved_path, _) in list(self.watches.items()):
+                            if moved_path == path or moved_path.startswith(path + os.sep):
+                                self._remove(moved_wd)
+                                self.project_watches.get(proj, set()).discard(moved_wd)
+                    changed.add(proj)  # the directory may have held documentation
+            elif is_doc_change(proj, dirpath, name):
+                changed.add(proj)
+        return changed, rediscover
+
+    def close(self):
+        self.inotify.close()
+
+
+def project_snapshot(proj, ignore):
+    """(path, mtime, size) of every documentation file of a project."""
+    entries = set()
+    for dirpath, dirnames, filenames in extractor.walk_project(proj, ignore=ignore, operation="watch.listdir"):
+        for name in filenames:
+            if is_doc_change(proj, dirpath, name):
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.add((path, st.st_mtime_ns, st.st_size))
+    return frozenset(entries)
+
+
+def directory_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class PollingBackend:
+    """Compares mtimes every interval seconds (no inotify or watch limits exhausted)."""
+
+    name = "Polling"
+    exhausted = None
+
+    def __init__(self, ignore, interval):
+        self.ignore = ignore
+        self.interval = interval
+        self.snapshots = {}
+        self.discovery = {}
+        self.next_poll = time.monotonic() + interval
+
+    def watch_project(self, proj):
+        self.snapshots[proj] = project_snapshot(proj, self.ignore)
+
+    def unwatch_project(self, proj):
+        self.snapshots.pop(proj, None)
+
+    def watch_discovery(self, dirs):
+        self.discovery = {path: directory_mtime(path) for path in dirs}
+
+    def poll(self, timeout):
+        wait = self.next_poll - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return set(), False
+        time.sleep(max(0.0, wait))
+        changed = set()
+        for proj, snapshot in self.snapshots.items():
+            current = project_snapshot(proj, self.ignore)
+            if current != snapshot:
+                self.snapshots[proj] = current
+                changed.add(proj)
+        rediscover = False
+        for path, mtime in self.discovery.items():
+            current = directory_mtime(path)
+            if current != mtime:
+                self.discovery[path] = current
+                rediscover = True
+        self.next_poll = time.monotonic() + self.interval
+        return changed, rediscover
+
+    def close(self):
+        pass
+
+
+class DocWatcher:
+    """Long-running watch session: debounces changes and syncs only the affected projects."""
+
+    def __init__(self, config, cancel=None, events=None):
+        self.config = config
+        self.cancel = cancel if cancel is not None else CancelToken()
+        self.events = events
+        self.ignore = extractor.create_ignore_engine(config)
+        self.backend = None
+        self.projects = set()
+        self.discovery_dirs = []
+        self.pending = set()
+        self.rediscover_pending = False
+        self.first_change = None
+        self.last_change = None
+
+    # --- Backends ---
+
+    def open_backend(self):
+        if sys.platform.startswith("linux"):
+            try:
+                return InotifyBackend(self.ignore)
+            except OSError as e:
+                print(f"inotify nicht verfügbar ({e}) – verwende Polling")
+        return PollingBackend(self.ignore, self.config.watch_poll_seconds)
+
+    def use_polling(self, reason):
+        print(f"Watch-Limit erreicht ({reason}) – wechsle zu Polling alle {self.config.watch_poll_seconds:g}s. "
+              f"Mehr Watches erlaubt z.B. 'sysctl fs.inotify.max_user_watches=524288'.")
+        self.backend.close()
+        self.backend = PollingBackend(self.ignore, self.config.watch_poll_seconds)
+        for proj in self.projects:
+            self.backend.watch_project(proj)
+        self.backend.watch_discovery(self.discovery_dirs)
+
+    # --- Projektsuche ---
+
+    def discover(self):
+        """Search the start paths again and adjust the watches. Returns (added, removed) projects."""
+        # Fresh ignore rules: edited .gitignore files take effect with the next search
+        self.ignore = self.backend.ignore = extractor.create_ignore_engine(self.config)
+        searched_dirs = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            found = set(extractor.iter_projects(self.config, self.cancel, None, self.ignore, searched_dirs))
+        added, removed = found - self.projects, self.projects - found
+        self.projects = found
+        self.discovery_dirs = searched_dirs
+        try:
+            for proj in removed:
+                self.backend.unwatch_project(proj)
+            for proj in added:
+                self.backend.watch_project(proj)
+            self.backend.watch_discovery(searched_dirs)
+        except WatchLimitReached as e:
+            self.use_polling(e)
+        return added, removed
+
+    # --- Änderungen sammeln und verarbeiten ---
+
+    def note_changes(self, changed, rediscover):
+        if not changed and not rediscover:
+            return
+        now = time.monotonic()
+        self.pending |= changed
+        self.rediscover_pending = self.rediscover_pending or rediscover
+        self.last_change = now
+        if self.first_change is None:
+            self.first_change = now
+
+    def flush_due(self, now):
+        """Quiet for the debounce time, or changes pending for longer than the maximum delay."""
+        if self.first_change is None:
+            return False
+        return (now - self.last_change >= self.config.watch_debounce_seconds
+                or now - self.first_change >= self.config.watch_max_delay_seconds)
+
+    def flush(self, catalog):
+        self.first_change = self.last_change = None
+        if self.rediscover_pending:
+            self.rediscover_pending = False
+            added, removed = self.discover()
+            for proj in sorted(added):
+                print(f"Neues Projekt: {proj}")
+            for proj in sorted(removed):
+                print(f"Projekt entfernt oder nicht mehr erkannt: {proj}")
+            self.pending |= added
+        projects, self.pending = self.pending & self.projects, set()
+        if not projects:
+            return
+        print(f"\n[{time.strftime('%H:%M:%S')}] Änderungen in {len(projects)} Projekt(en) – werden neu verarbeitet")
+        started = time.perf_counter()
+        with METRICS.timer("watch.sync"):
+            stats = extractor.sync_projects(self.config, catalog, projects, self.cancel, self.events)
+        METRICS.add("watch_synced_projects", len(projects))
+        print(f"Abgleich fertig in {time.perf_counter() - started:.1f}s: {stats['total_projects']} Projekte "
+              f"archiviert, {stats['summaries_created']} KI-Zusammenfassungen")
+        self.write_metrics()
+
+    def write_metrics(self):
+        # Without the console table of write_metrics(): a watch session syncs often
+        if not self.config.enable_metrics:
+            return
+        try:
+            METRICS.write_json(os.path.join(self.config.output_dir, self.config.metrics_file))
+            if self.config.prometheus_textfile:
+                METRICS.write_prometheus(self.config.prometheus_textfile)
+        except OSError as e:
+            print(f"Metriken konnten nicht geschrieben werden: {e}")
+
+    # --- Hauptschleife ---
+
+    def run(self, initial_sync=True):
+        """Full run first (unless initial_sync is False), then watch until cancelled."""
+        config = self.config
+        if initial_sync:
+            extractor.main(cancel=self.cancel, events=self.events, config=config)
+        catalog = extractor.open_catalog(config)
+        METRICS.begin_run()
+        self.backend = self.open_backend()
+        try:
+            self.discover()
+            print(f"\nÜberwache {len(self.projects)} Projekte und {len(self.discovery_dirs)} Suchordner "
+                  f"({self.backend.name}) – Beenden mit Strg+C")
+            next_rescan = time.monotonic() + config.watch_rescan_seconds
+            while True:
+                check_cancelled(self.cancel)
+                now = time.monotonic()
+                timeout = 1.0  # stay responsive to cancellation
+                if self.first_change is not None:
+                    timeout = min(timeout, max(0.0, self.last_change + config.watch_debounce_seconds - now))
+                changed, rediscover = self.backend.poll(timeout)
+                if self.backend.exhausted is not None:
+                    self.use_polling(self.backend.exhausted)
+                now = time.monotonic()
+                if now >= next_rescan:
+                    # Periodic search catches what no event reports (e.g. network shares)
+                    rediscover = True
+                    next_rescan = now + config.watch_rescan_seconds
+                self.note_changes(changed, rediscover)
+                if self.flush_due(now):
+                    self.flush(catalog)
+        except (AnalysisCancelled, KeyboardInterrupt):
+            print("\nÜberwachung beendet.")
+            raise
+        finally:
+            self.backend.close()
+            catalog.close()
+            self.write_metrics()
+            METRICS.end_run()
@@ -0,0 +1,320 @@
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import threading
+
+from progress import print_line
+
+# Gemeinsame Arbeitsliste für verteilte Läufe (mehrere Prozesse oder Rechner, gemeinsamer ZIELORDNER).
+# Projekte werden mit einem Lease beansprucht, das der Worker per Heartbeat verlängert. Stirbt ein
+# Worker, läuft sein Lease ab und ein anderer übernimmt das Projekt. Kein WAL-Modus, da WAL auf
+# Netzlaufwerken (NAS) nicht zuverlässig funktioniert.
+
+WORK_QUEUE_FILE = "arbeitsliste.sqlite3"
+
+LEASE_SECONDS = 120
+MAX_ATTEMPTS = 3  # Projects whose lease expired this often are marked as failed
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    discovery_owner TEXT,
+    discovery_lease_until REAL,
+    discovery_done INTEGER NOT NULL DEFAULT 0,
+    merge_owner TEXT,
+    merged_at REAL
+);
+CREATE TABLE IF NOT EXISTS work (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    item TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, item)
+);
+CREATE INDEX IF NOT EXISTS idx_work_state ON work(run_id, state);
+CREATE TABLE IF NOT EXISTS workers (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    worker TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    heartbeat_at REAL NOT NULL,
+    finished_at REAL,
+    stats TEXT,
+    PRIMARY KEY (run_id, worker)
+);
+"""
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """Lease-based work claiming for one distributed run."""
+
+    def __init__(self, db_path, worker=None, lease_seconds=None):
+        self.db_path = db_path
+        self.worker = worker or worker_id()
+        self.lease_seconds = lease_seconds or LEASE_SECONDS
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, timeout=60, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        with self._lock:
+            self.conn.executescript(SCHEMA)
+        self.run_id = None
+        self._heartbeat_stop = threading.Event()
+        self._heartbeat_thread = None
+
+    def close(self):
+        """Stop the heartbeat and hand unfinished projects back (e.g. after a cancellation)."""
+        self.stop_heartbeat()
+        if self.run_id is not None:
+            try:
+                self.release_claims()
+                self.release_discovery()
+            except sqlite3.Error as e:
+                print(f"Arbeitsliste konnte nicht freigegeben werden: {e}")
+        with self._lock:
+            self.conn.close()
+
+    def _write(self, func):
+        """Run func(conn) in an IMMEDIATE transaction (one writer across all processes)."""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(self.conn)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return result
+
+    # --- Lauf ---
+
+    def join_run(self):
+        """Join the open (not yet merged) run or start a new one. Returns the run id."""
+        def join(conn):
+            row = conn.execute("SELECT id FROM runs WHERE merged_at IS NULL ORDER BY id DESC LIMIT 1").fetchone()
+            run_id = row[0] if row else conn.execute(
+                "INSERT INTO runs (created_at) VALUES (?)", (time.time(),)
+            ).lastrowid
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO workers (run_id, worker, started_at, heartbeat_at) VALUES (?, ?, ?, ?)",
+                (run_id, self.worker, now, now)
+            )
+            return run_id
+        self.run_id = self._write(join)
+        return self.run_id
+
+    # --- Projektsuche (genau ein Worker) ---
+
+    def claim_discovery(self):
+        """Take over discovery if nobody has finished it or holds a live lease on it."""
+        def claim(conn):
+            now = time.time()
+            cur = conn.execute(
+                "UPDATE runs SET discovery_owner = ?, discovery_lease_until = ? WHERE id = ? AND discovery_done = 0 "
+                "AND (discovery_owner IS NULL OR discovery_owner = ? OR discovery_lease_until < ?)",
+                (self.worker, now + self.lease_seconds, self.run_id, self.worker, now)
+            )
+            return cur.rowcount == 1
+        return self._write(claim)
+
+    def add_items(self, items):
+        items = list(items)
+        if items:
+            self._write(lambda conn: conn.executemany(
+                "INSERT OR IGNORE INTO work (run_id, item) VALUES (?, ?)", [(self.run_id, item) for item in items]
+            ))
+
+    def finish_discovery(self):
+        self._write(lambda conn: conn.execute(
+            "UPDATE runs SET discovery_done = 1 WHERE id = ? AND discovery_owner = ?", (self.run_id, self.worker)
+        ))
+
+    def release_discovery(self):
+        self._write(lambda conn: conn.execute(
+            "UPDATE runs SET discovery_owner = NULL, discovery_lease_until = NULL "
+            "WHERE id = ? AND discovery_owner = ? AND discovery_done = 0", (self.run_id, self.worker)
+        ))
+
+    def discovery_done(self):
+        with self._lock:
+            row = self.conn.execute("SELECT discovery_done FROM runs WHERE id = ?", (self.run_id,)).fetchone()
+        return bool(row and row[0])
+
+    # --- Projekte ---
+
+    def claim(self):
+        """Claim the next pending project (or one whose lease expired). Returns the item or None."""
+        def claim_one(conn):
+            now = time.time()
+            # Give up on projects that keep killing their workers
+            conn.execute(
+                "UPDATE work SET state = 'failed', owner = NULL WHERE run_id = ? AND state = 'claimed' "
+                "AND lease_until < ? AND attempts >= ?",
+                (self.run_id, now, MAX_ATTEMPTS)
+            )
+            row = conn.execute(
+                "SELECT item FROM work WHERE run_id = ? AND (state = 'pending' OR (state = 'claimed' AND lease_until < ?)) "
+                "ORDER BY rowid LIMIT 1",
+                (self.run_id, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE work SET state = 'claimed', owner = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE run_id = ? AND item = ?",
+                (self.worker, now + self.lease_seconds, self.run_id, row[0])
+            )
+            return row[0]
+        return self._write(claim_one)
+
+    def release_claims(self):
+        self._write(lambda conn: conn.execute(
+            "UPDATE work SET state = 'pending', owner = NULL, lease_until = NULL, attempts = attempts - 1 "
+            "WHERE run_id = ? AND owner = ? AND state = 'claimed'",
+            (self.run_id, self.worker)
+        ))
+
+    def complete(self, item):
+        self._write(lambda conn: conn.execute(
+            "UPDATE work SET state = 'done', lease_until = NULL WHERE run_id = ? AND item = ? AND owner = ?",
+            (self.run_id, item, self.worker)
+        ))
+
+    def counts(self):
+        """Number of projects per state in the current run."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT state, COUNT(*) FROM work WHERE run_id = ? GROUP BY state", (self.run_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def claimed_by_others(self):
+        """Projects other workers are still working on (their leases may yet expire)."""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM work WHERE run_id = ? AND state = 'claimed' AND owner != ?",
+                (self.run_id, self.worker)
+            ).fetchone()[0]
+
+    def all_done(self):
+        counts = self.counts()
+        return self.discovery_done() and not counts.get("pending") and not counts.get("claimed")
+
+    # --- Heartbeat ---
+
+    def renew_leases(self):
+        def renew(conn):
+            now = time.time()
+            until = now + self.lease_seconds
+            conn.execute(
+                "UPDATE work SET lease_until = ? WHERE run_id = ? AND owner = ? AND state = 'claimed'",
+                (until, self.run_id, self.worker)
+            )
+            conn.execute(
+                "UPDATE runs SET discovery_lease_until = ? WHERE id = ? AND discovery_owner = ? AND discovery_done = 0",
+                (until, self.run_id, self.worker)
+            )
+            conn.execute(
+                "UPDATE workers SET heartbeat_at = ? WHERE run_id = ? AND worker = ?",
+                (now, self.run_id, self.worker)
+            )
+        self._write(renew)
+
+    def start_heartbeat(self):
+        self._heartbeat_stop.clear()
+
+        def beat():
+            while not self._heartbeat_stop.wait(self.lease_seconds / 3):
+                try:
+                    self.renew_leases()
+                except sqlite3.Error as e:
+                    print_line(f"Heartbeat fehlgeschlagen: {e}")
+
+        self._heartbeat_thread = threading.Thread(target=beat, name="heartbeat", daemon=True)
+        self._heartbeat_thread.start()
+
+    def stop_heartbeat(self):
+        self._heartbeat_stop.set()
+        if self._heartbeat_thread is not None:
+            self._heartbeat_thread.join()
+            self._heartbeat_thread = None
+
+    # --- Abschluss ---
+
+    def finish_worker(self, stats):
+        self._write(lambda conn: conn.execute(
+            "UPDATE workers SET finished_at = ?, stats = ? WHERE run_id = ? AND worker = ?",
+            (time.time(), json.dumps(stats), self.run_id, self.worker)
+        ))
+
+    def claim_merge(self):
+        """True for exactly one worker once all projects are done and all live workers finished."""
+        def claim(conn):
+            if not self.all_done():
+                return False
+            running = conn.execute(
+                "SELECT COUNT(*) FROM workers WHERE run_id = ? AND finished_at IS NULL AND heartbeat_at > ?",
+                (self.run_id, time.time() - self.lease_seconds)
+            ).fetchone()[0]
+            if running:
+                return False
+            cur = conn.execute(
+                "UPDATE runs SET merge_owner = ?, merged_at = ? WHERE id = ? AND merged_at IS NULL",
+                (self.worker, time.time(), self.run_id)
+            )
+            return cur.rowcount == 1
+        return self._write(claim)
+
+    def worker_stats(self):
+        """Stats dicts reported by the workers of the current run."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT stats FROM workers WHERE run_id = ? AND stats IS NOT NULL", (self.run_id,)
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Status der gemeinsamen Arbeitsliste verteilter Läufe")
+    parser.add_argument("--queue", help="Pfad zur Arbeitsliste (Standard: ZIELORDNER/arbeitsliste.sqlite3)")
+    args = parser.parse_args(argv)
+
+    queue_path = args.queue
+    if not queue_path:
+        import extract_documentation_deep as extractor
+        queue_path = os.path.join(extractor.ZIELORDNER, WORK_QUEUE_FILE)
+    if not os.path.exists(queue_path):
+        print(f"Keine Arbeitsliste gefunden unter {queue_path}")
+        return 1
+
+    conn = sqlite3.connect(queue_path, timeout=60)
+    try:
+        now = time.time()
+        for run_id, discovery_done, merged_at in conn.execute(
+                "SELECT id, discovery_done, merged_at FROM runs ORDER BY id DESC LIMIT 5"):
+            counts = dict(conn.execute(
+                "SELECT state, COUNT(*) FROM work WHERE run_id = ? GROUP BY state", (run_id,)
+            ).fetchall())
+            status = "zusammengeführt" if merged_at else ("läuft" if discovery_done else "Projektsuche läuft")
+            print(f"Lauf #{run_id} ({status}): " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+            for worker, heartbeat_at, finished_at in conn.execute(
+                    "SELECT worker, heartbeat_at, finished_at FROM workers WHERE run_id = ? ORDER BY started_at", (run_id,)):
+                state = "fertig" if finished_at else f"letzter Heartbeat vor {int(now - heartbeat_at)}s"
+                print(f"  - {worker}: {state}")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())